@@ -2,7 +2,8 @@
 
 # Usage:
 #   Set CONTAINER_ROLE to control which process this container runs:
-#     worker  — Celery worker
+#     worker       — Celery worker, for all queues unless CELERY_QUEUES is set
+#     mail-worker  — Celery worker for the mail queue only
 #     beat    — Celery beat scheduler
 #     (unset) — Backend API server (default)
 
@@ -10,7 +11,10 @@ echo "Entry script starting..."
 
 if [[ "$CONTAINER_ROLE" == "worker" ]]; then
     echo "Starting Celery..."
-    celery -A appointment.celery_app:celery worker -l INFO --beat -Q appointment
+    celery -A appointment.celery_app:celery worker -l INFO --beat -Q "${CELERY_QUEUES:-appointment,mail}"
+elif [[ "$CONTAINER_ROLE" == "mail-worker" ]]; then
+    echo "Starting Celery mail worker..."
+    celery -A appointment.celery_app:celery worker -l INFO -Q mail -n mail@%h
 elif [[ "$CONTAINER_ROLE" == "flower" ]]; then
     celery -A appointment.celery_app:celery flower -l INFO
 elif [[ "$CONTAINER_ROLE" == "api" ]]; then
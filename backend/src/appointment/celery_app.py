@@ -2,6 +2,7 @@ import os
 
 import sentry_sdk
 from celery import Celery
+from celery.signals import worker_process_shutdown
 from dotenv import load_dotenv
 from appointment.defines import ONE_DAY_IN_SECONDS, SEVEN_DAYS_IN_SECONDS
 
@@ -77,3 +78,19 @@ def create_celery_app() -> Celery:
 
 
 celery = create_celery_app()
+
+
+@worker_process_shutdown.connect
+def dispose_database_engine(**kwargs):
+    """Close the worker process' pooled database connections on shutdown"""
+    from appointment.dependencies.database import dispose_engine
+
+    dispose_engine()
+
+
+@worker_process_shutdown.connect
+def close_smtp_connections(**kwargs):
+    """Close the worker process' pooled SMTP connections on shutdown"""
+    from appointment.controller.mailer import smtp_pool
+
+    smtp_pool.close_all()
@@ -1,20 +1,103 @@
-"""One-off command to set up Google Calendar watch channels for existing connected calendars."""
+"""One-off command to set up Google Calendar watch channels for existing connected calendars.
+
+Calendars are processed in batches ordered by id, with channels created from a pool of workers sharing one rate
+limit for the Google API. After each batch the last calendar id is written to a checkpoint file, so an interrupted
+backfill picks up where it left off. Pass restart=True to start over (e.g. to retry calendars that failed before).
+"""
 
 import json
 import logging
+import os
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 
 from google.oauth2.credentials import Credentials
+from sqlalchemy.exc import IntegrityError
 
-from ..controller.google_watch import get_webhook_url
-from ..database import repo, models
+from ..controller.apis.google_client import GoogleClient
+from ..controller.google_watch import RateLimiter, get_watch_max_workers, get_watch_rate_limiter, get_webhook_url
+from ..database import repo
 from ..dependencies.database import get_engine_and_session
 from ..dependencies.google import get_google_client
 from ..main import _common_setup
 
+# How many calendars we look up, and write channels back for, at a time
+BACKFILL_BATCH_SIZE = 500
+CHECKPOINT_FILE = '/tmp/backfill_google_channels.checkpoint'
+
+
+def read_checkpoint() -> int:
+    """Returns the id of the last calendar a previous run got through, or 0"""
+    try:
+        with open(CHECKPOINT_FILE) as fh:
+            return int(fh.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def write_checkpoint(calendar_id: int):
+    with open(CHECKPOINT_FILE, 'w') as fh:
+        fh.write(str(calendar_id))
+
+
+def clear_checkpoint():
+    if os.path.isfile(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
+
+
+def _create_channel(
+    google_client: GoogleClient, webhook_url: str, rate_limiter: RateLimiter, calendar_id: int, calendar_user: str,
+    token: Credentials,
+) -> dict | None:
+    """Create a channel for a calendar. Runs on the backfill pool, so it only deals with plain data.
+    Returns the new channel's columns, or None if Google didn't create a channel."""
+    rate_limiter.wait()
+    state = str(uuid.uuid4())
+    response = google_client.watch_events(calendar_user, webhook_url, token, state=state)
+    if not response:
+        return None
+
+    expiration_ms = int(response.get('expiration', 0))
+
+    rate_limiter.wait()
+    sync_token = google_client.get_initial_sync_token(calendar_user, token)
+
+    return {
+        'calendar_id': calendar_id,
+        'channel_id': response['id'],
+        'resource_id': response['resourceId'],
+        'expiration': datetime.fromtimestamp(expiration_ms / 1000, tz=timezone.utc),
+        'state': state,
+        'sync_token': sync_token,
+    }
 
-def run():
+
+def _save_channels(db, channels: list[dict], tokens: dict[int, str]) -> int:
+    """Write a batch of channels back, one by one if a channel was created elsewhere in the meantime.
+    Channels we can't save are stopped again with their calendar's token. Returns how many channels were saved."""
+    from ..tasks.google import stop_google_channel
+
+    try:
+        repo.google_calendar_channel.bulk_create(db, channels)
+        return len(channels)
+    except IntegrityError:
+        db.rollback()
+
+    saved = 0
+    for channel in channels:
+        try:
+            repo.google_calendar_channel.create(db, **channel)
+            saved += 1
+        except IntegrityError:
+            db.rollback()
+            print(f'  Calendar {channel["calendar_id"]}: already has a channel, skipping.')
+            # Nobody knows about the channel we just created, so don't let it keep sending us notifications
+            stop_google_channel.delay(channel['channel_id'], channel['resource_id'], tokens[channel['calendar_id']])
+    return saved
+
+
+def run(restart: bool = False):
     _common_setup()
     google_client = get_google_client()
 
@@ -27,75 +110,78 @@ def run():
         db.close()
         return
 
-    # Find connected Google calendars that are the default in a schedule
-    # and don't yet have a watch channel
-    schedule_calendar_ids = [
-        s.calendar_id for s in
-        db.query(models.Schedule.calendar_id).filter(models.Schedule.calendar_id != None).all()  # noqa: E711
-    ]
+    if restart:
+        clear_checkpoint()
 
-    all_calendars = db.query(models.Calendar).filter(
-        models.Calendar.provider == models.CalendarProvider.google,
-        models.Calendar.connected == True,  # noqa: E712
-        models.Calendar.id.in_(schedule_calendar_ids),
-    ).all()
-
-    candidates = []
-    for cal in all_calendars:
-        existing = repo.google_calendar_channel.get_by_calendar_id(db, cal.id)
-        if not existing:
-            candidates.append(cal)
-
-    print(f'Found {len(candidates)} connected Google calendar(s) without a watch channel.')
+    checkpoint = read_checkpoint()
+    if checkpoint:
+        print(f'Resuming after calendar {checkpoint}.')
 
     created = 0
     skipped = 0
     failed = 0
 
-    for calendar in candidates:
-        ext_conn = calendar.external_connection
-        if not ext_conn or not ext_conn.token:
-            print(f'  Calendar {calendar.id}: no external connection or token, skipping.')
-            skipped += 1
-            continue
-
-        try:
-            token = Credentials.from_authorized_user_info(
-                json.loads(ext_conn.token), google_client.SCOPES
-            )
-        except Exception as e:
-            print(f'  Calendar {calendar.id}: failed to parse token ({e}), skipping.')
-            skipped += 1
-            continue
+    try:
+        rate_limiter = get_watch_rate_limiter()
+        with ThreadPoolExecutor(max_workers=get_watch_max_workers()) as executor:
+            while True:
+                # Connected Google calendars that are the default in a schedule and don't yet have a watch channel
+                calendars = repo.google_calendar_channel.get_schedule_calendars_without_channel(
+                    db, after_id=checkpoint, limit=BACKFILL_BATCH_SIZE
+                )
+                if not calendars:
+                    break
+
+                futures = {}
+                tokens = {}
+                for calendar in calendars:
+                    ext_conn = calendar.external_connection
+                    if not ext_conn or not ext_conn.token:
+                        print(f'  Calendar {calendar.id}: no external connection or token, skipping.')
+                        skipped += 1
+                        continue
+
+                    try:
+                        token = Credentials.from_authorized_user_info(
+                            json.loads(ext_conn.token), google_client.SCOPES
+                        )
+                    except Exception as e:
+                        print(f'  Calendar {calendar.id}: failed to parse token ({e}), skipping.')
+                        skipped += 1
+                        continue
+
+                    future = executor.submit(
+                        _create_channel, google_client, webhook_url, rate_limiter, calendar.id, calendar.user, token
+                    )
+                    futures[future] = calendar.id
+                    tokens[calendar.id] = ext_conn.token
+
+                channels = []
+                for future in as_completed(futures):
+                    calendar_id = futures[future]
+                    try:
+                        channel = future.result()
+                    except Exception as e:
+                        print(f'  Calendar {calendar_id}: failed ({e}).')
+                        logging.error(f'[backfill_google_channels] Error for calendar {calendar_id}: {e}')
+                        failed += 1
+                        continue
+
+                    if not channel:
+                        print(f'  Calendar {calendar_id}: watch_events returned no response.')
+                        failed += 1
+                        continue
+
+                    channels.append(channel)
+
+                created += _save_channels(db, channels, tokens)
+
+                checkpoint = calendars[-1].id
+                write_checkpoint(checkpoint)
+                print(f'Processed calendars up to {checkpoint}: {created} created, {skipped} skipped, {failed} failed.')
+
+        clear_checkpoint()
+    finally:
+        db.close()
 
-        try:
-            state = str(uuid.uuid4())
-            response = google_client.watch_events(calendar.user, webhook_url, token, state=state)
-            if not response:
-                print(f'  Calendar {calendar.id}: watch_events returned no response.')
-                failed += 1
-                continue
-
-            expiration_ms = int(response.get('expiration', 0))
-            expiration_dt = datetime.fromtimestamp(expiration_ms / 1000, tz=timezone.utc)
-
-            sync_token = google_client.get_initial_sync_token(calendar.user, token)
-
-            repo.google_calendar_channel.create(
-                db,
-                calendar_id=calendar.id,
-                channel_id=response['id'],
-                resource_id=response['resourceId'],
-                expiration=expiration_dt,
-                state=state,
-                sync_token=sync_token,
-            )
-            created += 1
-            print(f'  Calendar {calendar.id}: channel created (expires {expiration_dt}).')
-        except Exception as e:
-            print(f'  Calendar {calendar.id}: failed ({e}).')
-            logging.error(f'[backfill_google_channels] Error for calendar {calendar.id}: {e}')
-            failed += 1
-
-    db.close()
     print(f'\nBackfill complete: {created} created, {skipped} skipped, {failed} failed.')
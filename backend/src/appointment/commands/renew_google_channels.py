@@ -2,25 +2,60 @@
 
 Run periodically (e.g., daily) to ensure channels don't expire.
 Google channels typically last ~7 days, so daily renewal keeps a buffer.
+
+Channels are renewed from a pool of workers sharing one rate limit for the Google API,
+and the renewed channels are written back in batches.
 """
 
 import json
 import logging
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 
+import sentry_sdk
 from google.oauth2.credentials import Credentials
 
-from ..controller.google_watch import get_webhook_url
+from ..controller.apis.google_client import GoogleClient
+from ..controller.google_watch import RateLimiter, get_watch_max_workers, get_watch_rate_limiter, get_webhook_url
 from ..database import repo
 from ..dependencies.database import get_engine_and_session
 from ..dependencies.google import get_google_client
 from ..main import _common_setup
 
+# How many renewed channels we write back per commit
+RENEWAL_BATCH_SIZE = 500
 
-def run():
+
+def _renew_channel(google_client: GoogleClient, webhook_url: str, rate_limiter: RateLimiter, channel: dict):
+    """Replace a channel with a new one. Runs on the renewal pool, so it only deals with plain data.
+    Returns the channel's renewed columns, or None if Google didn't create a new channel."""
     from ..tasks.google import stop_google_channel
 
+    token = Credentials.from_authorized_user_info(json.loads(channel['token']), google_client.SCOPES)
+
+    # Stop the old channel (fire-and-forget via Celery with retries)
+    stop_google_channel.delay(channel['channel_id'], channel['resource_id'], channel['token'])
+
+    # Create a new channel
+    rate_limiter.wait()
+    new_state = str(uuid.uuid4())
+    response = google_client.watch_events(channel['calendar_user'], webhook_url, token, state=new_state)
+    if not response:
+        return None
+
+    expiration_ms = int(response.get('expiration', 0))
+    return {
+        'id': channel['id'],
+        'channel_id': response['id'],
+        'resource_id': response['resourceId'],
+        'expiration': datetime.fromtimestamp(expiration_ms / 1000, tz=timezone.utc),
+        'state': new_state,
+    }
+
+
+def run():
     _common_setup()
     google_client = get_google_client()
 
@@ -33,55 +68,85 @@ def run():
         db.close()
         return
 
+    timer_boot = time.perf_counter_ns()
+
     # Renew channels that expire within the next 24 hours
     threshold = datetime.now(tz=timezone.utc) + timedelta(hours=24)
     channels = repo.google_calendar_channel.get_expiring(db, before=threshold)
 
-    renewed = 0
-    failed = 0
-
+    # Remove channels we can't (or don't need to) renew, and grab what the workers need of the others
+    removed = []
+    to_renew = []
     for channel in channels:
         calendar = channel.calendar
-        if not calendar or not calendar.connected:
-            repo.google_calendar_channel.delete(db, channel)
+        external_connection = calendar.external_connection if calendar else None
+        if not calendar or not calendar.connected or not external_connection or not external_connection.token:
+            removed.append(channel.id)
             continue
 
-        external_connection = calendar.external_connection
-        if not external_connection or not external_connection.token:
-            repo.google_calendar_channel.delete(db, channel)
-            continue
+        to_renew.append(
+            {
+                'id': channel.id,
+                'channel_id': channel.channel_id,
+                'resource_id': channel.resource_id,
+                'calendar_id': calendar.id,
+                'calendar_user': calendar.user,
+                'token': external_connection.token,
+            }
+        )
+
+    repo.google_calendar_channel.delete_by_ids(db, removed)
+
+    renewed = 0
+    failed = 0
+    renewals = []
+    lost = []
+
+    def flush():
+        repo.google_calendar_channel.bulk_update_expiration(db, renewals)
+        repo.google_calendar_channel.delete_by_ids(db, lost)
+        renewals.clear()
+        lost.clear()
+        logging.info(f'[renew_google_channels] Progress: {renewed + failed}/{len(to_renew)} processed')
+
+    try:
+        rate_limiter = get_watch_rate_limiter()
+        with ThreadPoolExecutor(max_workers=get_watch_max_workers()) as executor:
+            futures = {
+                executor.submit(_renew_channel, google_client, webhook_url, rate_limiter, channel): channel
+                for channel in to_renew
+            }
+
+            for future in as_completed(futures):
+                channel = futures[future]
+                try:
+                    renewal = future.result()
+                except Exception as e:
+                    logging.error(
+                        f'[renew_google_channels] Failed to renew channel for calendar {channel["calendar_id"]}: {e}'
+                    )
+                    failed += 1
+                    continue
+
+                if renewal:
+                    renewals.append(renewal)
+                    renewed += 1
+                else:
+                    lost.append(channel['id'])
+                    failed += 1
+
+                if len(renewals) + len(lost) >= RENEWAL_BATCH_SIZE:
+                    flush()
+
+        flush()
+    finally:
+        db.close()
+
+    sentry_sdk.set_measurement('google_channel_renewal_time', time.perf_counter_ns() - timer_boot, 'nanosecond')
+    sentry_sdk.set_measurement('google_channels_renewed', renewed)
+    sentry_sdk.set_measurement('google_channels_failed', failed)
 
-        token = Credentials.from_authorized_user_info(json.loads(external_connection.token), google_client.SCOPES)
-
-        # Stop the old channel (fire-and-forget via Celery with retries)
-        stop_google_channel.delay(channel.channel_id, channel.resource_id, external_connection.token)
-
-        # Create a new channel
-        try:
-            new_state = str(uuid.uuid4())
-            response = google_client.watch_events(calendar.user, webhook_url, token, state=new_state)
-            if response:
-                expiration_ms = int(response.get('expiration', 0))
-                expiration_dt = datetime.fromtimestamp(expiration_ms / 1000, tz=timezone.utc)
-
-                repo.google_calendar_channel.update_expiration(
-                    db,
-                    channel,
-                    new_channel_id=response['id'],
-                    new_resource_id=response['resourceId'],
-                    new_expiration=expiration_dt,
-                    new_state=new_state,
-                )
-                renewed += 1
-            else:
-                repo.google_calendar_channel.delete(db, channel)
-                failed += 1
-        except Exception as e:
-            logging.error(f'[renew_google_channels] Failed to renew channel for calendar {calendar.id}: {e}')
-            failed += 1
-
-    db.close()
     logging.info(
         f'[renew_google_channels] Channel renewal complete: '
-        f'{renewed} renewed, {failed} failed, {len(channels)} total processed'
+        f'{renewed} renewed, {failed} failed, {len(removed)} removed, {len(channels)} total processed'
     )
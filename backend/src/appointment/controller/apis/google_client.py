@@ -1,13 +1,22 @@
+import hashlib
+import json
 import logging
 import os
+import threading
 import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 from enum import StrEnum
+from functools import cache
 
 import sentry_sdk
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
 
 from ... import utils
 from ...database import repo
@@ -48,6 +57,59 @@ class ResponseStatus(StrEnum):
     ACCEPTED = 'accepted'
 
 
+@cache
+def get_calendar_discovery_document() -> dict:
+    """Load and parse the Calendar API's discovery document once, it ships with googleapiclient."""
+    return json.loads(get_static_doc('calendar', 'v3'))
+
+
+def get_credentials_key(token) -> str:
+    """A stable key for a set of credentials. We create new credential objects from the stored token on every
+    request, so the refresh token (or access token, if there's none) identifies them instead."""
+    secret = getattr(token, 'refresh_token', None) or getattr(token, 'token', None) or str(id(token))
+    return hashlib.sha256(f'{getattr(token, "client_id", "")}:{secret}'.encode()).hexdigest()
+
+
+class ServiceCache(threading.local):
+    """Per-thread LRU cache of Calendar API services, keyed by credentials.
+    Each service keeps its own authorized http transport, and with it an open keep-alive connection and the
+    refreshed access token. httplib2 isn't thread-safe, hence one cache per thread."""
+
+    def __init__(self):
+        self.services: OrderedDict[str, object] = OrderedDict()
+
+    def get(self, token):
+        key = get_credentials_key(token)
+
+        service = self.services.get(key)
+        if service is not None:
+            self.services.move_to_end(key)
+            return service
+
+        # Same transport build() would use (with its default timeout), unless we configured our own timeout
+        transport = build_http()
+        timeout = os.getenv('GOOGLE_API_TIMEOUT_SECONDS')
+        if timeout:
+            transport.timeout = float(timeout)
+        http = AuthorizedHttp(token, http=transport)
+        service = build_from_document(get_calendar_discovery_document(), http=http)
+
+        self.services[key] = service
+        while len(self.services) > int(os.getenv('GOOGLE_SERVICE_CACHE_SIZE', 32)):
+            _, evicted = self.services.popitem(last=False)
+            evicted.close()
+
+        return service
+
+    def clear(self):
+        for service in self.services.values():
+            service.close()
+        self.services.clear()
+
+
+service_cache = ServiceCache()
+
+
 class GoogleClient:
     """Authenticates with Google OAuth and allows the retrieval of Google Calendar information"""
 
@@ -116,6 +178,13 @@ class GoogleClient:
             logging.error(f'[google_client.get_credentials] Value error while fetching credentials {str(e)}')
             raise GoogleInvalidCredentials()
 
+    @staticmethod
+    @contextmanager
+    def calendar_service(token):
+        """Retrieve a Calendar API service for the given credentials. Unlike ``build()`` the service is kept around
+        (and its connection kept open) for the next call with the same credentials."""
+        yield service_cache.get(token)
+
     def get_profile(self, token):
         """Retrieve the user's profile associated with the token"""
         user_info_service = build('oauth2', 'v2', credentials=token)
@@ -128,7 +197,7 @@ class GoogleClient:
         Ref: https://developers.google.com/calendar/api/v3/reference/calendarList/list"""
         response = {}
         items = []
-        with build('calendar', 'v3', credentials=token, cache_discovery=False) as service:
+        with self.calendar_service(token) as service:
             request = service.calendarList().list(minAccessRole='writer')
             while request is not None:
                 try:
@@ -162,7 +231,7 @@ class GoogleClient:
         import time
 
         perf_start = time.perf_counter_ns()
-        with build('calendar', 'v3', credentials=token, cache_discovery=False) as service:
+        with self.calendar_service(token) as service:
             request = service.freebusy().query(
                 body=dict(
                     timeMin=time_min, timeMax=time_max, items=[{'id': calendar_id} for calendar_id in calendar_ids]
@@ -236,7 +305,7 @@ class GoogleClient:
         # See: https://developers.google.com/calendar/api/v3/reference/events#eventType
         event_types = ['default', 'focusTime', 'outOfOffice']
 
-        with build('calendar', 'v3', credentials=token, cache_discovery=False) as service:
+        with self.calendar_service(token) as service:
             request = service.events().list(
                 calendarId=calendar_id,
                 timeMin=time_min,
@@ -280,7 +349,7 @@ class GoogleClient:
     def get_event(self, calendar_id, event_id, token):
         """Retrieve a single event by ID.
         Ref: https://developers.google.com/calendar/api/v3/reference/events/get"""
-        with build('calendar', 'v3', credentials=token, cache_discovery=False) as service:
+        with self.calendar_service(token) as service:
             try:
                 return service.events().get(calendarId=calendar_id, eventId=event_id).execute()
             except HttpError as e:
@@ -288,7 +357,7 @@ class GoogleClient:
                 return None
 
     def save_event(self, calendar_id, body, token):
-        with build('calendar', 'v3', credentials=token, cache_discovery=False) as service:
+        with self.calendar_service(token) as service:
             try:
                 return service.events().import_(calendarId=calendar_id, body=body).execute()
             except HttpError as e:
@@ -296,7 +365,7 @@ class GoogleClient:
                 raise EventNotCreatedException()
 
     def insert_event(self, calendar_id, body, token, send_updates: SendUpdates = SendUpdates.ALL):
-        with build('calendar', 'v3', credentials=token, cache_discovery=False) as service:
+        with self.calendar_service(token) as service:
             try:
                 return service.events().insert(
                     calendarId=calendar_id, body=body, sendUpdates=send_updates
@@ -306,7 +375,7 @@ class GoogleClient:
                 raise EventNotCreatedException()
 
     def patch_event(self, calendar_id, event_id, body, token, send_updates: SendUpdates = SendUpdates.ALL):
-        with build('calendar', 'v3', credentials=token, cache_discovery=False) as service:
+        with self.calendar_service(token) as service:
             try:
                 return (
                     service.events()
@@ -318,7 +387,7 @@ class GoogleClient:
                 raise EventNotPatchedException()
 
     def delete_event(self, calendar_id, event_id, token, send_updates: SendUpdates = SendUpdates.NONE):
-        with build('calendar', 'v3', credentials=token, cache_discovery=False) as service:
+        with self.calendar_service(token) as service:
             try:
                 return (
                     service.events()
@@ -329,6 +398,67 @@ class GoogleClient:
                 logging.warning(f'[google_client.delete_event] Request Error: {e.status_code}/{e.error_details}')
                 raise EventNotDeletedException()
 
+    @staticmethod
+    def _execute_batch(service, requests: list) -> list[tuple[dict | None, Exception | None]]:
+        """Send requests in as few batch requests as possible, and return each request's response or exception
+        in order. Ref: https://developers.google.com/calendar/api/guides/batch"""
+        results = [(None, None)] * len(requests)
+
+        def callback(request_id, response, exception):
+            results[int(request_id)] = (response, exception)
+
+        chunk_by = int(os.getenv('GOOGLE_EVENTS_BATCH_SIZE', 50))
+        for offset in range(0, len(requests), chunk_by):
+            batch = service.new_batch_http_request(callback=callback)
+            for index, request in enumerate(requests[offset : offset + chunk_by], start=offset):
+                batch.add(request, request_id=str(index))
+            batch.execute()
+
+        return results
+
+    def get_events(self, calendar_id, event_ids: list[str], token) -> dict[str, dict | None]:
+        """Retrieve several events by ID with batch requests, events that couldn't be retrieved map to None.
+        Ref: https://developers.google.com/calendar/api/v3/reference/events/get"""
+        with self.calendar_service(token) as service:
+            requests = [service.events().get(calendarId=calendar_id, eventId=event_id) for event_id in event_ids]
+            results = self._execute_batch(service, requests)
+
+        events = {}
+        for event_id, (response, exception) in zip(event_ids, results):
+            if exception:
+                logging.warning(f'[google_client.get_events] Request Error: {exception}')
+            events[event_id] = response
+        return events
+
+    def update_events(
+        self,
+        calendar_id,
+        patches: list[tuple[str, dict, SendUpdates]],
+        deletes: list[tuple[str, SendUpdates]],
+        token,
+    ) -> list[Exception | None]:
+        """Patch and delete several events with batch requests.
+        Returns the exception (or None) of each patch followed by the exception of each delete."""
+        with self.calendar_service(token) as service:
+            events = service.events()
+            requests = [
+                events.patch(calendarId=calendar_id, eventId=event_id, body=body, sendUpdates=send_updates)
+                for event_id, body, send_updates in patches
+            ] + [
+                events.delete(calendarId=calendar_id, eventId=event_id, sendUpdates=send_updates)
+                for event_id, send_updates in deletes
+            ]
+            results = self._execute_batch(service, requests)
+
+        errors = []
+        for index, (_, exception) in enumerate(results):
+            if exception:
+                action = 'patch' if index < len(patches) else 'delete'
+                logging.warning(f'[google_client.update_events] Request Error ({action}): {exception}')
+                exception = EventNotPatchedException() if action == 'patch' else EventNotDeletedException()
+            errors.append(exception)
+        return errors
+
     def watch_events(self, calendar_id, webhook_url, token, state: str):
         """Register a push notification channel for calendar event changes.
         Ref: https://developers.google.com/calendar/api/v3/reference/events/watch"""
@@ -345,7 +475,7 @@ class GoogleClient:
             },
         }
 
-        with build('calendar', 'v3', credentials=token, cache_discovery=False) as service:
+        with self.calendar_service(token) as service:
             try:
                 response = service.events().watch(
                     calendarId=calendar_id,
@@ -363,7 +493,7 @@ class GoogleClient:
     def stop_channel(self, channel_id, resource_id, token):
         """Stop a push notification channel.
         Ref: https://developers.google.com/calendar/api/v3/reference/channels/stop"""
-        with build('calendar', 'v3', credentials=token, cache_discovery=False) as service:
+        with self.calendar_service(token) as service:
             try:
                 service.channels().stop(
                     body={
@@ -381,7 +511,7 @@ class GoogleClient:
         next_sync_token = None
         page_token = None
 
-        with build('calendar', 'v3', credentials=token, cache_discovery=False) as service:
+        with self.calendar_service(token) as service:
             while True:
                 try:
                     params = {
@@ -410,7 +540,7 @@ class GoogleClient:
 
     def get_initial_sync_token(self, calendar_id, token):
         """Perform an initial list to obtain a sync token without fetching all events."""
-        with build('calendar', 'v3', credentials=token, cache_discovery=False) as service:
+        with self.calendar_service(token) as service:
             try:
                 page_token = None
                 while True:
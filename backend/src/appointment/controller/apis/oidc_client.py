@@ -1,5 +1,6 @@
 import datetime
 import os
+import threading
 
 from authlib.integrations.requests_client import OAuth2Session
 from requests import Response
@@ -7,13 +8,30 @@ from requests import Response
 from appointment.utils import get_expiry_time_with_grace_period
 
 
+class SessionCache(threading.local):
+    """Keeps an OAuth2 session per thread, so introspection requests re-use their open connections.
+    Sessions aren't shared between threads, or carried over into forked processes."""
+
+    def __init__(self):
+        self.session: OAuth2Session | None = None
+        self.key: tuple | None = None
+
+    def get(self) -> OAuth2Session:
+        key = (os.getpid(), os.getenv('OIDC_CLIENT_ID'), os.getenv('OIDC_CLIENT_SECRET'))
+        if self.session is None or self.key != key:
+            self.session = OAuth2Session(client_id=key[1], client_secret=key[2])
+            self.key = key
+        return self.session
+
+
+session_cache = SessionCache()
+
+
 class OIDCClient:
     client: OAuth2Session
 
     def __init__(self):
-        self.client = OAuth2Session(
-            client_id=os.getenv('OIDC_CLIENT_ID'), client_secret=os.getenv('OIDC_CLIENT_SECRET')
-        )
+        self.client = session_cache.get()
 
     def introspect_token(self, access_token) -> dict | None:
         response: Response = self.client.introspect_token(
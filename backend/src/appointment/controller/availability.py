@@ -0,0 +1,224 @@
+"""Module: availability
+
+Materialized availability snapshots for schedules. The calculated slots for a schedule are kept in redis,
+so that popular booking links don't need to re-calculate slots and query every remote calendar on each page load.
+
+Snapshots are keyed by schedule id and a version counter. Invalidating a schedule's snapshot only bumps the counter,
+and any older snapshot simply expires.
+"""
+
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+import sentry_sdk
+from redis import Redis, RedisCluster
+from sqlalchemy.orm import Session
+
+from .apis.google_client import GoogleClient
+from .calendar import Tools
+from ..database import models, repo
+from ..database.models import BookingStatus
+from ..defines import (
+    REDIS_AVAILABILITY_SNAPSHOT_KEY,
+    REDIS_AVAILABILITY_VERSION_KEY,
+    REDIS_AVAILABILITY_REFRESH_LOCK_KEY,
+)
+from ..exceptions.validation import RemoteCalendarConnectionError
+
+# A snapshot slot is a tuple of (start as epoch timestamp, duration in minutes, booking status)
+SnapshotSlot = tuple[int, int, BookingStatus]
+
+
+def get_snapshot_expiry() -> int:
+    """How long a snapshot lives for, in seconds"""
+    return int(os.getenv('AVAILABILITY_SNAPSHOT_EXPIRE_SECONDS', 300))
+
+
+def get_snapshot_refresh_after() -> int:
+    """How old a snapshot may get, in seconds, before we refresh it in the background"""
+    expiry = get_snapshot_expiry()
+    return int(os.getenv('AVAILABILITY_SNAPSHOT_REFRESH_SECONDS', expiry * 0.8))
+
+
+def _version_key(schedule_id: int) -> str:
+    return f'{REDIS_AVAILABILITY_VERSION_KEY}:{schedule_id}'
+
+
+def _snapshot_key(schedule_id: int, version: int) -> str:
+    return f'{REDIS_AVAILABILITY_SNAPSHOT_KEY}:{schedule_id}:{version}'
+
+
+def get_version(redis_instance: Redis | RedisCluster, schedule_id: int) -> int:
+    return int(redis_instance.get(_version_key(schedule_id)) or 0)
+
+
+def invalidate_snapshot(redis_instance: Redis | RedisCluster | None, schedule_id: int) -> bool:
+    """Invalidate a schedule's availability snapshot by bumping its version"""
+    if redis_instance is None:
+        return False
+
+    try:
+        redis_instance.incr(_version_key(schedule_id))
+    except Exception as ex:
+        # The snapshot will still expire on its own
+        logging.warning(f'[availability.invalidate_snapshot] Could not invalidate schedule {schedule_id}: {ex}')
+        sentry_sdk.capture_exception(ex)
+        return False
+
+    return True
+
+
+def invalidate_snapshots_for_subscriber(db: Session, redis_instance: Redis | RedisCluster | None, subscriber_id: int):
+    """Invalidate the availability snapshots of all schedules owned by a subscriber, e.g. after their remote
+    calendars changed. Every connected calendar counts towards the availability of each of their schedules."""
+    if redis_instance is None:
+        return
+
+    for schedule in repo.schedule.get_by_subscriber(db, subscriber_id):
+        invalidate_snapshot(redis_instance, schedule.id)
+
+
+def get_snapshot(
+    redis_instance: Redis | RedisCluster | None, schedule_id: int
+) -> tuple[list[SnapshotSlot], float] | None:
+    """Retrieve the current snapshot for a schedule as a tuple of slots and the snapshot's age in seconds.
+    Returns None if redis is not available or there's no usable snapshot."""
+    if redis_instance is None:
+        return None
+
+    timer_boot = time.perf_counter_ns()
+
+    version = get_version(redis_instance, schedule_id)
+    raw_snapshot = redis_instance.get(_snapshot_key(schedule_id, version))
+
+    if raw_snapshot is None:
+        sentry_sdk.set_measurement('availability_snapshot_miss_time', time.perf_counter_ns() - timer_boot, 'nanosecond')
+        return None
+
+    snapshot = json.loads(raw_snapshot)
+    now = datetime.now()
+
+    # Slots are calculated relative to the day they were calculated on, so a snapshot from yesterday is no good
+    if snapshot['day'] != now.toordinal():
+        return None
+
+    # Any slots that have started since the snapshot was taken are no longer available
+    now_timestamp = now.timestamp()
+    slots = [
+        (start, duration, BookingStatus(status))
+        for start, duration, status in snapshot['slots']
+        if start > now_timestamp
+    ]
+
+    sentry_sdk.set_measurement('availability_snapshot_hit_time', time.perf_counter_ns() - timer_boot, 'nanosecond')
+
+    return slots, now_timestamp - snapshot['created']
+
+
+def put_snapshot(
+    redis_instance: Redis | RedisCluster | None, schedule_id: int, version: int, slots: list[SnapshotSlot]
+) -> bool:
+    """Store a snapshot for the version of the schedule it was calculated for"""
+    if redis_instance is None:
+        return False
+
+    now = datetime.now()
+    snapshot = {
+        'created': now.timestamp(),
+        'day': now.toordinal(),
+        'slots': [(start, duration, status.value) for start, duration, status in slots],
+    }
+
+    redis_instance.set(_snapshot_key(schedule_id, version), json.dumps(snapshot), ex=get_snapshot_expiry())
+
+    return True
+
+
+def calculate_slots(
+    schedule: models.Schedule,
+    calendars: list[models.Calendar],
+    subscriber: models.Subscriber,
+    google_client: GoogleClient,
+    db: Session,
+    redis_instance: Redis | RedisCluster | None,
+) -> tuple[list[SnapshotSlot], bool]:
+    """Calculate the schedule's slots, marking any that collide with remote events or requested slots as booked.
+    Also returns whether the calculation is degraded, i.e. a remote calendar was skipped as it didn't answer in time."""
+    # calculate theoretically possible slot start times from schedule config
+    slot_starts = Tools.available_slot_starts_from_schedule(schedule)
+
+    # get all events from all connected calendars in scheduled date range
+    try:
+        existing_slots, degraded = Tools.existing_events_for_schedule(
+            schedule, calendars, subscriber, google_client, db, redis_instance
+        )
+    except Exception:
+        raise RemoteCalendarConnectionError()
+
+    return Tools.slot_starts_roll_up_difference(slot_starts, schedule.slot_duration, existing_slots), degraded
+
+
+def refresh_snapshot(
+    schedule: models.Schedule,
+    calendars: list[models.Calendar],
+    subscriber: models.Subscriber,
+    google_client: GoogleClient,
+    db: Session,
+    redis_instance: Redis | RedisCluster | None,
+) -> list[SnapshotSlot]:
+    """Calculate the schedule's slots and store them as its new snapshot.
+    Degraded results are still returned, but not stored, so the next request asks the remote calendars again."""
+    # Grab the version before calculating, if the schedule changes in the meantime the result is simply never read
+    version = get_version(redis_instance, schedule.id) if redis_instance is not None else 0
+
+    slots, degraded = calculate_slots(schedule, calendars, subscriber, google_client, db, redis_instance)
+    if not degraded:
+        put_snapshot(redis_instance, schedule.id, version, slots)
+
+    return slots
+
+
+def _queue_background_refresh(redis_instance: Redis | RedisCluster, schedule_id: int):
+    """Queue a single background refresh for a schedule's snapshot, concurrent requests won't queue another one."""
+    from ..tasks.availability import refresh_availability_snapshot
+
+    version = get_version(redis_instance, schedule_id)
+    lock_key = f'{REDIS_AVAILABILITY_REFRESH_LOCK_KEY}:{schedule_id}:{version}'
+
+    # Hold the lock until the current snapshot would expire, the refreshed one will need its own refresh later on
+    lock_expiry = max(get_snapshot_expiry() - get_snapshot_refresh_after(), 1)
+    if not redis_instance.set(lock_key, 1, nx=True, ex=lock_expiry):
+        return
+
+    try:
+        refresh_availability_snapshot.delay(schedule_id)
+    except Exception as ex:
+        # We can still serve the current snapshot, and re-calculate once it expires
+        logging.warning(f'[availability._queue_background_refresh] Could not queue refresh: {ex}')
+        sentry_sdk.capture_exception(ex)
+        redis_instance.delete(lock_key)
+
+
+def get_available_slots(
+    schedule: models.Schedule,
+    calendars: list[models.Calendar],
+    subscriber: models.Subscriber,
+    google_client: GoogleClient,
+    db: Session,
+    redis_instance: Redis | RedisCluster | None,
+) -> list[SnapshotSlot]:
+    """Retrieve the schedule's slots from its snapshot, calculating (and storing) them if there's none.
+    Snapshots that are about to expire are refreshed in the background."""
+    snapshot = get_snapshot(redis_instance, schedule.id)
+
+    if snapshot is None:
+        return refresh_snapshot(schedule, calendars, subscriber, google_client, db, redis_instance)
+
+    slots, age = snapshot
+    if age >= get_snapshot_refresh_after():
+        _queue_background_refresh(redis_instance, schedule.id)
+
+    return slots
@@ -3,12 +3,22 @@
 Handle connection to a CalDAV server.
 """
 
+import contextvars
+import hashlib
 import json
 import logging
+import threading
 import time
+import uuid
+import weakref
 import zoneinfo
 import os
-from functools import cache
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from functools import cache, partial
+from itertools import accumulate
+from typing import Callable, Hashable, Iterable, NamedTuple
 from urllib.parse import urlparse, urljoin
 import recurring_ical_events
 
@@ -17,7 +27,7 @@ import lxml.etree
 import requests
 import sentry_sdk
 from dns.exception import DNSException
-from redis import Redis, RedisCluster
+from redis import Redis, RedisCluster, RedisError
 from caldav import DAVClient
 from fastapi import BackgroundTasks
 from google.oauth2.credentials import Credentials
@@ -29,7 +39,17 @@ from enum import Enum
 from sqlalchemy.orm import Session
 
 from .. import utils
-from ..defines import REDIS_REMOTE_EVENTS_KEY, DATEFMT, DEFAULT_CALENDAR_COLOUR, FALLBACK_LOCALE, APP_ENV_DEV
+from ..defines import (
+    REDIS_REMOTE_EVENTS_KEY,
+    REDIS_REMOTE_EVENTS_VERSION_KEY,
+    REDIS_BUSY_TIME_WINDOW_LIMIT,
+    REDIS_SCAN_BATCH_SIZE,
+    SEVEN_DAYS_IN_SECONDS,
+    DATEFMT,
+    DEFAULT_CALENDAR_COLOUR,
+    FALLBACK_LOCALE,
+    APP_ENV_DEV,
+)
 from .apis.google_client import EventStatus, GoogleClient, ResponseStatus, SendUpdates
 from ..database.models import CalendarProvider, BookingStatus
 from ..database import schemas, models, repo
@@ -48,10 +68,200 @@ class RemoteEventState(Enum):
     ACCEPTED = 'ACCEPTED'
 
 
+_executors: dict[str, ThreadPoolExecutor] = {}
+_executors_pid: int | None = None
+_executors_lock = threading.Lock()
+
+
+def get_executor(name: str, max_workers: int) -> ThreadPoolExecutor:
+    """Retrieve a named process-wide thread pool used to query remote calendars.
+    Like our database engine, a forked child process gets its own pools."""
+    global _executors_pid
+
+    with _executors_lock:
+        if _executors_pid != os.getpid():
+            _executors.clear()
+            _executors_pid = os.getpid()
+
+        if name not in _executors:
+            _executors[name] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+        return _executors[name]
+
+
+def get_busy_time_executor() -> ThreadPoolExecutor:
+    return get_executor('busy-time', int(os.getenv('REMOTE_CALENDAR_MAX_WORKERS', 8)))
+
+
+def get_free_busy_executor() -> ThreadPoolExecutor:
+    """Google FreeBusy chunks get their own pool, as they're dispatched from within the busy time pool"""
+    return get_executor('google-free-busy', int(os.getenv('GOOGLE_FREEBUSY_MAX_WORKERS', 4)))
+
+
+def get_busy_time_source_timeout() -> float:
+    """How long, in seconds, a single remote calendar may take to answer"""
+    return float(os.getenv('REMOTE_CALENDAR_SOURCE_TIMEOUT_SECONDS', 10))
+
+
+def get_busy_time_deadline() -> float:
+    """How long, in seconds, we wait for all remote calendars combined"""
+    return float(os.getenv('REMOTE_CALENDAR_DEADLINE_SECONDS', 15))
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into a single call.
+    Callers arriving while a call is in flight wait for it and share its result (or exception)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable):
+        with self.lock:
+            future = self.calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self.calls[key] = Future()
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as ex:
+            future.set_exception(ex)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+
+
+free_busy_flights = SingleFlight()
+
+
+class _PooledSession:
+    def __init__(self):
+        self.session = requests.Session()
+        self.users = 0
+        self.last_used = time.monotonic()
+        # Set once the session left the pool, it's closed as soon as nobody uses it anymore
+        self.retired = False
+
+
+class SessionPool:
+    """A bounded pool of keep-alive http sessions, so repeated requests to the same server reuse warm connections.
+    Each session counts its users, who give it back through release. Sessions that nobody used for a while are
+    closed, and once the pool is full the least recently used ones leave it, but only close after their last user
+    released them."""
+
+    def __init__(self, max_size: int, max_idle: float):
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.lock = threading.Lock()
+        # Ordered from least to most recently used
+        self.sessions: OrderedDict[Hashable, _PooledSession] = OrderedDict()
+        # Sessions that left the pool while they were still used, by id of their session
+        self.retired: dict[int, _PooledSession] = {}
+
+    def get(self, key: Hashable) -> requests.Session:
+        """Retrieve the session for a key, make sure to release it once you're done with it"""
+        now = time.monotonic()
+        to_close = []
+
+        with self.lock:
+            for idle_key in [
+                pooled_key
+                for pooled_key, pooled in self.sessions.items()
+                if pooled.users == 0 and now - pooled.last_used > self.max_idle
+            ]:
+                to_close.append(self.sessions.pop(idle_key).session)
+
+            pooled = self.sessions.pop(key, None) or _PooledSession()
+            pooled.users += 1
+            pooled.last_used = now
+            self.sessions[key] = pooled
+
+            while len(self.sessions) > self.max_size:
+                _, evicted = self.sessions.popitem(last=False)
+                if evicted.users == 0:
+                    to_close.append(evicted.session)
+                else:
+                    evicted.retired = True
+                    self.retired[id(evicted.session)] = evicted
+
+        for session in to_close:
+            session.close()
+
+        return pooled.session
+
+    def release(self, key: Hashable, session: requests.Session):
+        with self.lock:
+            pooled = self.sessions.get(key)
+            if pooled is None or pooled.session is not session:
+                pooled = self.retired.get(id(session))
+            if pooled is None:
+                return
+
+            pooled.users -= 1
+            pooled.last_used = time.monotonic()
+            close = pooled.retired and pooled.users == 0
+            if close:
+                del self.retired[id(session)]
+
+        if close:
+            session.close()
+
+    def close(self):
+        with self.lock:
+            sessions = [pooled.session for pooled in self.sessions.values()]
+            self.sessions.clear()
+
+        for session in sessions:
+            session.close()
+
+
+_caldav_sessions: SessionPool | None = None
+_caldav_sessions_pid: int | None = None
+_caldav_sessions_lock = threading.Lock()
+
+
+def get_caldav_sessions() -> SessionPool:
+    """Retrieve the process-wide pool of CalDAV sessions. Like our thread pools, a forked child process gets its own,
+    as connections can't be shared with the parent."""
+    global _caldav_sessions, _caldav_sessions_pid
+
+    with _caldav_sessions_lock:
+        if _caldav_sessions is None or _caldav_sessions_pid != os.getpid():
+            _caldav_sessions = SessionPool(
+                max_size=int(os.getenv('CALDAV_SESSION_POOL_SIZE', 32)),
+                max_idle=float(os.getenv('CALDAV_SESSION_IDLE_SECONDS', 60)),
+            )
+            _caldav_sessions_pid = os.getpid()
+
+        return _caldav_sessions
+
+
+def caldav_session_key(url: str, user: str | None, password: str | None) -> tuple:
+    """Sessions are shared per server and per credentials, as servers may tie cookies to the signed in user.
+    We only keep a hash of the password around."""
+    parsed_url = urlparse(url)
+    password_hash = hashlib.sha256((password or '').encode()).hexdigest()
+    return parsed_url.scheme, parsed_url.hostname, parsed_url.port, user, password_hash
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=UTC) if value.tzinfo is None else value
+
+
 class BaseConnector:
     redis_instance: Redis | RedisCluster | None
     subscriber_id: int
     calendar_id: int
+    _namespace: str | None = None
+    _busy_time_namespace: str | None = None
 
     def __init__(self, subscriber_id: int, calendar_id: int | None, redis_instance: Redis | RedisCluster | None = None):
         self.redis_instance = redis_instance
@@ -69,23 +279,67 @@ class BaseConnector:
 
         return ':'.join(parts)
 
+    def _version_key(self, only_subscriber=False):
+        return f'{REDIS_REMOTE_EVENTS_VERSION_KEY}:{self.get_key_body(only_subscriber=only_subscriber)}'
+
+    def get_namespace(self) -> str:
+        """The current cache versions of the subscriber and of this calendar, which all cached keys are written under.
+        They're looked up once per connector."""
+        if self._namespace is None:
+            subscriber_version = self.redis_instance.get(self._version_key(only_subscriber=True))
+            calendar_version = self.redis_instance.get(self._version_key())
+            self._namespace = f'{subscriber_version or 0}.{calendar_version or 0}'
+
+        return self._namespace
+
+    def get_cache_key(self, key_scope):
+        """The key for an (already obscured) scope, under our current cache versions"""
+        return f'{REDIS_REMOTE_EVENTS_KEY}:{self.get_key_body()}:{self.get_namespace()}:{key_scope}'
+
+    def _busy_time_version_key(self):
+        return f'{REDIS_REMOTE_EVENTS_VERSION_KEY}:{self.get_key_body(only_subscriber=True)}:busy'
+
+    def get_busy_time_namespace(self) -> str:
+        """The current cache versions of the subscriber and of their busy times, which cached busy times are written
+        under. A busy time lookup can span several of the subscriber's calendars (e.g. all calendars of a Google
+        connection), so the busy time version changes whenever the cache of any of their calendars is busted."""
+        if self._busy_time_namespace is None:
+            subscriber_version = self.redis_instance.get(self._version_key(only_subscriber=True))
+            busy_time_version = self.redis_instance.get(self._busy_time_version_key())
+            self._busy_time_namespace = f'{subscriber_version or 0}.{busy_time_version or 0}'
+
+        return self._busy_time_namespace
+
+    def get_busy_time_cache_key(self, key_scope):
+        """The key for a busy time scope, shared by all of the subscriber's calendars"""
+        key_body = self.get_key_body(only_subscriber=True)
+        key_scope = self.obscure_key(key_scope)
+        return f'{REDIS_REMOTE_EVENTS_KEY}:{key_body}:busy:{self.get_busy_time_namespace()}:{key_scope}'
+
     def get_cached_events(self, key_scope):
         """Retrieve any cached events, else returns None if redis is not available or there's no cache."""
         if self.redis_instance is None:
             return None
 
-        key_scope = self.obscure_key(key_scope)
+        return self._get_cached_events(self.get_cache_key(self.obscure_key(key_scope)))
 
+    def _get_cached_events(self, cache_key):
         timer_boot = time.perf_counter_ns()
 
-        encrypted_events = self.redis_instance.get(f'{REDIS_REMOTE_EVENTS_KEY}:{self.get_key_body()}:{key_scope}')
+        encrypted_events = self.redis_instance.get(cache_key)
         if encrypted_events is None:
             sentry_sdk.set_measurement('redis_get_miss_time', time.perf_counter_ns() - timer_boot, 'nanosecond')
             return None
 
+        events = schemas.Event.model_load_redis_list(encrypted_events)
+        if events is None:
+            # Cached in an older format, we'll fetch and cache these events again
+            sentry_sdk.set_measurement('redis_get_miss_time', time.perf_counter_ns() - timer_boot, 'nanosecond')
+            return None
+
         sentry_sdk.set_measurement('redis_get_hit_time', time.perf_counter_ns() - timer_boot, 'nanosecond')
 
-        return [schemas.Event.model_load_redis(blob) for blob in json.loads(encrypted_events)]
+        return events
 
     def put_cached_events(
         self, key_scope, events: list[schemas.Event], expiry=os.getenv('REDIS_EVENT_EXPIRE_SECONDS', 900)
@@ -94,39 +348,154 @@ class BaseConnector:
         if self.redis_instance is None:
             return False
 
-        key_scope = self.obscure_key(key_scope)
+        self._put_cached_events(self.get_cache_key(self.obscure_key(key_scope)), events, expiry)
+
+        return True
+
+    def _put_cached_events(self, cache_key, events: list[schemas.Event], expiry):
         timer_boot = time.perf_counter_ns()
 
-        encrypted_events = json.dumps([event.model_dump_redis() for event in events])
+        encrypted_events = schemas.Event.model_dump_redis_list(events)
+        self.redis_instance.set(cache_key, value=encrypted_events, ex=expiry)
+        sentry_sdk.set_measurement('redis_put_time', time.perf_counter_ns() - timer_boot, 'nanosecond')
+
+    @staticmethod
+    def _busy_time_scope(calendar_ids: list) -> str:
+        """The cache scope shared by all busy time windows of a set of calendars"""
+        return 'busy_' + hashlib.sha256(','.join(sorted(calendar_ids)).encode()).hexdigest()[:16]
+
+    def _get_busy_time_windows(self, scope: str) -> list[list[str]]:
+        """Retrieve the [start, end] windows we have cached busy times for"""
+        encrypted_windows = self.redis_instance.get(self.get_busy_time_cache_key(scope))
+        if encrypted_windows is None:
+            return []
+
+        return json.loads(utils.setup_encryption_engine().decrypt(encrypted_windows))
+
+    def get_cached_busy_time(self, calendar_ids: list, start: str, end: str) -> list[dict] | None:
+        """Retrieve cached busy times for the given window, else returns None if redis is not available or there's
+        no cache. A cached window covering the requested one is also used, trimmed down to the requested window."""
+        if self.redis_instance is None:
+            return None
+
+        scope = self._busy_time_scope(calendar_ids)
+        events = self._get_cached_events(self.get_busy_time_cache_key(f'{scope}_{start}_{end}'))
+
+        if events is None:
+            time_min = datetime.strptime(start, DATEFMT)
+            time_max = datetime.strptime(end, DATEFMT)
+
+            for window_start, window_end in self._get_busy_time_windows(scope):
+                if [window_start, window_end] == [start, end]:
+                    continue
+                covers_window = (
+                    datetime.strptime(window_start, DATEFMT) <= time_min
+                    and datetime.strptime(window_end, DATEFMT) >= time_max
+                )
+                if not covers_window:
+                    continue
+
+                events = self._get_cached_events(self.get_busy_time_cache_key(f'{scope}_{window_start}_{window_end}'))
+                if events is not None:
+                    # Busy times are requested in UTC, so treat any naive ones as such
+                    time_min = time_min.replace(tzinfo=UTC)
+                    time_max = time_max.replace(tzinfo=UTC)
+                    events = [
+                        event for event in events if _as_utc(event.end) > time_min and _as_utc(event.start) < time_max
+                    ]
+                    break
+
+        if events is None:
+            return None
+
+        return [{'start': event.start, 'end': event.end} for event in events]
+
+    def put_cached_busy_time(
+        self,
+        calendar_ids: list,
+        start: str,
+        end: str,
+        items: list[dict],
+        expiry=os.getenv('REDIS_EVENT_EXPIRE_SECONDS', 900),
+    ):
+        """Cache busy times for the given window, and remember the window so it can answer narrower requests"""
+        if self.redis_instance is None:
+            return False
+
+        scope = self._busy_time_scope(calendar_ids)
+        events = [schemas.Event(title='Busy', start=item.get('start'), end=item.get('end')) for item in items]
+        self._put_cached_events(self.get_busy_time_cache_key(f'{scope}_{start}_{end}'), events, expiry)
+
+        # Only keep track of the most recent windows, older ones will have expired anyway
+        windows = [window for window in self._get_busy_time_windows(scope) if window != [start, end]]
+        windows = [*windows, [start, end]][-REDIS_BUSY_TIME_WINDOW_LIMIT:]
         self.redis_instance.set(
-            f'{REDIS_REMOTE_EVENTS_KEY}:{self.get_key_body()}:{key_scope}', value=encrypted_events, ex=expiry
+            self.get_busy_time_cache_key(scope),
+            value=utils.setup_encryption_engine().encrypt(json.dumps(windows)),
+            ex=expiry,
         )
-        sentry_sdk.set_measurement('redis_put_time', time.perf_counter_ns() - timer_boot, 'nanosecond')
 
         return True
 
     def bust_cached_events(self, all_calendars=False):
-        """Delete cached events for a specific subscriber/calendar.
-        Optionally pass in all_calendars to remove all cached calendar events for a specific subscriber."""
+        """Invalidate cached events for a specific subscriber/calendar.
+        Optionally pass in all_calendars to invalidate all cached calendar events for a specific subscriber.
+
+        This only replaces the subscriber's (or calendar's) cache version, so it's a single write no matter how many
+        keys are cached. Keys written under the previous version are never read again, and simply expire.
+        Busting a single calendar also replaces the subscriber's busy time version, as busy times may include it."""
         if self.redis_instance is None:
             return False
 
         timer_boot = time.perf_counter_ns()
 
-        # Scan returns a tuple like: (Cursor start, [...keys found])
-        ret = self.redis_instance.scan(
-            0, f'{REDIS_REMOTE_EVENTS_KEY}:{self.get_key_body(only_subscriber=all_calendars)}:*'
-        )
+        try:
+            # A random version can't ever come back around to an old one. The version outlives any cached event,
+            # so once it expires there's nothing left from the default version to read either.
+            self.redis_instance.set(
+                self._version_key(only_subscriber=all_calendars), uuid.uuid4().hex, ex=SEVEN_DAYS_IN_SECONDS
+            )
+            if not all_calendars:
+                self.redis_instance.set(self._busy_time_version_key(), uuid.uuid4().hex, ex=SEVEN_DAYS_IN_SECONDS)
+            self._namespace = None
+            self._busy_time_namespace = None
+        except RedisError as ex:
+            logging.warning(f'[calendar.bust_cached_events] Could not bump cache version, purging instead: {ex}')
+            sentry_sdk.capture_exception(ex)
+            return self.purge_cached_events(all_calendars=all_calendars)
+
+        sentry_sdk.set_measurement('redis_bust_time', time.perf_counter_ns() - timer_boot, 'nanosecond')
+
+        return True
 
-        if len(ret[1]) == 0:
+    def purge_cached_events(self, all_calendars=False):
+        """Delete cached events for a specific subscriber/calendar by scanning the whole keyspace,
+        on every primary of a cluster. Keys are unlinked in batches, so redis frees their memory in the background.
+        Optionally pass in all_calendars to remove all cached calendar events for a specific subscriber."""
+        if self.redis_instance is None:
             return False
 
-        # Expand the list in position 1, which is a list of keys found from the scan
-        self.redis_instance.delete(*ret[1])
+        timer_boot = time.perf_counter_ns()
 
-        sentry_sdk.set_measurement('redis_bust_time', time.perf_counter_ns() - timer_boot, 'nanosecond')
+        matches = [f'{REDIS_REMOTE_EVENTS_KEY}:{self.get_key_body(only_subscriber=all_calendars)}:*']
+        if not all_calendars:
+            # Busy times are kept per subscriber, and may include this calendar
+            matches.append(f'{REDIS_REMOTE_EVENTS_KEY}:{self.get_key_body(only_subscriber=True)}:busy:*')
 
-        return True
+        purged = 0
+        for match in matches:
+            scan_options = {'match': match, 'count': REDIS_SCAN_BATCH_SIZE}
+            if isinstance(self.redis_instance, RedisCluster):
+                scan_options['target_nodes'] = RedisCluster.PRIMARIES
+
+            for keys in utils.chunk_list(list(self.redis_instance.scan_iter(**scan_options)), REDIS_SCAN_BATCH_SIZE):
+                purged += self.redis_instance.unlink(*keys)
+
+        self._namespace = None
+        self._busy_time_namespace = None
+        sentry_sdk.set_measurement('redis_purge_time', time.perf_counter_ns() - timer_boot, 'nanosecond')
+
+        return purged > 0
 
 
 class GoogleConnector(BaseConnector):
@@ -159,12 +528,45 @@ class GoogleConnector(BaseConnector):
         """Retrieve a list of { start, end } dicts that will indicate busy time for a user
         Note: This does not use the remote_calendar_id from the class,
         all calendars must be available under the google_token provided to the class"""
+        cached_busy_time = self.get_cached_busy_time(calendar_ids, start, end)
+        if cached_busy_time is not None:
+            return cached_busy_time
+
         time_min = datetime.strptime(start, DATEFMT).isoformat() + 'Z'
         time_max = datetime.strptime(end, DATEFMT).isoformat() + 'Z'
 
-        results = []
-        for calendars in utils.chunk_list(calendar_ids, chunk_by=5):
-            results += self.google_client.get_free_busy(calendars, time_min, time_max, self.google_token)
+        def query():
+            results = self._query_free_busy(calendar_ids, time_min, time_max)
+            self.put_cached_busy_time(calendar_ids, start, end, results)
+            return results
+
+        # Identical lookups (e.g. a booking page opened by several people at once) share a single FreeBusy call
+        key = (self.subscriber_id, tuple(sorted(calendar_ids)), time_min, time_max)
+        return list(free_busy_flights.do(key, query))
+
+    def _query_free_busy(self, calendar_ids: list, time_min: str, time_max: str):
+        """Query FreeBusy in batches, sending all but the first batch from our FreeBusy thread pool"""
+        chunk_by = int(os.getenv('GOOGLE_FREEBUSY_BATCH_SIZE', 50))
+        chunks = list(utils.chunk_list(calendar_ids, chunk_by=chunk_by))
+        if not chunks:
+            return []
+
+        executor = get_free_busy_executor()
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run,
+                self.google_client.get_free_busy,
+                calendars,
+                time_min,
+                time_max,
+                self.google_token,
+            )
+            for calendars in chunks[1:]
+        ]
+
+        results = self.google_client.get_free_busy(chunks[0], time_min, time_max, self.google_token)
+        for future in futures:
+            results += future.result()
         return results
 
     def test_connection(self) -> bool:
@@ -415,11 +817,24 @@ class CalDavConnector(BaseConnector):
             sentry_sdk.set_tag('caldav_host', parsed_url.hostname)
 
         # connect to the CalDAV server
-        self.client = DAVClient(url=self.url, username=self.user, password=self.password)
+        self.client = DAVClient(
+            url=self.url, username=self.user, password=self.password, timeout=get_busy_time_source_timeout()
+        )
+        # Reuse a connection to this server instead of setting up a new one for every connector,
+        # and hand it back once this connector is gone
+        self.client.session.close()
+        sessions = get_caldav_sessions()
+        session_key = caldav_session_key(self.url, self.user, self.password)
+        self.client.session = sessions.get(session_key)
+        weakref.finalize(self, sessions.release, session_key, self.client.session)
 
     def get_busy_time(self, calendar_ids: list, start: str, end: str):
         """Retrieve a list of { start, end } dicts that will indicate busy time for a user
         Note: This does not use the remote_calendar_id from the class"""
+        cached_busy_time = self.get_cached_busy_time(calendar_ids, start, end)
+        if cached_busy_time is not None:
+            return cached_busy_time
+
         time_min = datetime.strptime(start, DATEFMT)
         time_max = datetime.strptime(end, DATEFMT)
 
@@ -456,6 +871,8 @@ class CalDavConnector(BaseConnector):
                 {'start': period[0], 'end': period[1] if isinstance(period[1], datetime) else period[0] + period[1]}
             )
 
+        self.put_cached_busy_time(calendar_ids, start, end, items)
+
         return items
 
     @staticmethod
@@ -760,6 +1177,83 @@ class CalDavConnector(BaseConnector):
         return count
 
 
+class BusyIndex:
+    """Sorted index over busy time ranges, given as (start, end) epoch timestamps.
+    Answers whether a time range collides with any busy range in O(log n)."""
+
+    def __init__(self, ranges: Iterable[tuple[float, float]]):
+        ranges = sorted(ranges)
+        self.starts = [start for start, _ in ranges]
+        # The latest end time of any range starting at or before the same position
+        self.max_ends = list(accumulate((end for _, end in ranges), max))
+
+    def collides(self, start: float, end: float) -> bool:
+        """Returns true if any busy range overlaps [start, end).
+        Only ranges starting before our end can overlap, and of those it's enough to check the one ending last."""
+        candidates = bisect_left(self.starts, end)
+        return candidates > 0 and self.max_ends[candidates - 1] > start
+
+
+class BusyTime(NamedTuple):
+    events: list[schemas.Event]
+    # Set if any remote calendar was skipped, the events may then be missing some busy time
+    degraded: bool = False
+
+
+def gather_busy_time(sources: dict[str, Callable[[], list[schemas.Event]]]) -> BusyTime:
+    """Run each source's busy time lookup concurrently and collect their events.
+    A source that runs longer than the per-source timeout, or is still running once the overall deadline is reached,
+    is skipped so one slow calendar can't hold up everyone's availability, and the result is marked as degraded.
+    Sources run on pool threads that may outlive this call, so they must not hold on to a db session or ORM objects.
+    Any exception raised by a source is re-raised here, sources are expected to handle the errors they can recover
+    from themselves."""
+    if not sources:
+        return BusyTime([])
+
+    source_timeout = get_busy_time_source_timeout()
+    deadline = time.monotonic() + get_busy_time_deadline()
+    started = {}
+
+    def run(name: str, fetch: Callable[[], list[schemas.Event]]):
+        started[name] = time.monotonic()
+        return fetch()
+
+    executor = get_busy_time_executor()
+    # Each source runs in a copy of our context, so request context (e.g. l10n) and sentry's scope carry over
+    pending: dict[Future, str] = {
+        executor.submit(contextvars.copy_context().run, run, name, fetch): name for name, fetch in sources.items()
+    }
+
+    events = []
+    timed_out = []
+    try:
+        while pending:
+            # Wake up once something finishes, or when the next running source would time out
+            wake_at = min([deadline, *[started[name] + source_timeout for name in pending.values() if name in started]])
+            done, _ = wait(pending, timeout=max(wake_at - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                pending.pop(future)
+                events.extend(future.result())
+
+            now = time.monotonic()
+            for future, name in list(pending.items()):
+                if now >= deadline or (name in started and now - started[name] >= source_timeout):
+                    future.cancel()
+                    pending.pop(future)
+                    timed_out.append(name)
+    finally:
+        # Don't leave any queued work behind if a source raised
+        for future in pending:
+            future.cancel()
+
+    if timed_out:
+        logging.warning(f'[calendar.gather_busy_time] Skipped {len(timed_out)} slow remote calendar(s): {timed_out}')
+        sentry_sdk.set_measurement('remote_calendar_timeouts', len(timed_out))
+
+    return BusyTime(events, degraded=bool(timed_out))
+
+
 class Tools:
     def create_vevent(
         self,
@@ -978,12 +1472,13 @@ class Tools:
         )
 
     @staticmethod
-    def available_slots_from_schedule(schedule: models.Schedule, day: datetime = None) -> list[schemas.SlotBase]:
-        """This helper calculates a list of slots according to the given schedule configuration.
-        If 'day' is provided, only slots for that day are returned.
+    def available_slot_starts_from_schedule(schedule: models.Schedule, day: datetime = None) -> list[int]:
+        """This helper calculates the start times of all slots according to the given schedule configuration.
+        Start times are returned as a sorted list of epoch timestamps (in seconds), each slot is
+        schedule.slot_duration minutes long. If 'day' is provided, only slots for that day are returned.
         Otherwise, slots for the full schedule range are returned."""
 
-        slots = []
+        slot_starts = []
         now = datetime.now()
 
         subscriber = schedule.calendar.owner
@@ -1006,13 +1501,20 @@ class Tools:
 
         slot_duration_seconds = schedule.slot_duration * 60
 
-        def generate_slots_for_date(date: datetime):
-            day_slots = []
+        # The availability windows only depend on the weekday, so work them out once for each weekday.
+        # Each window is a tuple of (local start time, seconds from midnight, total length in seconds)
+        windows_by_weekday = {}
+        for weekday in range(1, 8):
+            windows_by_weekday[weekday] = []
+
+            if weekday not in weekdays:
+                continue
+
             parts = [(start_time_local, end_time_local)]
-            customAvailabilities = [x for x in availabilities if date.isoweekday() == x.day_of_week.value]
+            custom_availabilities = [x for x in availabilities if weekday == x.day_of_week.value]
 
-            if custom_times and len(customAvailabilities) > 0:
-                parts = [(x.start_time_local, x.end_time_local) for x in customAvailabilities]
+            if custom_times and len(custom_availabilities) > 0:
+                parts = [(x.start_time_local, x.end_time_local) for x in custom_availabilities]
 
             for start_local, end_local in parts:
                 # Calculate time difference from midnight for both start and end times
@@ -1025,16 +1527,27 @@ class Tools:
 
                 # Calculate the total duration of the slot in seconds
                 total_time = int(end_time.total_seconds()) - int(start_time.total_seconds())
+                windows_by_weekday[weekday].append((start_local, start_time.total_seconds(), total_time))
+
+        def slot_starts_for_date(date: datetime):
+            day_starts = []
+            is_today = now_tz.toordinal() == date.toordinal()
+
+            for start_local, start_seconds, total_time in windows_by_weekday[date.isoweekday()]:
                 time_start = 0
 
                 # If the date is today and the current time is after the start time,
                 # we should skip the current slot, so time_start is set to the next slot after now
-                if now_tz.toordinal() == date.toordinal() and now_tz_total_seconds > start_time.total_seconds():
-                    time_start = int(now_tz_total_seconds - start_time.total_seconds())
+                if is_today and now_tz_total_seconds > start_seconds:
+                    time_start = int(now_tz_total_seconds - start_seconds)
                     time_start -= time_start % slot_duration_seconds
                     time_start += slot_duration_seconds
 
-                current_datetime = datetime(
+                offsets = range(time_start, total_time - slot_duration_seconds + 1, slot_duration_seconds)
+                if not offsets:
+                    continue
+
+                window_start = datetime(
                     year=date.year,
                     month=date.month,
                     day=date.day,
@@ -1042,19 +1555,22 @@ class Tools:
                     minute=start_local.minute,
                     tzinfo=timezone,
                 )
+                window_end = window_start + timedelta(seconds=total_time)
 
-                if current_datetime.isoweekday() in weekdays:
-                    day_slots += [
-                        schemas.SlotBase(
-                            start=current_datetime + timedelta(seconds=time), duration=schedule.slot_duration
-                        )
-                        for time in range(time_start, total_time - slot_duration_seconds + 1, slot_duration_seconds)
-                    ]
+                if window_start.utcoffset() == window_end.utcoffset():
+                    # Slots are evenly spaced, so they're just a range from the window's start
+                    window_start_epoch = int(window_start.timestamp())
+                    day_starts.extend(
+                        range(window_start_epoch + offsets.start, window_start_epoch + offsets.stop, offsets.step)
+                    )
+                else:
+                    # The window spans a daylight saving time change, so step through the wall clock instead
+                    day_starts.extend(int((window_start + timedelta(seconds=time)).timestamp()) for time in offsets)
 
-            return day_slots
+            return day_starts
 
         if day is not None:
-            slots = generate_slots_for_date(day)
+            slot_starts = slot_starts_for_date(day)
         else:
             # FIXME: Currently the earliest booking acts in normal days, not within the scheduled days.
             # So if they have the schedule setup for weekdays, it will count weekends too.
@@ -1071,9 +1587,25 @@ class Tools:
 
             for ordinal in range(schedule_start.toordinal(), schedule_end.toordinal()):
                 date = datetime.fromordinal(ordinal)
-                slots += generate_slots_for_date(date)
+                slot_starts += slot_starts_for_date(date)
+
+        # Custom availabilities aren't guaranteed to be in order
+        slot_starts.sort()
 
-        return slots
+        return slot_starts
+
+    @staticmethod
+    def available_slots_from_schedule(schedule: models.Schedule, day: datetime = None) -> list[schemas.SlotBase]:
+        """This helper calculates a list of slots according to the given schedule configuration.
+        If 'day' is provided, only slots for that day are returned.
+        Otherwise, slots for the full schedule range are returned.
+        Note: This creates a model for each slot, prefer available_slot_starts_from_schedule for long ranges."""
+        timezone = zoneinfo.ZoneInfo(schedule.calendar.owner.timezone)
+
+        return [
+            schemas.SlotBase(start=datetime.fromtimestamp(slot_start, timezone), duration=schedule.slot_duration)
+            for slot_start in Tools.available_slot_starts_from_schedule(schedule, day)
+        ]
 
     @staticmethod
     def events_roll_up_difference(
@@ -1082,35 +1614,29 @@ class Tools:
         """This helper rolls up all events from list A, which have a time collision with any event in list B
         and returns all remaining elements from A as new list.
         """
-
-        def is_blocker(a_start: datetime, a_end: datetime, b_start: datetime, b_end: datetime):
-            """
-            if there is an overlap of both date ranges, a collision was found
-            see https://en.wikipedia.org/wiki/De_Morgan%27s_laws
-            """
-            return a_start.timestamp() < b_end.timestamp() and a_end.timestamp() > b_start.timestamp()
+        busy_index = BusyIndex((event.start.timestamp(), event.end.timestamp()) for event in b_list)
 
         available_slots = []
         collisions = []
+        previous_collision_end = None
 
         for slot in a_list:
-            slot_start = slot.start
-            slot_end = slot.start + timedelta(minutes=slot.duration)
+            slot_start = slot.start.timestamp()
+            slot_end = (slot.start + timedelta(minutes=slot.duration)).timestamp()
 
             # If any of the events are overlap the slot time...
-            if any([is_blocker(slot_start, slot_end, event.start, event.end) for event in b_list]):
-                previous_collision_end = (
-                    collisions[-1].start + timedelta(minutes=collisions[-1].duration) if len(collisions) else None
-                )
-
+            if busy_index.collides(slot_start, slot_end):
                 # ...and the last item was a previous collision then extend the previous collision's duration
-                if previous_collision_end and previous_collision_end.timestamp() == slot_start.timestamp():
+                if previous_collision_end == slot_start:
                     collisions[-1].duration += slot.duration
                 else:
                     # ...if the last item was a normal available time, then create a new collision
                     collisions.append(
-                        schemas.SlotBase(start=slot_start, duration=slot.duration, booking_status=BookingStatus.booked)
+                        schemas.SlotBase(start=slot.start, duration=slot.duration, booking_status=BookingStatus.booked)
                     )
+
+                collision = collisions[-1]
+                previous_collision_end = (collision.start + timedelta(minutes=collision.duration)).timestamp()
             else:
                 # ...Otherwise, just append the normal available time.
                 available_slots.append(slot)
@@ -1123,6 +1649,71 @@ class Tools:
 
         return available_slots
 
+    @staticmethod
+    def slot_starts_roll_up_difference(
+        slot_starts: list[int], slot_duration: int, b_list: list[schemas.Event]
+    ) -> list[tuple[int, int, BookingStatus]]:
+        """Works like events_roll_up_difference, but on slot start times given as epoch timestamps
+        (see available_slot_starts_from_schedule), with each slot lasting slot_duration minutes.
+        Returns a sorted list of (start, duration, booking status) tuples, leaving model creation to the caller.
+        """
+        busy_index = BusyIndex((event.start.timestamp(), event.end.timestamp()) for event in b_list)
+        slot_duration_seconds = slot_duration * 60
+
+        available_slots = []
+        collisions = []
+
+        for slot_start in slot_starts:
+            if not busy_index.collides(slot_start, slot_start + slot_duration_seconds):
+                available_slots.append((slot_start, slot_duration, BookingStatus.none))
+                continue
+
+            # Extend the previous collision if it ends right where this slot starts
+            if collisions and collisions[-1][0] + collisions[-1][1] * 60 == slot_start:
+                previous_start, previous_duration, _ = collisions[-1]
+                collisions[-1] = (previous_start, previous_duration + slot_duration, BookingStatus.booked)
+            else:
+                collisions.append((slot_start, slot_duration, BookingStatus.booked))
+
+        return sorted(available_slots + collisions, key=lambda slot: slot[0])
+
+    @staticmethod
+    def _google_busy_time(con: GoogleConnector, calendar_ids: list[str], start: str, end: str) -> list[schemas.Event]:
+        return [
+            schemas.Event(start=busy.get('start'), end=busy.get('end'), title='Busy')
+            for busy in con.get_busy_time(calendar_ids, start, end)
+        ]
+
+    @staticmethod
+    def _caldav_busy_time(
+        con: CalDavConnector, calendar_id: int, calendar_url: str, start: str, end: str
+    ) -> list[schemas.Event]:
+        try:
+            return [
+                schemas.Event(start=busy.get('start'), end=busy.get('end'), title='Busy')
+                for busy in con.get_busy_time([calendar_url], start, end)
+            ]
+        except caldav.lib.error.ReportError:
+            logging.debug('[Tools.existing_events_for_schedule] CalDAV server does not support FreeBusy API.')
+            pass
+        except (TestConnectionFailed, RemoteCalendarAuthenticationError) as ex:
+            # Bad credentials or an unparsable response from this calendar's server.
+            # Skip it rather than crashing the whole availability lookup.
+            logging.warning(f'[Tools.existing_events_for_schedule] CalDAV calendar {calendar_id} unreachable: {ex}')
+            return []
+
+        # Okay maybe this server doesn't support freebusy, try the old way
+        try:
+            return con.list_events(start, end)
+        except requests.exceptions.ConnectionError:
+            # Connection error with remote caldav calendar, don't crash this route.
+            pass
+        except (TestConnectionFailed, RemoteCalendarAuthenticationError) as ex:
+            logging.warning(f'[Tools.existing_events_for_schedule] CalDAV calendar {calendar_id} unreachable: {ex}')
+            pass
+
+        return []
+
     @staticmethod
     def existing_events_for_schedule(
         schedule: models.Schedule,
@@ -1131,9 +1722,9 @@ class Tools:
         google_client: GoogleClient,
         db,
         redis=None,
-    ) -> list[schemas.Event]:
-        """This helper retrieves all events existing in given calendars for the scheduled date range"""
-        existing_events = []
+    ) -> BusyTime:
+        """This helper retrieves all events existing in given calendars for the scheduled date range.
+        The result is degraded if a remote calendar didn't answer in time, and must not be used to confirm a booking."""
 
         now = datetime.now()
 
@@ -1163,6 +1754,11 @@ class Tools:
                 # CalDAV calendars are processed individually
                 caldav_calendars.append(calendar)
 
+        # Look up busy times for all connections at once, rather than one round trip after another
+        sources = {}
+        date_start = start.strftime(DATEFMT)
+        date_end = end.strftime(DATEFMT)
+
         # Process Google calendars in batches per external connection
         for external_connection_id, google_calendars in google_calendars_by_connection.items():
             if not google_calendars:
@@ -1175,9 +1771,10 @@ class Tools:
             if external_connection is None or external_connection.token is None:
                 raise RemoteCalendarConnectionError()
 
-            # Create a single connector for this batch of calendars
+            # Create a single connector for this batch of calendars,
+            # it's used from the busy time pool so it doesn't get our db session
             con = GoogleConnector(
-                db=db,
+                db=None,
                 redis_instance=redis,
                 google_client=google_client,
                 remote_calendar_id=google_calendars[0].user,  # This isn't used for get_busy_time but is still needed.
@@ -1188,17 +1785,14 @@ class Tools:
 
             # Batch all calendar IDs for this connection into a single API call
             calendar_ids = [calendar.user for calendar in google_calendars]
-            existing_events.extend(
-                [
-                    schemas.Event(start=busy.get('start'), end=busy.get('end'), title='Busy')
-                    for busy in con.get_busy_time(calendar_ids, start.strftime(DATEFMT), end.strftime(DATEFMT))
-                ]
+            sources[f'google:{external_connection_id}'] = partial(
+                Tools._google_busy_time, con, calendar_ids, date_start, date_end
             )
 
         # Process CalDAV calendars individually (no batching support)
         for calendar in caldav_calendars:
             con = CalDavConnector(
-                db=db,
+                db=None,
                 redis_instance=redis,
                 url=calendar.url,
                 user=calendar.user,
@@ -1206,51 +1800,23 @@ class Tools:
                 subscriber_id=subscriber.id,
                 calendar_id=calendar.id,
             )
+            sources[f'caldav:{calendar.id}'] = partial(
+                Tools._caldav_busy_time, con, calendar.id, calendar.url, date_start, date_end
+            )
 
-            try:
-                existing_events.extend(
-                    [
-                        schemas.Event(start=busy.get('start'), end=busy.get('end'), title='Busy')
-                        for busy in con.get_busy_time([calendar.url], start.strftime(DATEFMT), end.strftime(DATEFMT))
-                    ]
-                )
-
-                # We're good here, continue along the loop
-                continue
-            except caldav.lib.error.ReportError:
-                logging.debug('[Tools.existing_events_for_schedule] CalDAV server does not support FreeBusy API.')
-                pass
-            except (TestConnectionFailed, RemoteCalendarAuthenticationError) as ex:
-                # Bad credentials or an unparsable response from this calendar's server.
-                # Skip it rather than crashing the whole availability lookup.
-                logging.warning(f'[Tools.existing_events_for_schedule] CalDAV calendar {calendar.id} unreachable: {ex}')
-                continue
-
-            # Okay maybe this server doesn't support freebusy, try the old way
-            try:
-                existing_events.extend(con.list_events(start.strftime(DATEFMT), end.strftime(DATEFMT)))
-            except requests.exceptions.ConnectionError:
-                # Connection error with remote caldav calendar, don't crash this route.
-                pass
-            except (TestConnectionFailed, RemoteCalendarAuthenticationError) as ex:
-                logging.warning(f'[Tools.existing_events_for_schedule] CalDAV calendar {calendar.id} unreachable: {ex}')
-                pass
-
-        # handle already requested time slots
-        for slot in schedule.slots:
-            # don't consider declined or cancelled slots as taken
-            if slot.booking_status == BookingStatus.declined or slot.booking_status == BookingStatus.cancelled:
-                continue
+        existing_events, degraded = gather_busy_time(sources)
 
+        # handle already requested time slots, declined or cancelled slots aren't considered as taken
+        for slot_start, slot_duration in repo.slot.get_taken_by_schedule(db, schedule.id, start, end):
             existing_events.append(
                 schemas.Event(
                     title=schedule.name,
-                    start=slot.start,
-                    end=slot.start + timedelta(minutes=slot.duration),
+                    start=slot_start,
+                    end=slot_start + timedelta(minutes=slot_duration),
                 )
             )
 
-        return existing_events
+        return BusyTime(existing_events, degraded)
 
     @staticmethod
     def dns_caldav_lookup(url, secure=True):
@@ -3,15 +3,53 @@
 import json
 import logging
 import os
+import threading
+import time
 import uuid
+from contextlib import contextmanager
 from datetime import datetime, timezone
 
 from google.oauth2.credentials import Credentials
+from redis import Redis, RedisCluster
+from redis.exceptions import LockError
 from sqlalchemy.orm import Session
 
 from .apis.google_client import GoogleClient
 from ..database import repo, models
-from ..tasks.google import stop_google_channel
+from ..defines import REDIS_GOOGLE_SYNC_LOCK_KEY, REDIS_GOOGLE_SYNC_PENDING_KEY
+from ..tasks.google import stop_google_channel, sync_google_calendar_changes
+
+
+class RateLimiter:
+    """Spaces out calls, made from any number of threads, to at most ``rate`` calls per second"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next_call = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until the caller may make its call"""
+        if not self.interval:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            call_at = max(self._next_call, now)
+            self._next_call = call_at + self.interval
+
+        if call_at > now:
+            time.sleep(call_at - now)
+
+
+def get_watch_max_workers() -> int:
+    """How many watch channels we create (or renew) at once"""
+    return int(os.getenv('GOOGLE_WATCH_MAX_WORKERS', 8))
+
+
+def get_watch_rate_limiter() -> RateLimiter:
+    """Rate limit for creating watch channels across all of our workers, 0 to disable"""
+    return RateLimiter(float(os.getenv('GOOGLE_WATCH_RATE_LIMIT', 10)))
 
 
 def get_webhook_url() -> str | None:
@@ -126,3 +164,62 @@ def teardown_watch_channels_for_connection(
         )
 
         repo.google_calendar_channel.delete(db, channel)
+
+
+def get_sync_debounce() -> int:
+    """How long we wait for more notifications of a channel before syncing its changes, in seconds"""
+    return int(os.getenv('GOOGLE_SYNC_DEBOUNCE_SECONDS', 5))
+
+
+def get_sync_lock_timeout() -> int:
+    """How long a sync may hold its channel's lock, in seconds"""
+    return int(os.getenv('GOOGLE_SYNC_LOCK_SECONDS', 300))
+
+
+def queue_calendar_sync(redis_instance: Redis | RedisCluster | None, channel_id: str) -> bool:
+    """Queue a sync of a channel's changed events. Google often sends a burst of notifications for a single change,
+    so the sync is delayed a little, and any notifications until it starts are coalesced into it.
+    Returns False if the notification was coalesced into an already queued sync."""
+    if redis_instance is None:
+        sync_google_calendar_changes.delay(channel_id)
+        return True
+
+    # The pending flag expires on its own, in case the queued sync is lost
+    pending_key = f'{REDIS_GOOGLE_SYNC_PENDING_KEY}:{channel_id}'
+    if not redis_instance.set(pending_key, 1, nx=True, ex=get_sync_debounce() + get_sync_lock_timeout()):
+        return False
+
+    try:
+        sync_google_calendar_changes.apply_async((channel_id,), countdown=get_sync_debounce())
+    except Exception:
+        redis_instance.delete(pending_key)
+        raise
+
+    return True
+
+
+@contextmanager
+def calendar_sync_lock(redis_instance: Redis | RedisCluster | None, channel_id: str):
+    """Make sure only one sync of a channel runs at a time, as they'd otherwise race on its sync token.
+    Yields whether the lock was acquired."""
+    if redis_instance is None:
+        yield True
+        return
+
+    # The queued sync has started, any notifications from now on need a sync of their own
+    redis_instance.delete(f'{REDIS_GOOGLE_SYNC_PENDING_KEY}:{channel_id}')
+
+    lock = redis_instance.lock(
+        f'{REDIS_GOOGLE_SYNC_LOCK_KEY}:{channel_id}', timeout=get_sync_lock_timeout(), blocking=False
+    )
+    if not lock.acquire():
+        yield False
+        return
+
+    try:
+        yield True
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            logging.warning(f'[google_watch.calendar_sync_lock] Sync of channel {channel_id} outlived its lock')
@@ -8,7 +8,10 @@ import logging
 import os
 import smtplib
 import ssl
+import threading
+import time
 from email.message import EmailMessage
+from functools import cache
 
 import jinja2
 import sentry_sdk
@@ -18,11 +21,14 @@ from babel.dates import format_date
 from html import escape
 from fastapi.templating import Jinja2Templates
 
-from ..defines import BASE_PATH, FALLBACK_LOCALE
+from ..defines import APP_ENV_DEV, BASE_PATH, FALLBACK_LOCALE
 from ..l10n import l10n
 
 
+@cache
 def get_jinja():
+    """Provides our email templates. The environment is only set up once per process,
+    and keeps the compiled templates around for the next email."""
     path = os.path.join(BASE_PATH, 'templates/email')
 
     templates = Jinja2Templates(path)
@@ -32,6 +38,15 @@ def get_jinja():
     templates.env.globals.update(l10n=l10n)
     templates.env.globals.update(homepage_url=os.getenv('FRONTEND_URL'))
 
+    # Templates only change on deploy, so don't check the template files for changes outside of dev
+    templates.env.auto_reload = os.getenv('APP_ENV') == APP_ENV_DEV
+
+    # Optionally keep compiled templates on disk, so new worker processes don't need to compile them again
+    bytecode_cache_dir = os.getenv('EMAIL_TEMPLATE_BYTECODE_CACHE_DIR')
+    if bytecode_cache_dir:
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+        templates.env.bytecode_cache = jinja2.FileSystemBytecodeCache(bytecode_cache_dir)
+
     return templates
 
 
@@ -41,6 +56,191 @@ def get_template(template_name) -> 'jinja2.Template':
     return templates.get_template(template_name)
 
 
+@cache
+def get_asset(asset_path: str) -> bytes:
+    """Retrieves a file under the templates/assets folder, e.g. an image to inline into our emails.
+    Assets are only read once per process."""
+    with open(os.path.join(BASE_PATH, 'templates/assets', asset_path), 'rb') as fh:
+        return fh.read()
+
+
+def get_smtp_config() -> dict:
+    """Retrieve the smtp configuration"""
+    return {
+        'security': os.getenv('SMTP_SECURITY', 'NONE'),
+        'url': os.getenv('SMTP_URL', 'localhost'),
+        'port': os.getenv('SMTP_PORT', 25),
+        'user': os.getenv('SMTP_USER'),
+        'password': os.getenv('SMTP_PASS'),
+    }
+
+
+class SMTPPool:
+    """Keeps SMTP connections open between mails, so we only pay for the TLS handshake and login once.
+    Idle connections are checked with a NOOP before they're re-used, and replaced if the server has hung up on us.
+    Like our database engine, a forked child process starts with an empty pool."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.idle: list[tuple[tuple, smtplib.SMTP, float]] = []
+        self.pid = os.getpid()
+
+    @staticmethod
+    def max_size() -> int:
+        """How many idle connections we keep around, 0 disables pooling"""
+        return int(os.getenv('SMTP_POOL_SIZE', 4))
+
+    @staticmethod
+    def max_idle() -> float:
+        """How long, in seconds, a connection may sit idle before we rather open a new one"""
+        return float(os.getenv('SMTP_POOL_MAX_IDLE_SECONDS', 60))
+
+    @staticmethod
+    def max_messages() -> int:
+        """How many messages we send over a single connection, servers tend to limit this"""
+        return int(os.getenv('SMTP_MAX_MESSAGES_PER_CONNECTION', 100))
+
+    @staticmethod
+    def connect(config: dict) -> smtplib.SMTP:
+        # check config
+        url = f'http://{config["url"]}:{config["port"]}'
+        if not validators.url(url):
+            # url is not valid
+            logging.error('[mailer.send] No valid SMTP url configured: ' + url)
+
+        # if configured, create a secure SSL context
+        if config['security'] == 'SSL':
+            server = smtplib.SMTP_SSL(config['url'], config['port'], context=ssl.create_default_context())
+        # fall back to non-secure
+        else:
+            server = smtplib.SMTP(config['url'], config['port'])
+
+        try:
+            if config['security'] == 'STARTTLS':
+                server.starttls(context=ssl.create_default_context())
+            if config['security'] in ('SSL', 'STARTTLS'):
+                server.login(config['user'], config['password'])
+        except Exception:
+            server.close()
+            raise
+
+        server.messages_sent = 0
+        return server
+
+    @staticmethod
+    def close(server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    @staticmethod
+    def is_alive(server: smtplib.SMTP) -> bool:
+        try:
+            return server.noop()[0] == 250
+        except Exception:
+            return False
+
+    def acquire(self, config: dict) -> tuple[smtplib.SMTP, bool]:
+        """Retrieve a healthy connection for the given config, returns the connection and whether it was re-used"""
+        key = tuple(config.values())
+
+        while True:
+            with self.lock:
+                if self.pid != os.getpid():
+                    # Connections inherited from our parent process belong to it
+                    self.idle = []
+                    self.pid = os.getpid()
+
+                index = next((i for i, (idle_key, _, _) in enumerate(self.idle) if idle_key == key), None)
+                if index is None:
+                    break
+                _, server, last_used = self.idle.pop(index)
+
+            if time.monotonic() - last_used < self.max_idle() and self.is_alive(server):
+                return server, True
+
+            self.close(server)
+
+        return self.connect(config), False
+
+    def release(self, config: dict, server: smtplib.SMTP):
+        """Return a connection to the pool once we're done with it"""
+        with self.lock:
+            if server.messages_sent < self.max_messages() and len(self.idle) < self.max_size():
+                self.idle.append((tuple(config.values()), server, time.monotonic()))
+                return
+
+        self.close(server)
+
+    def send_messages(self, messages: list[tuple[EmailMessage, str]]) -> list[Exception | None]:
+        """Send each (message, recipients) over as few connections as possible.
+        Returns, for each message, the exception that prevented it from being sent, or None."""
+        config = get_smtp_config()
+        errors = []
+        server = None
+        reused = False
+
+        try:
+            for message, to_addrs in messages:
+                error = None
+                for _attempt in range(2):
+                    try:
+                        if server is None:
+                            server, reused = self.acquire(config)
+                        elif server.messages_sent >= self.max_messages():
+                            self.close(server)
+                            server, reused = self.connect(config), False
+
+                        server.send_message(message, to_addrs=to_addrs)
+                        server.messages_sent += 1
+                        error = None
+                        break
+                    except smtplib.SMTPServerDisconnected as ex:
+                        # A re-used connection may have gone away since, so try that one again on a new connection
+                        error = ex
+                        if server is not None:
+                            server.close()
+                        server = None
+                        if not reused:
+                            break
+                        reused = False
+                    except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as ex:
+                        # The server refused this message (or our login), a session is still good for the next one
+                        error = ex
+                        if server is not None:
+                            try:
+                                server.rset()
+                            except Exception:
+                                server.close()
+                                server = None
+                        break
+                    except Exception as ex:
+                        error = ex
+                        if server is not None:
+                            server.close()
+                        server = None
+                        break
+
+                errors.append(error)
+        finally:
+            if server is not None:
+                self.release(config, server)
+
+        return errors
+
+    def close_all(self):
+        """Close all idle connections"""
+        with self.lock:
+            idle, self.idle = self.idle, []
+
+        for _, server, _ in idle:
+            self.close(server)
+
+
+smtp_pool = SMTPPool()
+
+
 class Attachment:
     def __init__(self, mime: tuple[str, str], filename: str, data: str | bytes):
         self.mime_main = mime[0]
@@ -83,16 +283,11 @@ class Mailer:
 
     def _attachments(self):
         """provide all attachments as list, add tbpro logo to every mail"""
-        path = os.path.join(BASE_PATH, 'templates/assets/img/tbpro_logo.png')
-
-        with open(path, 'rb') as fh:
-            tbpro_logo = fh.read()
-
         return [
             Attachment(
                 mime=('image', 'png'),
                 filename='tbpro_logo.png',
-                data=tbpro_logo,
+                data=get_asset('img/tbpro_logo.png'),
             ),
             *self.attachments,
         ]
@@ -134,44 +329,33 @@ class Mailer:
 
     def send(self):
         """actually send the email"""
-        # get smtp configuration
-        SMTP_SECURITY = os.getenv('SMTP_SECURITY', 'NONE')
-        SMTP_URL = os.getenv('SMTP_URL', 'localhost')
-        SMTP_PORT = os.getenv('SMTP_PORT', 25)
-        SMTP_USER = os.getenv('SMTP_USER')
-        SMTP_PASS = os.getenv('SMTP_PASS')
-
-        # check config
-        url = f'http://{SMTP_URL}:{SMTP_PORT}'
-        if not validators.url(url):
-            # url is not valid
-            logging.error('[mailer.send] No valid SMTP url configured: ' + url)
-
+        # build the message before we take up a connection
         message = self.build()
-        server = None
-        try:
-            # if configured, create a secure SSL context
-            if SMTP_SECURITY == 'SSL':
-                server = smtplib.SMTP_SSL(SMTP_URL, SMTP_PORT, context=ssl.create_default_context())
-                server.login(SMTP_USER, SMTP_PASS)
-            elif SMTP_SECURITY == 'STARTTLS':
-                server = smtplib.SMTP(SMTP_URL, SMTP_PORT)
-                server.starttls(context=ssl.create_default_context())
-                server.login(SMTP_USER, SMTP_PASS)
-            # fall back to non-secure
-            else:
-                server = smtplib.SMTP(SMTP_URL, SMTP_PORT)
-            # now send email
-            server.send_message(message, to_addrs=self.to)
-        except Exception as e:
+
+        error = smtp_pool.send_messages([(message, self.to)])[0]
+        if error is not None:
             # sending email was not possible
-            logging.error('[mailer.send] An error occurred on sending email: ' + str(e))
+            logging.error('[mailer.send] An error occurred on sending email: ' + str(error))
             if os.getenv('SENTRY_DSN'):
-                sentry_sdk.capture_exception(e)
-            raise e
-        finally:
-            if server:
-                server.quit()
+                sentry_sdk.capture_exception(error)
+            raise error
+
+    @staticmethod
+    def send_batch(mails: list['Mailer']) -> list['Mailer']:
+        """Send many emails over a shared SMTP session, returns the emails that could not be sent"""
+        messages = [(mail.build(), mail.to) for mail in mails]
+
+        failed = []
+        for mail, error in zip(mails, smtp_pool.send_messages(messages)):
+            if error is None:
+                continue
+
+            logging.error('[mailer.send_batch] An error occurred on sending email: ' + str(error))
+            if os.getenv('SENTRY_DSN'):
+                sentry_sdk.capture_exception(error)
+            failed.append(mail)
+
+        return failed
 
 
 class BaseBookingMail(Mailer):
@@ -205,24 +389,17 @@ class BaseBookingMail(Mailer):
 
     def _attachments(self):
         """We need these little icons for the message body"""
-        path = os.path.join(BASE_PATH, 'templates/assets/img/icons')
-
-        with open(f'{path}/calendar.png', 'rb') as fh:
-            calendar_icon = fh.read()
-        with open(f'{path}/clock.png', 'rb') as fh:
-            clock_icon = fh.read()
-
         return [
             *super()._attachments(),
             Attachment(
                 mime=('image', 'png'),
                 filename='calendar.png',
-                data=calendar_icon,
+                data=get_asset('img/icons/calendar.png'),
             ),
             Attachment(
                 mime=('image', 'png'),
                 filename='clock.png',
-                data=clock_icon,
+                data=get_asset('img/icons/clock.png'),
             ),
         ]
 
@@ -0,0 +1,141 @@
+"""Module: public_link
+
+Resolution cache for public booking links. Resolving a link checks its signature, and looks the subscriber and
+their schedules up more than once, so every public page load would otherwise pay for that again.
+
+Resolved links are kept in redis by the (normalized) url and point to the subscriber and the schedule we serve.
+Each entry carries the subscriber's link version, invalidating a subscriber's links only bumps that counter,
+and any older entry simply expires.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from typing import NamedTuple
+
+import sentry_sdk
+from redis import Redis, RedisCluster
+from sqlalchemy.orm import Session, defaultload
+
+from ..database import models, repo
+from ..defines import REDIS_PUBLIC_LINK_KEY, REDIS_PUBLIC_LINK_VERSION_KEY, get_long_base_sign_url
+
+
+# Serving a link doesn't need anyone's credentials, these are only loaded (and decrypted) when they're read
+PUBLIC_LINK_LOAD_OPTIONS = (
+    defaultload(models.Schedule.calendar).defer(models.Calendar.password),
+    defaultload(models.Schedule.calendar)
+    .defaultload(models.Calendar.external_connection)
+    .defer(models.ExternalConnections.token),
+    defaultload(models.Schedule.calendar)
+    .defaultload(models.Calendar.owner)
+    .defer(models.Subscriber.password, models.Subscriber.avatar_url),
+)
+
+
+class PublicLink(NamedTuple):
+    subscriber: models.Subscriber
+    # For now we only serve the first schedule of a subscriber
+    schedule: models.Schedule | None
+
+
+def get_cache_expiry() -> int:
+    """How long a resolved link is kept for, in seconds"""
+    return int(os.getenv('PUBLIC_LINK_CACHE_SECONDS', 300))
+
+
+def normalize_url(url: str) -> str:
+    """Short and long links resolve to the same subscriber, so they share a cache entry"""
+    if os.getenv('SHORT_BASE_URL'):
+        url = url.replace(os.getenv('SHORT_BASE_URL'), get_long_base_sign_url())
+    return url
+
+
+def _version_key(subscriber_id: int) -> str:
+    return f'{REDIS_PUBLIC_LINK_VERSION_KEY}:{subscriber_id}'
+
+
+def _link_key(url: str) -> str:
+    # Links can be long, and shouldn't end up in redis as is
+    return f'{REDIS_PUBLIC_LINK_KEY}:{hashlib.sha256(normalize_url(url).encode()).hexdigest()}'
+
+
+def get_version(redis_instance: Redis | RedisCluster, subscriber_id: int) -> int:
+    return int(redis_instance.get(_version_key(subscriber_id)) or 0)
+
+
+def invalidate(redis_instance: Redis | RedisCluster | None, subscriber_id: int) -> bool:
+    """Invalidate all resolved links of a subscriber, e.g. after their username, short link or schedules changed"""
+    if redis_instance is None:
+        return False
+
+    try:
+        redis_instance.incr(_version_key(subscriber_id))
+    except Exception as ex:
+        # The links will still expire on their own
+        logging.warning(f'[public_link.invalidate] Could not invalidate subscriber {subscriber_id}: {ex}')
+        sentry_sdk.capture_exception(ex)
+        return False
+
+    return True
+
+
+def _get_cached(db: Session, redis_instance: Redis | RedisCluster, url: str) -> PublicLink | None:
+    raw_link = redis_instance.get(_link_key(url))
+    if raw_link is None:
+        return None
+
+    cached = json.loads(raw_link)
+    if cached['version'] != get_version(redis_instance, cached['subscriber_id']):
+        return None
+
+    if cached['schedule_id'] is None:
+        subscriber = repo.subscriber.get(db, cached['subscriber_id'])
+        return PublicLink(subscriber, None) if subscriber else None
+
+    # The schedule's calendar and its owner are loaded along with it
+    schedule = db.get(models.Schedule, cached['schedule_id'], options=PUBLIC_LINK_LOAD_OPTIONS)
+    if not schedule or schedule.calendar.owner_id != cached['subscriber_id']:
+        return None
+
+    return PublicLink(schedule.calendar.owner, schedule)
+
+
+def _put(redis_instance: Redis | RedisCluster, url: str, link: PublicLink) -> bool:
+    try:
+        cached = {
+            'subscriber_id': link.subscriber.id,
+            'schedule_id': link.schedule.id if link.schedule else None,
+            'version': get_version(redis_instance, link.subscriber.id),
+        }
+        redis_instance.set(_link_key(url), json.dumps(cached), ex=get_cache_expiry())
+    except Exception as ex:
+        # We'll just resolve the link again next time
+        logging.warning(f'[public_link.put] Could not cache link of subscriber {link.subscriber.id}: {ex}')
+        return False
+
+    return True
+
+
+def resolve(db: Session, redis_instance: Redis | RedisCluster | None, url: str) -> PublicLink | None:
+    """Resolve a signed url or schedule link to its subscriber and the schedule to serve.
+    Returns None if the link isn't valid."""
+    if redis_instance is not None:
+        link = _get_cached(db, redis_instance, url)
+        if link:
+            return link
+
+    subscriber = repo.subscriber.verify_link(db, url)
+    if not subscriber:
+        subscriber = repo.schedule.verify_link(db, url)
+    if not subscriber:
+        return None
+
+    schedules = repo.schedule.get_by_subscriber(db, subscriber_id=subscriber.id)
+    link = PublicLink(subscriber, schedules[0] if schedules else None)
+
+    if redis_instance is not None:
+        _put(redis_instance, url, link)
+
+    return link
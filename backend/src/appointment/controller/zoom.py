@@ -23,8 +23,10 @@ def create_meeting_link(
     slot: models.Slot,
     subscriber: models.Subscriber,
     title: str,
+    commit: bool = True,
 ) -> str | None:
     """Create a Zoom meeting and persist the link on the slot.
+    Pass commit=False to only flush the link, when the caller commits it along with their own changes.
 
     Returns the join URL on success, or ``None`` on any failure.
     """
@@ -36,7 +38,10 @@ def create_meeting_link(
             slot.meeting_link_id = response['id']
             slot.meeting_link_url = join_url
             db.add(slot)
-            db.commit()
+            if commit:
+                db.commit()
+            else:
+                db.flush()
             return join_url
     except Exception as err:
         logging.error(f'[zoom] Zoom meeting creation error: {err}')
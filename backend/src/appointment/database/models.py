@@ -6,10 +6,11 @@ Definitions of database tables and their relationships.
 import datetime
 import enum
 import hashlib
+import hmac
 import os
 import uuid
 import zoneinfo
-from functools import cached_property
+from functools import cache, cached_property
 
 from sqlalchemy import (
     Column,
@@ -24,10 +25,11 @@ from sqlalchemy import (
     Time,
     Uuid,
     UniqueConstraint,
+    Index,
 )
 from sqlalchemy_utils import StringEncryptedType, ChoiceType
 from sqlalchemy_utils.types.encrypted.encrypted_type import AesEngine
-from sqlalchemy.orm import relationship, as_declarative, declared_attr, Mapped
+from sqlalchemy.orm import relationship, as_declarative, declared_attr, Mapped, validates
 from sqlalchemy.sql import func
 from appointment.defines import FALLBACK_LOCALE
 
@@ -126,6 +128,22 @@ def encrypted_type(column_type, length: int = 255, **kwargs) -> StringEncryptedT
     )
 
 
+@cache
+def _blind_index_key(db_secret: str) -> bytes:
+    # Don't use the encryption key itself
+    return hashlib.sha256(f'blind-index:{db_secret}'.encode()).digest()
+
+
+def blind_index(value: str | None, casefold: bool = False) -> str | None:
+    """Keyed hash of a value, to look rows up by an encrypted column without encrypting and comparing ciphertexts.
+    With casefold the value matches regardless of its case (e.g. emails)."""
+    if value is None:
+        return None
+    if casefold:
+        value = value.lower()
+    return hmac.new(_blind_index_key(secret()), value.encode(), hashlib.sha256).hexdigest()
+
+
 @as_declarative()
 class Base:
     """Base model, contains anything we want to be on every model."""
@@ -173,6 +191,10 @@ class Subscriber(HasSoftDelete, Base):
     avatar_url = Column(encrypted_type(String, length=2048), index=False)
     short_link_hash = Column(encrypted_type(String), index=False)
 
+    # Blind indexes of username and email, these are what we look subscribers up by
+    username_index = Column(String(64), index=True)
+    email_index = Column(String(64), index=True)
+
     # General settings
     language = Column(encrypted_type(String), nullable=False, default=FALLBACK_LOCALE, index=True)
     timezone = Column(encrypted_type(String), index=True)
@@ -209,6 +231,16 @@ class Subscriber(HasSoftDelete, Base):
         """Has the user been through the First Time User Experience?"""
         return self.ftue_level > 0
 
+    @validates('username')
+    def validate_username(self, key, value):
+        self.username_index = blind_index(value)
+        return value
+
+    @validates('email')
+    def validate_email(self, key, value):
+        self.email_index = blind_index(value, casefold=True)
+        return value
+
     @cached_property
     def unique_hash(self):
         """Retrieve the unique hash for the subscriber"""
@@ -269,6 +301,8 @@ class Appointment(Base):
     keep_open = Column(Boolean)
     status: AppointmentStatus = Column(Enum(AppointmentStatus), default=AppointmentStatus.draft)
     external_id = Column(encrypted_type(String), index=True, nullable=True)
+    # Blind index of external_id, this is what we look appointments up by
+    external_id_index = Column(String(64), index=True, nullable=True)
 
     # What (if any) meeting link will we generate once the meeting is booked
     meeting_link_provider = Column(
@@ -280,6 +314,11 @@ class Appointment(Base):
         'Slot', cascade='all,delete', back_populates='appointment', lazy='joined'
     )
 
+    @validates('external_id')
+    def validate_external_id(self, key, value):
+        self.external_id_index = blind_index(value)
+        return value
+
     def __str__(self):
         return f'Appointment: {self.id}'
 
@@ -298,6 +337,8 @@ class Attendee(Base):
 
 class Slot(Base):
     __tablename__ = 'slots'
+    # Availability looks up a schedule's taken slots in its booking window
+    __table_args__ = (Index('ix_slots_schedule_id_start_booking_status', 'schedule_id', 'start', 'booking_status'),)
 
     id = Column(Integer, primary_key=True, index=True)
     appointment_id = Column(Integer, ForeignKey('appointments.id'))
@@ -353,6 +394,8 @@ class Schedule(Base):
     active: bool = Column(Boolean, index=True, default=True)
     name: str = Column(encrypted_type(String), index=True)
     slug: str = Column(encrypted_type(String), index=True)
+    # Blind index of slug, this is what we look schedules up by
+    slug_index: str = Column(String(64), index=True)
     location_type: LocationType = Column(Enum(LocationType), default=LocationType.inperson)
     location_url: str = Column(encrypted_type(String, length=2048))
     details: str = Column(encrypted_type(String))
@@ -400,6 +443,11 @@ class Schedule(Base):
         )
         return time_of_save.astimezone(zoneinfo.ZoneInfo(self.calendar.owner.timezone)).time()
 
+    @validates('slug')
+    def validate_slug(self, key, value):
+        self.slug_index = blind_index(value)
+        return value
+
     @cached_property
     def owner(self):
         if not self.calendar:
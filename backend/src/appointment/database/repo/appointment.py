@@ -3,8 +3,9 @@
 Repository providing CRUD functions for appointment database models.
 """
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager
 from .. import models, schemas, repo
+from ... import utils
 
 
 def exists(db: Session, appointment_id: int):
@@ -36,12 +37,26 @@ def get_by_calendar_and_external_id(db: Session, calendar_id: int, external_id:
         db.query(models.Appointment)
         .filter(
             models.Appointment.calendar_id == calendar_id,
-            models.Appointment.external_id == external_id,
+            models.Appointment.external_id_index == models.blind_index(external_id),
         )
         .first()
     )
 
 
+def get_by_calendar_and_external_ids(
+    db: Session, calendar_id: int, external_ids: list[str]
+) -> dict[str, models.Appointment]:
+    """Retrieve a calendar's appointments for a list of external event IDs, keyed by external event ID."""
+    appointments = {}
+    for chunk in utils.chunk_list(list(set(external_ids)), 500):
+        query = db.query(models.Appointment).filter(
+            models.Appointment.calendar_id == calendar_id,
+            models.Appointment.external_id_index.in_([models.blind_index(external_id) for external_id in chunk]),
+        )
+        appointments.update({appointment.external_id: appointment for appointment in query.all()})
+    return appointments
+
+
 def get_public(db: Session, slug: str):
     """retrieve appointment by appointment slug (public)"""
     if slug:
@@ -57,8 +72,18 @@ def get_by_subscriber(
     all: bool = False,
     status_filters: list[models.BookingStatus] = None,
 ):
-    """retrieve list of appointments by owner id"""
-    query = db.query(models.Appointment).join(models.Calendar).filter(models.Calendar.owner_id == subscriber_id)
+    """retrieve list of appointments by owner id
+    Their calendars only come with their title and colour, anything else is loaded (and decrypted) when it's read."""
+    query = (
+        db.query(models.Appointment)
+        .join(models.Calendar)
+        .filter(models.Calendar.owner_id == subscriber_id)
+        .options(
+            contains_eager(models.Appointment.calendar)
+            .load_only(models.Calendar.title, models.Calendar.color)
+            .lazyload('*')
+        )
+    )
 
     # Apply status filters if provided
     if status_filters:
@@ -139,6 +139,10 @@ def get_subscriber_without_oidc_by_email(db: Session, email: str):
     )
 
     # Find subscribers without an OIDC connection that match the email
-    query = db.query(models.Subscriber).filter(~oidc_exists).filter(models.Subscriber.email == email)
+    query = (
+        db.query(models.Subscriber)
+        .filter(~oidc_exists)
+        .filter(models.Subscriber.email_index == models.blind_index(email, casefold=True))
+    )
 
     return query.first()
@@ -5,7 +5,8 @@ Repository providing CRUD functions for GoogleCalendarChannel database models.
 
 from datetime import datetime
 
-from sqlalchemy.orm import Session
+from sqlalchemy import exists, insert, update
+from sqlalchemy.orm import Session, joinedload
 from .. import models
 
 
@@ -28,11 +29,31 @@ def get_by_channel_id(db: Session, channel_id: str) -> models.GoogleCalendarChan
 def get_expiring(db: Session, before: datetime) -> list[models.GoogleCalendarChannel]:
     return (
         db.query(models.GoogleCalendarChannel)
+        .options(joinedload(models.GoogleCalendarChannel.calendar))
         .filter(models.GoogleCalendarChannel.expiration < before)
         .all()
     )
 
 
+def get_schedule_calendars_without_channel(db: Session, after_id: int = 0, limit: int = 500) -> list[models.Calendar]:
+    """Retrieve connected Google calendars that are used by a schedule but have no watch channel yet,
+    ordered by id and starting after the calendar id ``after_id``."""
+    return (
+        db.query(models.Calendar)
+        .outerjoin(models.GoogleCalendarChannel, models.GoogleCalendarChannel.calendar_id == models.Calendar.id)
+        .filter(
+            models.Calendar.id > after_id,
+            models.Calendar.provider == models.CalendarProvider.google,
+            models.Calendar.connected == True,  # noqa: E712
+            models.GoogleCalendarChannel.id.is_(None),
+            exists().where(models.Schedule.calendar_id == models.Calendar.id),
+        )
+        .order_by(models.Calendar.id)
+        .limit(limit)
+        .all()
+    )
+
+
 def create(
     db: Session,
     calendar_id: int,
@@ -56,6 +77,13 @@ def create(
     return channel
 
 
+def bulk_create(db: Session, channels: list[dict]):
+    """Create several channels at once, each channel being a dict of the columns passed to create()"""
+    if channels:
+        db.execute(insert(models.GoogleCalendarChannel), channels)
+    db.commit()
+
+
 def update_sync_token(db: Session, channel: models.GoogleCalendarChannel, sync_token: str):
     channel.sync_token = sync_token
     db.commit()
@@ -80,6 +108,22 @@ def update_expiration(
     return channel
 
 
+def bulk_update_expiration(db: Session, renewals: list[dict]):
+    """Update several renewed channels at once, each renewal being a dict of the channel's id and its
+    new channel_id, resource_id, expiration and state."""
+    if renewals:
+        db.execute(update(models.GoogleCalendarChannel), renewals)
+    db.commit()
+
+
+def delete_by_ids(db: Session, ids: list[int]):
+    if ids:
+        db.query(models.GoogleCalendarChannel).filter(models.GoogleCalendarChannel.id.in_(ids)).delete(
+            synchronize_session=False
+        )
+    db.commit()
+
+
 def delete(db: Session, channel: models.GoogleCalendarChannel):
     db.delete(channel)
     db.commit()
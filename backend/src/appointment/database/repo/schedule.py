@@ -39,7 +39,7 @@ def get_by_slug(db: Session, slug: str, subscriber_id: int) -> models.Schedule |
     """Get schedule by slug"""
     return (
         db.query(models.Schedule)
-        .filter(models.Schedule.slug == slug)
+        .filter(models.Schedule.slug_index == models.blind_index(slug))
         .join(models.Schedule.calendar)
         .filter(models.Calendar.owner_id == subscriber_id)
         .first()
@@ -50,7 +50,7 @@ def slug_taken(db: Session, slug: str, owner_id: int) -> bool:
     """True if the owner already has a schedule using this slug."""
     return (
         db.query(models.Schedule)
-        .filter(models.Schedule.slug == slug, models.Schedule.owner_id == owner_id)
+        .filter(models.Schedule.slug_index == models.blind_index(slug), models.Schedule.owner_id == owner_id)
         .first()
         is not None
     )
@@ -65,7 +65,7 @@ def find_conflicting_schedule_id(db: Session, slug: str, schedule_id: int) -> in
     conflicting = (
         db.query(models.Schedule)
         .filter(
-            models.Schedule.slug == slug,
+            models.Schedule.slug_index == models.blind_index(slug),
             models.Schedule.id != schedule_id,
             models.Schedule.owner_id == schedule.owner_id,
         )
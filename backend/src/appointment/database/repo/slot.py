@@ -3,6 +3,9 @@
 Repository providing CRUD functions for slot database models.
 """
 
+from datetime import datetime, timedelta
+
+from sqlalchemy import Row, or_
 from sqlalchemy.orm import Session
 from .. import models, schemas
 
@@ -33,6 +36,25 @@ def get_by_subscriber(db: Session, subscriber_id: int):
     )
 
 
+def get_taken_by_schedule(db: Session, schedule_id: int, start: datetime, end: datetime) -> list[Row]:
+    """retrieve start and duration of a schedule's slots that aren't declined or cancelled
+    and overlap the given range"""
+    return (
+        db.query(models.Slot.start, models.Slot.duration)
+        .filter(models.Slot.schedule_id == schedule_id)
+        # Slots don't last longer than a day, so that's as far back as we need to look for overlapping slots
+        .filter(models.Slot.start > start - timedelta(days=1))
+        .filter(models.Slot.start < end)
+        .filter(
+            or_(
+                models.Slot.booking_status.is_(None),
+                models.Slot.booking_status.not_in([models.BookingStatus.declined, models.BookingStatus.cancelled]),
+            )
+        )
+        .all()
+    )
+
+
 def add_for_appointment(db: Session, slots: list[schemas.SlotBase], appointment_id: int):
     """create new slots for appointment of given id"""
     return_slots = []
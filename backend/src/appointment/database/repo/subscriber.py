@@ -21,12 +21,16 @@ def get(db: Session, subscriber_id: int) -> models.Subscriber | None:
 
 def get_by_email(db: Session, email: str) -> models.Subscriber | None:
     """retrieve subscriber by email"""
-    return db.query(models.Subscriber).filter(models.Subscriber.email == email.lower()).first()
+    return (
+        db.query(models.Subscriber)
+        .filter(models.Subscriber.email_index == models.blind_index(email, casefold=True))
+        .first()
+    )
 
 
 def get_by_username(db: Session, username: str):
     """retrieve subscriber by username"""
-    return db.query(models.Subscriber).filter(models.Subscriber.username == username).first()
+    return db.query(models.Subscriber).filter(models.Subscriber.username_index == models.blind_index(username)).first()
 
 
 def get_by_appointment(db: Session, appointment_id: int):
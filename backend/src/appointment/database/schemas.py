@@ -3,12 +3,14 @@
 Definitions of valid data shapes for database and query models.
 """
 
-import json
+import base64
+import zlib
 import zoneinfo
 from uuid import UUID
 from datetime import datetime, date, time, timezone, timedelta
 from typing import Annotated, Optional, Self
 
+import orjson
 from pydantic import BaseModel, ConfigDict, Field, EmailStr, model_validator, StringConstraints
 from pydantic_core import PydanticCustomError
 
@@ -427,23 +429,99 @@ class Event(BaseModel):
     uuid: UUID | None = None
     external_id: str | None = None
 
-    """Ideally this would just be a mixin, but I'm having issues figuring out a good
-    static constructor that will work for anything."""
+    def _redis_values(self) -> tuple:
+        """Our values in the order they're packed in, see model_load_redis_values"""
+        location = self.location
+        if location is not None:
+            location = (
+                location.type.value if location.type is not None else None,
+                location.suggestions,
+                location.selected,
+                location.name,
+                location.url,
+                location.phone,
+            )
+
+        return (
+            self.title,
+            self.start,
+            self.end,
+            self.all_day,
+            self.tentative,
+            self.description,
+            self.calendar_title,
+            self.calendar_color,
+            location,
+            self.uuid,
+            self.external_id,
+        )
 
-    def model_dump_redis(self):
-        """Dumps our event into an encrypted json blob for redis"""
-        values_json = self.model_dump_json()
+    @staticmethod
+    def model_load_redis_values(values: list) -> 'Event':
+        """Builds an event from its packed values. These were validated before they were cached,
+        so we skip validation and only restore the types json doesn't have."""
+        (
+            title,
+            start,
+            end,
+            all_day,
+            tentative,
+            description,
+            calendar_title,
+            calendar_color,
+            location,
+            uuid,
+            external_id,
+        ) = values
+        if location is not None:
+            location_type, suggestions, selected, name, url, phone = location
+            location = EventLocation.model_construct(
+                type=LocationType(location_type) if location_type is not None else None,
+                suggestions=suggestions,
+                selected=selected,
+                name=name,
+                url=url,
+                phone=phone,
+            )
+
+        return Event.model_construct(
+            title=title,
+            start=datetime.fromisoformat(start),
+            end=datetime.fromisoformat(end),
+            all_day=all_day,
+            tentative=tentative,
+            description=description,
+            calendar_title=calendar_title,
+            calendar_color=calendar_color,
+            location=location,
+            uuid=UUID(uuid) if uuid is not None else None,
+            external_id=external_id,
+        )
+
+    @staticmethod
+    def model_dump_redis_list(events: list['Event']) -> str:
+        """Packs a list of events into a single encrypted blob for redis. Each event is packed as an array of its
+        values, and larger blobs are compressed before they're encrypted."""
+        packed = orjson.dumps([event._redis_values() for event in events])
+        if len(packed) >= defines.REDIS_REMOTE_EVENTS_COMPRESS_MIN_BYTES:
+            payload = 'z' + base64.b64encode(zlib.compress(packed)).decode()
+        else:
+            payload = 'j' + packed.decode()
 
-        return utils.setup_encryption_engine().encrypt(values_json)
+        return f'{defines.REDIS_REMOTE_EVENTS_FORMAT}:{utils.setup_encryption_engine().encrypt(payload)}'
 
     @staticmethod
-    def model_load_redis(encrypted_blob):
-        """Loads and decrypts our encrypted json blob from redis"""
+    def model_load_redis_list(encrypted_blob: str) -> list['Event'] | None:
+        """Loads and decrypts a list of events packed by model_dump_redis_list.
+        Returns None if the blob was packed in another format."""
+        blob_format, _, encrypted_payload = encrypted_blob.partition(':')
+        if blob_format != defines.REDIS_REMOTE_EVENTS_FORMAT:
+            return None
 
-        values_json = utils.setup_encryption_engine().decrypt(encrypted_blob)
-        values = json.loads(values_json)
+        payload = utils.setup_encryption_engine().decrypt(encrypted_payload)
+        packed = zlib.decompress(base64.b64decode(payload[1:])) if payload[0] == 'z' else payload[1:]
 
-        return Event(**values)
+        return [Event.model_load_redis_values(values) for values in orjson.loads(packed)]
 
 
 class FileDownload(BaseModel):
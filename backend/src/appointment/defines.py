@@ -11,8 +11,24 @@ DATETIMEFMT = '%Y-%m-%dT%H:%M:%SZ'
 
 # list of redis keys
 REDIS_REMOTE_EVENTS_KEY = 'rmt_events'
+REDIS_REMOTE_EVENTS_VERSION_KEY = 'rmt_events_version'
+# Remote events are cached as one packed blob per window, bump this whenever the packed layout changes
+REDIS_REMOTE_EVENTS_FORMAT = 'ev2'
+# Packed remote events larger than this (in bytes) are compressed before they're encrypted
+REDIS_REMOTE_EVENTS_COMPRESS_MIN_BYTES = 1024
+# How many cached busy time windows per calendar connection we keep track of
+REDIS_BUSY_TIME_WINDOW_LIMIT = 8
+# How many keys we ask for per SCAN call, and remove per UNLINK call
+REDIS_SCAN_BATCH_SIZE = 500
 REDIS_USER_SESSION_PROFILE_KEY = ':1:tb_accounts_user_session'  # Used with shared redis cache
 REDIS_OIDC_TOKEN_KEY = 'introspect_token'
+REDIS_AVAILABILITY_SNAPSHOT_KEY = 'availability'
+REDIS_AVAILABILITY_VERSION_KEY = 'availability_version'
+REDIS_AVAILABILITY_REFRESH_LOCK_KEY = 'availability_refresh'
+REDIS_GOOGLE_SYNC_PENDING_KEY = 'google_sync_pending'
+REDIS_GOOGLE_SYNC_LOCK_KEY = 'google_sync_lock'
+REDIS_PUBLIC_LINK_KEY = 'public_link'
+REDIS_PUBLIC_LINK_VERSION_KEY = 'public_link_version'
 
 APP_ENV_DEV = 'dev'
 APP_ENV_TEST = 'test'
@@ -22,6 +38,9 @@ APP_ENV_PROD = 'prod'
 APP_NAME = 'Appointment'
 APP_NAME_SHORT = 'apmt'
 
+# Celery queue our emails are delivered from
+MAIL_QUEUE = 'mail'
+
 # Custom pydantic error types
 END_TIME_BEFORE_START_TIME_ERR = 'end_time_before_start_time'
 
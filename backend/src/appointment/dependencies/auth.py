@@ -1,6 +1,10 @@
 import datetime
+import hashlib
 import json
 import os
+import threading
+import time
+from collections import OrderedDict
 from typing import Annotated
 
 import sentry_sdk
@@ -11,7 +15,9 @@ import jwt
 from sqlalchemy.orm import Session
 
 from ..controller.apis.accounts_client import AccountsClient
+from ..controller import public_link
 from ..controller.apis.oidc_client import OIDCClient
+from ..controller.public_link import PublicLink
 from ..database import repo, models
 from ..defines import AuthScheme, REDIS_OIDC_TOKEN_KEY
 from ..dependencies.database import get_db, get_redis
@@ -40,7 +46,68 @@ async def get_bearer_token(request: Request) -> str | None:
     return param
 
 
+class IntrospectionCache:
+    """A small per-process cache in front of redis, that resolves an introspected token straight to its subscriber's id.
+    Tokens are only kept by their hash, and for no longer than OIDC_TOKEN_CACHE_SECONDS or until they expire."""
+
+    def __init__(self):
+        self.entries: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> int | None:
+        key = self._key(token)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            subscriber_id, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+            return subscriber_id
+
+    def put(self, token: str, subscriber_id: int, token_data: dict):
+        ttl = int(os.getenv('OIDC_TOKEN_CACHE_SECONDS', 60))
+        if token_data.get('exp'):
+            ttl = min(ttl, get_expiry_time_with_grace_period(token_data['exp']) - time.time())
+        if ttl <= 0:
+            return
+
+        key = self._key(token)
+        with self.lock:
+            self.entries[key] = (subscriber_id, time.monotonic() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > int(os.getenv('OIDC_TOKEN_CACHE_SIZE', 1024)):
+                self.entries.popitem(last=False)
+
+    def discard(self, token: str):
+        with self.lock:
+            self.entries.pop(self._key(token), None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+introspection_cache = IntrospectionCache()
+
+
 def get_user_from_oidc_token_introspection(db, token: str, redis_instance):
+    # Have we seen this token recently?
+    subscriber_id = introspection_cache.get(token)
+    if subscriber_id is not None:
+        subscriber = repo.subscriber.get(db, subscriber_id)
+        if subscriber:
+            return subscriber
+        introspection_cache.discard(token)
+
     # Do we have the data cached?
     encrypted_token = encrypt(token)
     token_data = None
@@ -67,6 +134,8 @@ def get_user_from_oidc_token_introspection(db, token: str, redis_instance):
     if not subscriber:
         raise InvalidTokenException()
 
+    introspection_cache.put(token, subscriber.id, token_data)
+
     if redis_instance and not cache_hit:
         # If the token expires in less time than the default expiry time, use that.
         expiry = (
@@ -225,19 +294,30 @@ def get_subscriber_from_signed_url(
     return subscriber
 
 
-def get_subscriber_from_schedule_or_signed_url(
+def get_public_link(
     url: str = Body(..., embed=True),
     db: Session = Depends(get_db),
-):
-    """Retrieve a subscriber based off a signed url or schedule slug namespaced by their username."""
-    subscriber = repo.subscriber.verify_link(db, url)
-    if not subscriber:
-        subscriber = repo.schedule.verify_link(db, url)
+    redis_instance=Depends(get_redis),
+) -> PublicLink:
+    """Resolve a signed url or schedule slug namespaced by their username to its subscriber and schedule."""
+    # When called directly (not through FastAPI DI) we don't cache the resolved link
+    if isinstance(redis_instance, DependsClass):
+        redis_instance = None
 
-    if not subscriber:
+    link = public_link.resolve(db, redis_instance, url)
+    if not link:
         raise validation.InvalidLinkException
 
-    return subscriber
+    return link
+
+
+def get_subscriber_from_schedule_or_signed_url(
+    url: str = Body(..., embed=True),
+    db: Session = Depends(get_db),
+    redis_instance=Depends(get_redis),
+):
+    """Retrieve a subscriber based off a signed url or schedule slug namespaced by their username."""
+    return get_public_link(url, db, redis_instance).subscriber
 
 
 def get_accounts_client():
@@ -1,5 +1,6 @@
 import logging
 import os
+import threading
 import time
 from typing import Optional
 
@@ -7,25 +8,164 @@ import sentry_sdk.metrics
 from redis import Redis, RedisCluster
 from redis.backoff import ExponentialBackoff
 from redis.retry import Retry
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, Engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from ..utils import get_database_url
 
 
 _redis_instance: Optional[RedisCluster] = None
 
+_engine: Optional[Engine] = None
+_session_local: Optional[sessionmaker] = None
+_engine_pid: Optional[int] = None
+_engine_lock = threading.Lock()
+
+
+class PoolMetrics:
+    """Running counters for the process-wide connection pool, fed by SQLAlchemy pool events"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.connects = 0
+            self.checkouts = 0
+            self.invalidations = 0
+            self.wait_time_total_ns = 0
+            self.wait_time_max_ns = 0
+
+    def record_wait(self, wait_ns: int):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_time_total_ns += wait_ns
+            self.wait_time_max_ns = max(self.wait_time_max_ns, wait_ns)
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def record_invalidation(self):
+        with self._lock:
+            self.invalidations += 1
+
+
+pool_metrics = PoolMetrics()
+
+
+class MeteredQueuePool(QueuePool):
+    """A QueuePool that records how long each checkout had to wait for a free connection."""
+
+    def _do_get(self):
+        timer_wait = time.perf_counter_ns()
+        try:
+            return super()._do_get()
+        finally:
+            wait_ns = time.perf_counter_ns() - timer_wait
+            pool_metrics.record_wait(wait_ns)
+            sentry_sdk.set_measurement('db_pool_wait_time', wait_ns, 'nanosecond')
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    return value.lower() in ('true', '1')
+
+
+def get_engine_options(database_url) -> dict:
+    """Build the create_engine keyword arguments, pool settings are configurable via DATABASE_POOL_* env vars"""
+    if 'sqlite://' in str(database_url):
+        # SQLite picks its own pool class, and doesn't benefit from pool sizing
+        return {'connect_args': {'check_same_thread': False}}
+
+    return {
+        'poolclass': MeteredQueuePool,
+        'pool_size': int(os.getenv('DATABASE_POOL_SIZE', 5)),
+        'max_overflow': int(os.getenv('DATABASE_POOL_MAX_OVERFLOW', 10)),
+        'pool_timeout': float(os.getenv('DATABASE_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(os.getenv('DATABASE_POOL_RECYCLE', 1800)),
+        'pool_pre_ping': _env_bool('DATABASE_POOL_PRE_PING', True),
+    }
+
+
+def _attach_pool_listeners(engine: Engine):
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        pool_metrics.record_connect()
+
+    @event.listens_for(engine, 'invalidate')
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        pool_metrics.record_invalidation()
+
 
 def get_engine_and_session():
-    database_url = get_database_url()
-    connect_args = {}
+    """Retrieve the process-wide engine and session factory, creating them on first use.
+    The engine (and its connection pool) is shared by the FastAPI app and celery tasks within a process.
+    If we find ourselves in a forked child (e.g. a celery prefork worker) the inherited pool is discarded
+    without closing the parent's connections, and a fresh engine is created for this process."""
+    global _engine, _session_local, _engine_pid
+
+    pid = os.getpid()
+    if _engine is not None and _engine_pid == pid:
+        return _engine, _session_local
+
+    with _engine_lock:
+        if _engine is not None and _engine_pid != pid:
+            # Don't touch the parent's connections, just drop our references to them
+            _engine.dispose(close=False)
+            _engine = None
+
+        if _engine is None:
+            database_url = get_database_url()
+            _engine = create_engine(database_url, **get_engine_options(database_url))
+            _attach_pool_listeners(_engine)
+            _session_local = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
+            _engine_pid = pid
+
+    return _engine, _session_local
+
+
+def dispose_engine():
+    """Close all pooled connections and drop the process-wide engine, it will be re-created on next use."""
+    global _engine, _session_local, _engine_pid
+
+    with _engine_lock:
+        if _engine is None:
+            return
+
+        _engine.dispose()
+        _engine = None
+        _session_local = None
+        _engine_pid = None
+        pool_metrics.reset()
+        logging.info('Disposed database engine')
+
 
-    if 'sqlite://' in database_url:
-        connect_args = {'check_same_thread': False}
+def get_pool_status() -> dict:
+    """Returns a snapshot of the connection pool's state and our checkout/wait counters."""
+    status = {
+        'connects': pool_metrics.connects,
+        'checkouts': pool_metrics.checkouts,
+        'invalidations': pool_metrics.invalidations,
+        'wait_time_total_ns': pool_metrics.wait_time_total_ns,
+        'wait_time_max_ns': pool_metrics.wait_time_max_ns,
+    }
 
-    engine = create_engine(database_url, connect_args=connect_args)
-    session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    pool = _engine.pool if _engine is not None else None
+    if isinstance(pool, QueuePool):
+        status.update(
+            {
+                'size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                'overflow': pool.overflow(),
+            }
+        )
 
-    return engine, session_local
+    return status
 
 
 def get_db():
@@ -16,8 +16,9 @@ from starlette_csrf import CSRFMiddleware
 
 from .defines import APP_ENV_DEV, APP_ENV_TEST, APP_ENV_STAGE, APP_ENV_PROD, AuthScheme
 from .exceptions.validation import APIRateLimitExceeded
-from .dependencies.database import boot_redis_cluster, close_redis_cluster
-from .middleware.l10n import L10n
+from .dependencies.database import boot_redis_cluster, close_redis_cluster, dispose_engine
+from .middleware.l10n import L10n, warm_up_fluent
+from .controller.mailer import smtp_pool
 from .middleware.SanitizeMiddleware import SanitizeMiddleware
 
 from google.auth.exceptions import RefreshError, DefaultCredentialsError
@@ -159,8 +160,14 @@ def server():
     async def lifespan(app: FastAPI):
         # Boot the redis cluster as the app starts up
         boot_redis_cluster()
+        # Parse our localization files before the first request needs them
+        if os.getenv('L10N_WARM_UP', 'true').lower() == 'true':
+            warm_up_fluent()
         yield
         close_redis_cluster()
+        # Close out our pooled database and smtp connections
+        dispose_engine()
+        smtp_pool.close_all()
 
     # init app
     app = FastAPI(openapi_url=openapi_url, lifespan=lifespan, openapi_tags=tags_metadata)
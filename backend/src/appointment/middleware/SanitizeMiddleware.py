@@ -1,50 +1,105 @@
 import json
+import re
+from typing import Any
+
 import nh3
-from starlette.types import ASGIApp, Scope, Receive, Send
-from ..utils import is_json
+import orjson
+from starlette.types import ASGIApp, Message, Scope, Receive, Send
+
+# Only strings with one of these characters are changed by nh3.clean, any other string can be passed through as is
+UNSAFE_CHARACTERS = re.compile('[<>&\r\x00\xa0]')
 
 
 class SanitizeMiddleware:
+    """Strips any html from the strings of json request bodies"""
+
     def __init__(self, app: ASGIApp) -> None:
         self.app = app
 
     @staticmethod
     def sanitize_str(value: str) -> str:
-        return nh3.clean(value, tags={''}) if isinstance(value, str) else value
+        if not isinstance(value, str) or not UNSAFE_CHARACTERS.search(value):
+            return value
+        return nh3.clean(value, tags={''})
+
+    @staticmethod
+    def sanitize_value(value) -> tuple[Any, bool]:
+        """Sanitize all strings in a (nested) json value in place, returns the value and whether anything changed"""
+        if isinstance(value, str):
+            sanitized = __class__.sanitize_str(value)
+            return sanitized, sanitized != value
+
+        if isinstance(value, dict):
+            items = value.items()
+        elif isinstance(value, list):
+            items = enumerate(value)
+        else:
+            return value, False
+
+        changed = False
+        for key, item in items:
+            sanitized, item_changed = __class__.sanitize_value(item)
+            if item_changed:
+                value[key] = sanitized
+                changed = True
+        return value, changed
 
     @staticmethod
-    def sanitize_dict(dict_value: str) -> str:
-        return {key: __class__.sanitize_str(value) for key, value in dict_value.items()}
+    def sanitize_body(body: bytes) -> bytes:
+        """Sanitize a json body, anything else (or json without anything to sanitize) is returned as is"""
+        # Only objects, arrays and strings can hold anything to sanitize
+        if body.lstrip()[:1] not in (b'{', b'[', b'"'):
+            return body
+
+        try:
+            value = orjson.loads(body)
+            dumps = orjson.dumps
+        except orjson.JSONDecodeError:
+            # Our request parsing is more lenient than orjson (e.g. NaN, or very large numbers)
+            try:
+                value = json.loads(body)
+            except ValueError:
+                return body
+            dumps = __class__._json_dumps
+
+        value, changed = __class__.sanitize_value(value)
+        if not changed:
+            return body
+
+        return dumps(value)
 
     @staticmethod
-    def sanitize_list(list_values: list) -> list:
-        for index, value in enumerate(list_values):
-            if isinstance(value, dict):
-                list_values[index] = {key: __class__.sanitize_str(value) for key, value in value.items()}
-            else:
-                list_values[index] = __class__.sanitize_str(value)
-        return list_values
+    def _json_dumps(value) -> bytes:
+        return json.dumps(value).encode('utf-8')
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         if 'method' not in scope or scope['method'] in ('GET', 'HEAD', 'OPTIONS'):
             return await self.app(scope, receive, send)
 
-        async def sanitize_request_body():
-            message = await receive()
-            body = message.get('body')
-            if not body or not isinstance(body, bytes):
-                return message
-            if is_json(body):
-                json_body = json.loads(body)
-                for key, value in json_body.items():
-                    if isinstance(value, dict):
-                        json_body[key] = __class__.sanitize_dict(value)
-                    elif isinstance(value, list):
-                        json_body[key] = __class__.sanitize_list(value)
-                    else:
-                        json_body[key] = __class__.sanitize_str(value)
-                message['body'] = bytes(json.dumps(json_body), encoding='utf-8')
-
-            return message
+        # Uploads can't be json, and we don't want to hold them in memory
+        content_type = dict(scope.get('headers', [])).get(b'content-type', b'')
+        if content_type.startswith(b'multipart/'):
+            return await self.app(scope, receive, send)
+
+        body_received = False
+
+        async def sanitize_request_body() -> Message:
+            nonlocal body_received
+            if body_received:
+                return await receive()
+
+            # Collect the whole body, it may arrive in several chunks
+            chunks = []
+            while True:
+                message = await receive()
+                if message['type'] != 'http.request':
+                    return message
+
+                chunks.append(message.get('body', b''))
+                if not message.get('more_body', False):
+                    break
+
+            body_received = True
+            return {'type': 'http.request', 'body': __class__.sanitize_body(b''.join(chunks)), 'more_body': False}
 
         return await self.app(scope, sanitize_request_body, send)
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from os import path
 from starlette_context.plugins import Plugin
 from fastapi import Request
@@ -6,20 +7,38 @@ from fluent.runtime import FluentLocalization, FluentResourceLoader
 from ..defines import SUPPORTED_LOCALES, FALLBACK_LOCALE, BASE_PATH
 
 
-def get_fluent(locales: list[str]):
-    """Provides fluent's format_value function for given locales"""
-
-    # Make sure our fallback locale is always in locales
-    if FALLBACK_LOCALE not in locales:
-        locales.append(FALLBACK_LOCALE)
+@lru_cache(maxsize=64)
+def get_localization(locales: tuple[str, ...]) -> FluentLocalization:
+    """Provides a FluentLocalization for the given (normalized) locales, with all its bundles loaded and parsed.
+    These are cached, so the ftl files are only read once per process and locale list."""
 
     # Resolves to absolute appointment package path
     base_url = path.join(BASE_PATH, 'l10n')
 
     loader = FluentResourceLoader(f'{base_url}/{{locale}}')
-    fluent = FluentLocalization(locales, ['main.ftl', 'email.ftl', 'fields.ftl'], loader)
+    fluent = FluentLocalization(list(locales), ['main.ftl', 'email.ftl', 'fields.ftl'], loader)
+
+    # Bundles are otherwise created lazily by a generator, which can't be shared between threads
+    for _ in fluent._bundles():
+        pass
+
+    return fluent
+
+
+def normalize_locales(locales: list[str]) -> tuple[str, ...]:
+    """Drop any duplicate locales, and make sure our fallback locale is always in locales"""
+    return tuple(dict.fromkeys([*locales, FALLBACK_LOCALE]))
+
+
+def get_fluent(locales: list[str]):
+    """Provides fluent's format_value function for given locales"""
+    return get_localization(normalize_locales(locales)).format_value
+
 
-    return fluent.format_value
+def warm_up_fluent():
+    """Load the bundles for each supported locale ahead of the first request"""
+    for locale in SUPPORTED_LOCALES:
+        get_fluent([locale])
 
 
 class L10n(Plugin):
@@ -0,0 +1,34 @@
+"""add index on slots schedule_id, start and booking_status
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+
+from alembic import op
+from sqlalchemy import inspect
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5f6a7b8c9d0'
+down_revision = 'd4e5f6a7b8c9'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = 'ix_slots_schedule_id_start_booking_status'
+
+
+def _index_exists(connection) -> bool:
+    insp = inspect(connection)
+    return INDEX_NAME in {idx['name'] for idx in insp.get_indexes('slots')}
+
+
+def upgrade() -> None:
+    if not _index_exists(op.get_bind()):
+        op.create_index(INDEX_NAME, 'slots', ['schedule_id', 'start', 'booking_status'], unique=False)
+
+
+def downgrade() -> None:
+    if _index_exists(op.get_bind()):
+        op.drop_index(INDEX_NAME, table_name='slots')
@@ -0,0 +1,104 @@
+"""add blind index columns for encrypted lookup fields
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+from appointment.database import models
+
+# revision identifiers, used by Alembic.
+revision = 'f6a7b8c9d0e1'
+down_revision = 'e5f6a7b8c9d0'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+# table => {encrypted column: (blind index column, casefold)}
+BLIND_INDEXES = {
+    'subscribers': {'username': ('username_index', False), 'email': ('email_index', True)},
+    'schedules': {'slug': ('slug_index', False)},
+    'appointments': {'external_id': ('external_id_index', False)},
+}
+
+
+def _column_exists(connection, table, column) -> bool:
+    insp = inspect(connection)
+    cols = [c['name'] for c in insp.get_columns(table)]
+    return column in cols
+
+
+def _backfill(connection, table_name: str, columns: dict):
+    """Fill in the blind indexes of a table in batches.
+    We only describe the columns we need here, so this doesn't depend on the current state of the models."""
+    table = sa.table(
+        table_name,
+        sa.column('id', sa.Integer),
+        *[sa.column(column, models.encrypted_type(sa.String)) for column in columns],
+        *[sa.column(index_column, sa.String) for index_column, _ in columns.values()],
+    )
+    update = (
+        sa.update(table)
+        .where(table.c.id == sa.bindparam('_id'))
+        .values({index_column: sa.bindparam(index_column) for index_column, _ in columns.values()})
+    )
+
+    amount = 0
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(table.c.id, *[table.c[column] for column in columns])
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        connection.execute(
+            update,
+            [
+                {
+                    '_id': row.id,
+                    **{
+                        index_column: models.blind_index(getattr(row, column), casefold=casefold)
+                        for column, (index_column, casefold) in columns.items()
+                    },
+                }
+                for row in rows
+            ],
+        )
+
+        amount += len(rows)
+        last_id = rows[-1].id
+
+    if amount > 0:
+        print(f'[Migration=f6a7b8c9d0e1] Filled blind indexes of {amount} {table_name}.')
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+
+    for table, columns in BLIND_INDEXES.items():
+        for index_column, _ in columns.values():
+            if not _column_exists(connection, table, index_column):
+                op.add_column(table, sa.Column(index_column, sa.String(length=64), nullable=True))
+                op.create_index(op.f(f'ix_{table}_{index_column}'), table, [index_column], unique=False)
+
+        _backfill(connection, table, columns)
+
+
+def downgrade() -> None:
+    connection = op.get_bind()
+
+    for table, columns in BLIND_INDEXES.items():
+        for index_column, _ in columns.values():
+            if _column_exists(connection, table, index_column):
+                op.drop_index(op.f(f'ix_{table}_{index_column}'), table_name=table)
+                op.drop_column(table, index_column)
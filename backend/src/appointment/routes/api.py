@@ -15,6 +15,7 @@ from .. import utils
 from ..database import repo, schemas, models
 
 # authentication
+from ..controller import availability, public_link
 from ..controller.calendar import CalDavConnector, Tools, GoogleConnector
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request, Response, Query
 from ..controller.apis.google_client import GoogleClient
@@ -65,13 +66,22 @@ def session_info():
 
 @router.put('/me', response_model=schemas.SubscriberMeOut)
 def update_me(
-    data: schemas.SubscriberIn, db: Session = Depends(get_db), subscriber: Subscriber = Depends(get_subscriber)
+    data: schemas.SubscriberIn,
+    db: Session = Depends(get_db),
+    subscriber: Subscriber = Depends(get_subscriber),
+    redis=Depends(get_redis),
 ):
     """endpoint to update data of authenticated subscriber"""
     if subscriber.username != data.username and repo.subscriber.get_by_username(db, data.username):
         raise HTTPException(status_code=403, detail=l10n('username-not-available'))
 
+    username_changed = subscriber.username != data.username
     me = repo.subscriber.update(db=db, data=data, subscriber_id=subscriber.id)
+    if username_changed:
+        public_link.invalidate(redis, subscriber.id)
+    # Available slots are built from the subscriber's settings, e.g. their timezone
+    availability.invalidate_snapshots_for_subscriber(db, redis, subscriber.id)
+
     return schemas.SubscriberMeOut(
         id=me.id,
         username=me.username,
@@ -202,7 +212,9 @@ def get_my_signature(subscriber: Subscriber = Depends(get_subscriber)):
 
 
 @router.post('/me/signature')
-def refresh_signature(db: Session = Depends(get_db), subscriber: Subscriber = Depends(get_subscriber)):
+def refresh_signature(
+    db: Session = Depends(get_db), subscriber: Subscriber = Depends(get_subscriber), redis=Depends(get_redis)
+):
     """Refresh a subscriber's signed short link"""
     repo.subscriber.update(
         db,
@@ -222,6 +234,9 @@ def refresh_signature(db: Session = Depends(get_db), subscriber: Subscriber = De
         if not slug:
             logging.warning('Could not generate unique slug!')
 
+    # The old links must stop working
+    public_link.invalidate(redis, subscriber.id)
+
     return True
 
 
@@ -252,6 +267,7 @@ def update_my_calendar(
     calendar: schemas.CalendarConnection,
     db: Session = Depends(get_db),
     subscriber: Subscriber = Depends(get_subscriber),
+    redis=Depends(get_redis),
 ):
     """endpoint to update an existing calendar connection for authenticated subscriber"""
     if not repo.calendar.exists(db, calendar_id=id):
@@ -260,6 +276,8 @@ def update_my_calendar(
         raise validation.CalendarNotAuthorizedException()
 
     cal = repo.calendar.update(db=db, calendar=calendar, calendar_id=id)
+    availability.invalidate_snapshots_for_subscriber(db, redis, subscriber.id)
+
     return schemas.CalendarOut(id=cal.id, title=cal.title, color=cal.color, connected=cal.connected)
 
 
@@ -270,6 +288,7 @@ def change_my_calendar_connection(
     id: int,
     db: Session = Depends(get_db),
     subscriber: Subscriber = Depends(get_subscriber),
+    redis=Depends(get_redis),
 ):
     """endpoint to update an existing calendar connection for authenticated subscriber
     note this function handles both disconnect and connect (the double route is not a typo.)"""
@@ -285,11 +304,20 @@ def change_my_calendar_connection(
         cal = repo.calendar.update_connection(db=db, calendar_id=id, is_connected=connect)
     except HTTPException as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    # Connected calendars count towards the availability of all of the subscriber's schedules
+    availability.invalidate_snapshots_for_subscriber(db, redis, subscriber.id)
+
     return schemas.CalendarOut(id=cal.id, title=cal.title, color=cal.color, connected=cal.connected)
 
 
 @router.delete('/cal/{id}', response_model=schemas.CalendarOut)
-def delete_my_calendar(id: int, db: Session = Depends(get_db), subscriber: Subscriber = Depends(get_subscriber)):
+def delete_my_calendar(
+    id: int,
+    db: Session = Depends(get_db),
+    subscriber: Subscriber = Depends(get_subscriber),
+    redis=Depends(get_redis),
+):
     """endpoint to remove a calendar from db"""
     if not repo.calendar.exists(db, calendar_id=id):
         raise validation.CalendarNotFoundException()
@@ -297,6 +325,8 @@ def delete_my_calendar(id: int, db: Session = Depends(get_db), subscriber: Subsc
         raise validation.CalendarNotAuthorizedException()
 
     cal = repo.calendar.delete(db=db, calendar_id=id)
+    availability.invalidate_snapshots_for_subscriber(db, redis, subscriber.id)
+
     return schemas.CalendarOut(id=cal.id, title=cal.title, color=cal.color, connected=cal.connected)
 
 
@@ -506,7 +536,12 @@ def modify_my_appointment(
 
 
 @router.delete('/apmt/{id}')
-def delete_my_appointment(id: int, db: Session = Depends(get_db), subscriber: Subscriber = Depends(get_subscriber)):
+def delete_my_appointment(
+    id: int,
+    db: Session = Depends(get_db),
+    subscriber: Subscriber = Depends(get_subscriber),
+    redis=Depends(get_redis),
+):
     """endpoint to remove a appointment from db"""
     if not repo.appointment.exists(db, appointment_id=id):
         raise validation.AppointmentNotFoundException()
@@ -514,6 +549,8 @@ def delete_my_appointment(id: int, db: Session = Depends(get_db), subscriber: Su
         raise validation.AppointmentNotAuthorizedException()
 
     repo.appointment.delete(db=db, appointment_id=id)
+    # The appointment's slots no longer count as taken
+    availability.invalidate_snapshots_for_subscriber(db, redis, subscriber.id)
     return True
 
 
@@ -585,6 +622,9 @@ def cancel_my_appointment(
         slot_update = schemas.SlotUpdate(booking_status=models.BookingStatus.cancelled)
         repo.slot.update(db, slot.id, slot_update)
 
+    # The cancelled slots are available again
+    availability.invalidate_snapshots_for_subscriber(db, redis, subscriber.id)
+
     # Delete the remote calendar event
     uuid = appointment.external_id if appointment.external_id else str(appointment.uuid)
 
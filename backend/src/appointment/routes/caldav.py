@@ -12,6 +12,7 @@ from redis import Redis
 from sqlalchemy.orm import Session
 
 from appointment import utils
+from appointment.controller import availability
 from appointment.controller.apis.oidc_client import OIDCClient
 from appointment.controller.calendar import CalDavConnector, Tools
 from appointment.database import models, schemas, repo
@@ -262,6 +263,7 @@ def create_my_calendar(
     calendar: schemas.CalendarConnection,
     db: Session = Depends(get_db),
     subscriber: models.Subscriber = Depends(get_subscriber),
+    redis_client: Redis = Depends(get_redis),
 ):
     """endpoint to add a new CalDav calendar for authenticated subscriber"""
 
@@ -285,6 +287,8 @@ def create_my_calendar(
         cal = repo.calendar.create(db=db, calendar=calendar, subscriber_id=subscriber.id)
     except HTTPException as e:
         raise HTTPException(status_code=e.status_code, detail=e.detail)
+
+    availability.invalidate_snapshots_for_subscriber(db, redis_client, subscriber.id)
     return schemas.CalendarOut(id=cal.id, title=cal.title, color=cal.color, connected=cal.connected)
 
 
@@ -293,6 +297,7 @@ def disconnect_account(
     type_id: Optional[str] = None,
     db: Session = Depends(get_db),
     subscriber: models.Subscriber = Depends(get_subscriber),
+    redis_client: Redis = Depends(get_redis),
 ):
     """Disconnects a caldav account. Removes associated data from our services and deletes the connection details."""
     ec = utils.list_first(
@@ -318,6 +323,7 @@ def disconnect_account(
     repo.calendar.delete_by_subscriber_and_provider(
         db, subscriber.id, provider=models.CalendarProvider.caldav, user=user
     )
+    availability.invalidate_snapshots_for_subscriber(db, redis_client, subscriber.id)
 
     # Remove their account details
     repo.external_connection.delete_by_type(db, subscriber.id, ec.type, ec.type_id)
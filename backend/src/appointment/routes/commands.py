@@ -63,9 +63,9 @@ def renew_channels():
 
 
 @router.command('backfill-google-channels')
-def backfill_channels():
+def backfill_channels(restart: bool = typer.Option(False, help='Ignore the checkpoint of a previous run.')):
     try:
         with cron_lock('backfill_google_channels'):
-            backfill_google_channels.run()
+            backfill_google_channels.run(restart=restart)
     except FileExistsError:
         print('backfill-google-channels is already running, skipping.')
@@ -3,13 +3,14 @@ import os
 from fastapi import APIRouter, Depends, Request
 from fastapi.responses import RedirectResponse
 
+from ..controller import availability
 from ..controller.apis.google_client import GoogleClient
 from ..controller.google_watch import teardown_watch_channels_for_connection
 from ..database import repo, schemas, models
 from sqlalchemy.orm import Session
 
 from ..dependencies.auth import get_subscriber
-from ..dependencies.database import get_db
+from ..dependencies.database import get_db, get_redis
 
 from ..database.models import Subscriber, ExternalConnectionType
 from ..dependencies.google import get_google_client
@@ -157,6 +158,7 @@ def disconnect_account(
     request_body: schemas.DisconnectGoogleAccountRequest,
     db: Session = Depends(get_db),
     subscriber: Subscriber = Depends(get_subscriber),
+    redis=Depends(get_redis),
 ):
     """Disconnects a google account. Removes associated data from our services and deletes the connection details."""
     google_connection = subscriber.get_external_connection(ExternalConnectionType.google, request_body.type_id)
@@ -175,6 +177,7 @@ def disconnect_account(
     repo.calendar.delete_by_subscriber_and_provider(
         db, subscriber.id, provider=models.CalendarProvider.google, external_connection_id=google_connection.id
     )
+    availability.invalidate_snapshots_for_subscriber(db, redis, subscriber.id)
 
     # Unassociated any secondary emails if they're attached to their google connection
     if subscriber.secondary_email == google_connection.name.lower():
@@ -6,7 +6,7 @@ import zoneinfo
 from sentry_sdk import capture_exception
 from sqlalchemy.orm import Session
 
-from ..controller import zoom
+from ..controller import availability, public_link, zoom
 from ..controller.calendar import CalDavConnector, Tools, GoogleConnector
 from ..controller.apis.google_client import GoogleClient, SendUpdates
 from ..controller.google_watch import setup_watch_channel, teardown_watch_channel
@@ -21,7 +21,8 @@ from ..database.models import (
     ExternalConnectionType,
 )
 from ..database.schemas import ExternalConnection
-from ..dependencies.auth import get_subscriber, get_subscriber_from_schedule_or_signed_url
+from ..controller.public_link import PublicLink
+from ..dependencies.auth import get_subscriber, get_public_link
 from ..dependencies.database import get_db, get_redis
 from ..dependencies.google import get_google_client
 from datetime import datetime, timedelta, timezone
@@ -131,6 +132,7 @@ def create_calendar_schedule(
     schedule: schemas.ScheduleValidationIn,
     db: Session = Depends(get_db),
     subscriber: Subscriber = Depends(get_subscriber),
+    redis=Depends(get_redis),
     google_client: GoogleClient = Depends(get_google_client),
 ):
     """endpoint to add a new schedule for a given calendar"""
@@ -154,6 +156,9 @@ def create_calendar_schedule(
             repo.schedule.hard_delete(db, db_schedule.id)
             raise validation.ScheduleCreationException()
 
+    # A first schedule changes what the subscriber's links resolve to
+    public_link.invalidate(redis, subscriber.id)
+
     if os.getenv('GOOGLE_INVITE_ENABLED') == 'True':
         _sync_watch_channels(db, google_client, subscriber, schedule.calendar_id)
 
@@ -188,6 +193,7 @@ def update_schedule(
     schedule: schemas.ScheduleValidationIn,
     db: Session = Depends(get_db),
     subscriber: Subscriber = Depends(get_subscriber),
+    redis=Depends(get_redis),
     google_client: GoogleClient = Depends(get_google_client),
 ):
     """endpoint to update an existing schedule for authenticated subscriber"""
@@ -216,6 +222,8 @@ def update_schedule(
         raise validation.ScheduleSlugTakenException()
 
     result = repo.schedule.update(db=db, schedule=schedule, schedule_id=id)
+    availability.invalidate_snapshot(redis, id)
+    public_link.invalidate(redis, subscriber.id)
 
     if os.getenv('GOOGLE_INVITE_ENABLED') == 'True':
         _sync_watch_channels(db, google_client, subscriber, schedule.calendar_id)
@@ -259,21 +267,20 @@ def _sync_watch_channels(db: Session, google_client: GoogleClient, subscriber: S
 @limiter.limit('20/minute')
 def read_schedule_availabilities(
     request: Request,
-    subscriber: Subscriber = Depends(get_subscriber_from_schedule_or_signed_url),
+    link: PublicLink = Depends(get_public_link),
     db: Session = Depends(get_db),
     redis=Depends(get_redis),
     google_client: GoogleClient = Depends(get_google_client),
 ):
     """Returns the calculated availability for the first schedule from a subscribers public profile link"""
+    subscriber, schedule = link
+
     # Raise a schedule not found exception if the schedule owner does not have a timezone set.
     if subscriber.timezone is None:
         raise validation.ScheduleNotFoundException()
 
-    schedules = repo.schedule.get_by_subscriber(db, subscriber_id=subscriber.id)
-
-    try:
-        schedule = schedules[0]  # for now we only process the first existing schedule
-    except IndexError:
+    # for now we only process the first existing schedule
+    if schedule is None:
         raise validation.ScheduleNotActive()
 
     # check if schedule is enabled
@@ -289,25 +296,18 @@ def read_schedule_availabilities(
     if not calendars or len(calendars) == 0:
         raise validation.CalendarNotFoundException()
 
-    # calculate theoretically possible slots from schedule config
-    available_slots = Tools.available_slots_from_schedule(schedule)
-
-    # get all events from all connected calendars in scheduled date range
-    existing_slots = []
-
-    try:
-        existing_slots = Tools.existing_events_for_schedule(schedule, calendars, subscriber, google_client, db, redis)
-    except Exception:
-        raise RemoteCalendarConnectionError()
-
-    actual_slots = Tools.events_roll_up_difference(available_slots, existing_slots)
+    # calculated slots come from the schedule's availability snapshot if we have a recent one
+    actual_slots = availability.get_available_slots(schedule, calendars, subscriber, google_client, db, redis)
 
     if not actual_slots or len(actual_slots) == 0:
         raise validation.SlotNotFoundException()
 
-    # Transform actual_slots (SlotBase) to SlotOut objects
-    # To filter out sensitive fields like meeting_link_id / meeting_link_url
-    slot_outs = [schemas.SlotOut(**slot.model_dump(), id=getattr(slot, 'id', None)) for slot in actual_slots]
+    # Only now build the outgoing SlotOut objects, these don't carry sensitive fields like meeting_link_id / url
+    owner_timezone = zoneinfo.ZoneInfo(schedule.calendar.owner.timezone)
+    slot_outs = [
+        schemas.SlotOut(start=datetime.fromtimestamp(start, owner_timezone), duration=duration, booking_status=status)
+        for start, duration, status in actual_slots
+    ]
 
     # TODO: dedicate an own schema to this endpoint
     return schemas.AppointmentOut(
@@ -327,22 +327,20 @@ def request_schedule_availability_slot(
     request: Request,
     s_a: schemas.AvailabilitySlotAttendee,
     background_tasks: BackgroundTasks,
-    subscriber: Subscriber = Depends(get_subscriber_from_schedule_or_signed_url),
+    link: PublicLink = Depends(get_public_link),
     db: Session = Depends(get_db),
     redis=Depends(get_redis),
     google_client=Depends(get_google_client),
 ):
     """endpoint to request a time slot for a schedule via public link and send confirmation mail to owner if set"""
+    subscriber, schedule = link
 
     # Raise a schedule not found exception if the schedule owner does not have a timezone set.
     if subscriber.timezone is None:
         raise validation.ScheduleNotFoundException()
 
-    schedules = repo.schedule.get_by_subscriber(db, subscriber_id=subscriber.id)
-
-    try:
-        schedule = schedules[0]  # for now we only process the first existing schedule
-    except IndexError:
+    # for now we only process the first existing schedule
+    if schedule is None:
         raise validation.ScheduleNotFoundException()
 
     # check if schedule is enabled
@@ -419,9 +417,12 @@ def request_schedule_availability_slot(
     # Ok we need to clear the cache for all calendars, because we need to recheck them.
     con.bust_cached_events(True)
     calendars = repo.calendar.get_by_subscriber(db, subscriber.id, False)
-    existing_remote_events = Tools.existing_events_for_schedule(
+    existing_remote_events, degraded = Tools.existing_events_for_schedule(
         schedule, calendars, subscriber, google_client, db, redis
     )
+    # A remote calendar didn't answer in time, we can't tell whether the slot is still free
+    if degraded:
+        raise RemoteCalendarConnectionError()
     has_collision = Tools.events_roll_up_difference([slot], existing_remote_events)
     # If we only have booked entries in this list then it means our slot is not available.
     if all(evt.booking_status == BookingStatus.booked for evt in has_collision):
@@ -542,6 +543,9 @@ def request_schedule_availability_slot(
                 lang=subscriber.language,
             )
 
+        # The requested slot is no longer available, and the booking counts towards all of the subscriber's schedules
+        availability.invalidate_snapshots_for_subscriber(db, redis, subscriber.id)
+
         # Mini version of slot, so we can grab the newly created slot id for tests
         return schemas.SlotOut(
             id=slot.id,
@@ -608,6 +612,7 @@ def decide_on_schedule_availability_slot(
     handle_schedule_availability_decision(
         data.confirmed, calendar, schedule, subscriber, slot, db, redis, google_client, background_tasks
     )
+    availability.invalidate_snapshots_for_subscriber(db, redis, subscriber.id)
 
     return schemas.AvailabilitySlotAttendee(
         slot=schemas.SlotBase(start=slot.start, duration=slot.duration),
@@ -2,14 +2,14 @@ import logging
 
 import sentry_sdk
 from fastapi import APIRouter, Depends, Request, Response
+from redis import Redis, RedisCluster
 from sqlalchemy.orm import Session
 
 from ..controller import zoom
-from ..controller.google_watch import teardown_watch_channel
+from ..controller.google_watch import queue_calendar_sync, teardown_watch_channel
 from ..database import repo
-from ..dependencies.database import get_db
+from ..dependencies.database import get_db, get_redis
 from ..dependencies.zoom import get_webhook_auth as get_webhook_auth_zoom
-from ..tasks.google import sync_google_calendar_changes
 
 router = APIRouter()
 
@@ -41,13 +41,15 @@ def zoom_deauthorization(
 def google_calendar_notification(
     request: Request,
     db: Session = Depends(get_db),
+    redis_instance: Redis | RedisCluster | None = Depends(get_redis),
 ):
     """Webhook endpoint for Google Calendar push notifications.
     Google sends a POST here whenever events change on a watched calendar.
 
     Returns 200 immediately and defers all Google API work to a celery
     task so we stay within Google's expected response window and avoid
-    duplicate deliveries from retries.
+    duplicate deliveries from retries. Bursts of notifications for a
+    channel are coalesced into a single sync.
     """
     channel_id = request.headers.get('X-Goog-Channel-Id')
     resource_state = request.headers.get('X-Goog-Resource-State')
@@ -76,6 +78,6 @@ def google_calendar_notification(
         teardown_watch_channel(db, calendar)
         return success_response
 
-    sync_google_calendar_changes.delay(channel_id)
+    queue_calendar_sync(redis_instance, channel_id)
 
     return success_response
@@ -1,2 +1,4 @@
 from appointment.tasks.health import *  # noqa: F401,F403
 from appointment.tasks.google import *  # noqa: F401,F403
+from appointment.tasks.availability import *  # noqa: F401,F403
+from appointment.tasks.emails import *  # noqa: F401,F403
@@ -0,0 +1,35 @@
+import logging
+
+from appointment.celery_app import celery
+from appointment.database import repo
+from appointment.dependencies.database import get_engine_and_session, get_redis
+from appointment.dependencies.google import get_google_client
+
+log = logging.getLogger(__name__)
+
+
+@celery.task
+def refresh_availability_snapshot(schedule_id: int):
+    """Re-calculate a schedule's availability snapshot before the current one expires."""
+    # Imported here, as the calendar controller imports our email tasks
+    from appointment.controller import availability
+
+    redis_instance = get_redis()
+    if redis_instance is None:
+        return
+
+    _, SessionLocal = get_engine_and_session()
+    db = SessionLocal()
+
+    try:
+        schedule = repo.schedule.get(db, schedule_id)
+        if not schedule or not schedule.active or not schedule.calendar or not schedule.calendar.connected:
+            log.info(f'[tasks.availability] Schedule {schedule_id} is not available, skipping refresh')
+            return
+
+        subscriber = schedule.calendar.owner
+        calendars = repo.calendar.get_by_subscriber(db, subscriber.id, False)
+
+        availability.refresh_snapshot(schedule, calendars, subscriber, get_google_client(), db, redis_instance)
+    finally:
+        db.close()
@@ -1,10 +1,21 @@
+"""Email tasks.
+
+The web tier only enqueues emails onto the mail queue, a Celery worker renders and delivers them
+(re-using its pooled SMTP connections), and retries with backoff if the SMTP server is unavailable.
+"""
+
 import logging
 import os
+import smtplib
 import traceback
+import zoneinfo
+from datetime import datetime
 
 import sentry_sdk
 
+from appointment.celery_app import celery
 from appointment.controller.mailer import (
+    Attachment,
     PendingRequestMail,
     ConfirmationMail,
     InvitationMail,
@@ -13,17 +24,120 @@ from appointment.controller.mailer import (
     NewBookingMail,
     CancelMail,
 )
-from appointment.defines import APP_ENV_DEV
+from appointment.defines import APP_ENV_DEV, FALLBACK_LOCALE, MAIL_QUEUE
 
+log = logging.getLogger(__name__)
 
-def send_invite_email(owner_name, owner_email, date, duration, to, attachment, lang, meeting_link_url=None):
+
+def _dump_kwargs(kwargs: dict) -> dict:
+    """Turn the email arguments into something our json task serializer can handle.
+    Dates keep their timezone's name, so emails can still display e.g. CEST instead of UTC+02:00."""
+    dumped = {}
+    for key, value in kwargs.items():
+        if isinstance(value, datetime):
+            value = {'datetime': value.isoformat(), 'timezone': getattr(value.tzinfo, 'key', None)}
+        elif isinstance(value, Attachment):
+            value = {
+                'attachment': [value.mime_main, value.mime_sub],
+                'filename': value.filename,
+                'data': value.data,
+            }
+        dumped[key] = value
+    return dumped
+
+
+def _load_kwargs(kwargs: dict) -> dict:
+    loaded = {}
+    for key, value in kwargs.items():
+        if isinstance(value, dict) and 'datetime' in value:
+            date = datetime.fromisoformat(value['datetime'])
+            value = date.astimezone(zoneinfo.ZoneInfo(value['timezone'])) if value['timezone'] else date
+        elif isinstance(value, dict) and 'attachment' in value:
+            value = Attachment(mime=tuple(value['attachment']), filename=value['filename'], data=value['data'])
+        loaded[key] = value
+    return loaded
+
+
+def _is_transient(ex: Exception) -> bool:
+    """Whether trying again later might get this email delivered"""
+    if isinstance(ex, smtplib.SMTPResponseException):
+        # 4xx replies are temporary failures, 5xx are permanent
+        return 400 <= ex.smtp_code < 500
+    return isinstance(ex, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError))
+
+
+def _build_invite_email(owner_name, owner_email, date, duration, to, attachment, lang, meeting_link_url=None):
+    return InvitationMail(
+        name=owner_name, email=owner_email, date=date, duration=duration,
+        to=to, attachments=[attachment], lang=lang, meeting_link_url=meeting_link_url,
+    )
+
+
+def _build_confirmation_email(url, attendee_name, attendee_email, date, duration, to, schedule_name, lang):
+    # confirmation mail to owner
+    return ConfirmationMail(
+        f'{url}/1', f'{url}/0', attendee_name, attendee_email, date, duration, schedule_name, to=to, lang=lang
+    )
+
+
+def _build_new_booking_email(name, email, date, duration, to, schedule_name, lang):
+    # notice mail to owner
+    return NewBookingMail(name, email, date, duration, schedule_name, to=to, lang=lang)
+
+
+def _build_pending_email(owner_name, date, duration, to, attachment, lang):
+    return PendingRequestMail(
+        owner_name=owner_name, date=date, duration=duration, to=to, attachments=[attachment], lang=lang,
+    )
+
+
+def _build_cancel_email(owner_name, date, duration, to, attachment, lang):
+    return CancelMail(
+        owner_name=owner_name, date=date, duration=duration, to=to, attachments=[attachment], lang=lang,
+    )
+
+
+def _build_rejection_email(owner_name, date, duration, to, attachment, lang):
+    return RejectionMail(
+        owner_name=owner_name, date=date, duration=duration, to=to, attachments=[attachment], lang=lang,
+    )
+
+
+def _build_zoom_meeting_failed_email(to, appointment_title, lang):
+    return ZoomMeetingFailedMail(to=to, appointment_title=appointment_title, lang=lang)
+
+
+MAIL_BUILDERS = {
+    'invite': _build_invite_email,
+    'confirmation': _build_confirmation_email,
+    'new_booking': _build_new_booking_email,
+    'pending': _build_pending_email,
+    'cancel': _build_cancel_email,
+    'rejection': _build_rejection_email,
+    'zoom_meeting_failed': _build_zoom_meeting_failed_email,
+}
+
+
+@celery.task(
+    bind=True,
+    queue=MAIL_QUEUE,
+    rate_limit=os.getenv('MAIL_RATE_LIMIT') or None,
+    max_retries=int(os.getenv('MAIL_MAX_RETRIES', 5)),
+    acks_late=True,
+    ignore_result=True,
+)
+def deliver_email(self, kind: str, kwargs: dict):
+    """Render and send an email enqueued by one of the send_*_email functions"""
     try:
-        mail = InvitationMail(
-            name=owner_name, email=owner_email, date=date, duration=duration,
-            to=to, attachments=[attachment], lang=lang, meeting_link_url=meeting_link_url,
-        )
+        mail = MAIL_BUILDERS[kind](**_load_kwargs(kwargs))
         mail.send()
     except Exception as e:
+        if _is_transient(e) and self.request.retries < self.max_retries:
+            # Back off exponentially: 30s, 60s, 120s, ...
+            countdown = int(os.getenv('MAIL_RETRY_BACKOFF_SECONDS', 30)) * 2**self.request.retries
+            log.warning(f'[tasks.emails] Could not deliver {kind} email, retrying in {countdown}s: {e}')
+            raise self.retry(exc=e, countdown=countdown)
+
         if os.getenv('APP_ENV') == APP_ENV_DEV:
             logging.error('[tasks.emails] An exception has occurred: ', e)
             traceback.print_exc()
@@ -31,83 +145,68 @@ def send_invite_email(owner_name, owner_email, date, duration, to, attachment, l
             sentry_sdk.capture_exception(e)
 
 
-def send_confirmation_email(url, attendee_name, attendee_email, date, duration, to, schedule_name, lang):
-    # send confirmation mail to owner
+def enqueue_email(kind: str, **kwargs):
+    """Put an email on the mail queue, a worker will deliver it"""
+    # There's no request to take the language from on the worker
+    if 'lang' in kwargs and kwargs['lang'] is None:
+        kwargs['lang'] = FALLBACK_LOCALE
+
     try:
-        mail = ConfirmationMail(
-            f'{url}/1', f'{url}/0', attendee_name, attendee_email, date, duration, schedule_name, to=to, lang=lang
+        deliver_email.apply_async(
+            args=(kind, _dump_kwargs(kwargs)),
+            queue=MAIL_QUEUE,
+            # Don't hold up the web worker for long if the broker is unavailable
+            retry_policy={'max_retries': 2, 'interval_start': 0, 'interval_step': 0.2, 'interval_max': 0.5},
         )
-        mail.send()
     except Exception as e:
-        if os.getenv('APP_ENV') == APP_ENV_DEV:
-            logging.error('[tasks.emails] An exception has occurred: ', e)
-            traceback.print_exc()
+        logging.error(f'[tasks.emails] Could not enqueue {kind} email: {e}')
         if os.getenv('SENTRY_DSN'):
             sentry_sdk.capture_exception(e)
 
 
+def send_invite_email(owner_name, owner_email, date, duration, to, attachment, lang, meeting_link_url=None):
+    enqueue_email(
+        'invite',
+        owner_name=owner_name, owner_email=owner_email, date=date, duration=duration,
+        to=to, attachment=attachment, lang=lang, meeting_link_url=meeting_link_url,
+    )
+
+
+def send_confirmation_email(url, attendee_name, attendee_email, date, duration, to, schedule_name, lang):
+    enqueue_email(
+        'confirmation',
+        url=url, attendee_name=attendee_name, attendee_email=attendee_email, date=date, duration=duration,
+        to=to, schedule_name=schedule_name, lang=lang,
+    )
+
+
 def send_new_booking_email(name, email, date, duration, to, schedule_name, lang):
-    # send notice mail to owner
-    try:
-        mail = NewBookingMail(name, email, date, duration, schedule_name, to=to, lang=lang)
-        mail.send()
-    except Exception as e:
-        if os.getenv('APP_ENV') == APP_ENV_DEV:
-            logging.error('[tasks.emails] An exception has occurred: ', e)
-            traceback.print_exc()
-        if os.getenv('SENTRY_DSN'):
-            sentry_sdk.capture_exception(e)
+    enqueue_email(
+        'new_booking',
+        name=name, email=email, date=date, duration=duration, to=to, schedule_name=schedule_name, lang=lang,
+    )
 
 
 def send_pending_email(owner_name, date, duration, to, attachment, lang):
-    try:
-        mail = PendingRequestMail(
-            owner_name=owner_name, date=date, duration=duration, to=to, attachments=[attachment], lang=lang,
-        )
-        mail.send()
-    except Exception as e:
-        if os.getenv('APP_ENV') == APP_ENV_DEV:
-            logging.error('[tasks.emails] An exception has occurred: ', e)
-            traceback.print_exc()
-        if os.getenv('SENTRY_DSN'):
-            sentry_sdk.capture_exception(e)
+    enqueue_email(
+        'pending',
+        owner_name=owner_name, date=date, duration=duration, to=to, attachment=attachment, lang=lang,
+    )
 
 
 def send_cancel_email(owner_name, date, duration, to, attachment, lang):
-    try:
-        mail = CancelMail(
-            owner_name=owner_name, date=date, duration=duration, to=to, attachments=[attachment], lang=lang,
-        )
-        mail.send()
-    except Exception as e:
-        if os.getenv('APP_ENV') == APP_ENV_DEV:
-            logging.error('[tasks.emails] An exception has occurred: ', e)
-            traceback.print_exc()
-        if os.getenv('SENTRY_DSN'):
-            sentry_sdk.capture_exception(e)
+    enqueue_email(
+        'cancel',
+        owner_name=owner_name, date=date, duration=duration, to=to, attachment=attachment, lang=lang,
+    )
 
 
 def send_rejection_email(owner_name, date, duration, to, attachment, lang):
-    try:
-        mail = RejectionMail(
-            owner_name=owner_name, date=date, duration=duration, to=to, attachments=[attachment], lang=lang,
-        )
-        mail.send()
-    except Exception as e:
-        if os.getenv('APP_ENV') == APP_ENV_DEV:
-            logging.error('[tasks.emails] An exception has occurred: ', e)
-            traceback.print_exc()
-        if os.getenv('SENTRY_DSN'):
-            sentry_sdk.capture_exception(e)
+    enqueue_email(
+        'rejection',
+        owner_name=owner_name, date=date, duration=duration, to=to, attachment=attachment, lang=lang,
+    )
 
 
 def send_zoom_meeting_failed_email(to, appointment_title, lang):
-    try:
-        mail = ZoomMeetingFailedMail(to=to, appointment_title=appointment_title, lang=lang)
-        mail.send()
-    except Exception as e:
-        if os.getenv('APP_ENV') == APP_ENV_DEV:
-            logging.error('[tasks.emails] An exception has occurred: ', e)
-            traceback.print_exc()
-        if os.getenv('SENTRY_DSN'):
-            sentry_sdk.capture_exception(e)
+    enqueue_email('zoom_meeting_failed', to=to, appointment_title=appointment_title, lang=lang)
@@ -8,10 +8,10 @@ from sqlalchemy.orm import Session
 from appointment.celery_app import celery
 from appointment.controller.apis.google_client import EventStatus, GoogleClient, ResponseStatus, SendUpdates
 from appointment.controller import zoom
-from appointment.database import repo, models, schemas
+from appointment.database import repo, models
 from appointment.database.models import MeetingLinkProviderType
 from appointment.defines import FALLBACK_LOCALE
-from appointment.dependencies.database import get_engine_and_session
+from appointment.dependencies.database import get_engine_and_session, get_redis
 from appointment.dependencies.google import get_google_client
 from appointment.l10n import l10n
 
@@ -59,8 +59,24 @@ def sync_google_calendar_changes(self, channel_id: str):
 
     Called by the webhook handler after lightweight validation.  Handles sync
     token management, event fetching via the Google API, and event processing
-    with automatic retries on transient failures.
+    with automatic retries on transient failures.  Only one sync per channel
+    runs at a time, so they don't race on the channel's sync token.
     """
+    from appointment.controller.google_watch import calendar_sync_lock, queue_calendar_sync
+
+    redis = get_redis()
+
+    with calendar_sync_lock(redis, channel_id) as locked:
+        if not locked:
+            # Another sync of this channel is still running, follow up on its changes once it's done
+            log.info(f'[tasks.google] Channel {channel_id} is already syncing, queueing another sync')
+            queue_calendar_sync(redis, channel_id)
+            return
+
+        _sync_channel_changes(channel_id, redis)
+
+
+def _sync_channel_changes(channel_id: str, redis):
     google_client = get_google_client()
 
     _, SessionLocal = get_engine_and_session()
@@ -101,76 +117,200 @@ def sync_google_calendar_changes(self, channel_id: str):
                 repo.google_calendar_channel.update_sync_token(db, channel, fresh_token)
             return
 
-        if new_sync_token:
-            repo.google_calendar_channel.update_sync_token(db, channel, new_sync_token)
-
         if changed_events:
             _process_changed_events(
                 db, calendar.id, changed_events, google_client, google_token, calendar.user
             )
+
+            # Busy times have changed, so any cached busy times and availability snapshots of the calendar's owner
+            # are outdated
+            from appointment.controller import availability
+            from appointment.controller.calendar import GoogleConnector
+
+            GoogleConnector(
+                subscriber_id=calendar.owner_id,
+                calendar_id=calendar.id,
+                redis_instance=redis,
+                db=db,
+                remote_calendar_id=calendar.user,
+                google_client=google_client,
+            ).bust_cached_events(all_calendars=True)
+            availability.invalidate_snapshots_for_subscriber(db, redis, calendar.owner_id)
+
+        # Only move on once the changes are committed, a failed sync is retried from the same token
+        if new_sync_token:
+            repo.google_calendar_channel.update_sync_token(db, channel, new_sync_token)
     finally:
         db.close()
 
 
+class EventFollowUps:
+    """Google Calendar requests that follow up on changed events. They are collected while the events' state changes
+    are applied, and sent once those are committed, in batch requests if there's more than one."""
+
+    def __init__(self, google_client: GoogleClient, google_token, remote_calendar_id: str):
+        self.google_client = google_client
+        self.google_token = google_token
+        self.remote_calendar_id = remote_calendar_id
+        # (event id, patch body) of events to confirm, we need their current attendees before patching
+        self.confirms: list[tuple[str, dict]] = []
+        # (event id, send updates) of events to delete
+        self.deletes: list[tuple[str, SendUpdates]] = []
+
+    def confirm(self, event_id: str, body: dict):
+        self.confirms.append((event_id, body))
+
+    def delete(self, event_id: str, send_updates: SendUpdates = SendUpdates.NONE):
+        self.deletes.append((event_id, send_updates))
+
+    @staticmethod
+    def _accept_attendees(body: dict, remote_event: dict | None):
+        """Keep the event's attendees, marking the subscriber as accepted"""
+        if remote_event and remote_event.get('attendees'):
+            for att in remote_event.get('attendees', []):
+                if att.get('self'):
+                    att['responseStatus'] = ResponseStatus.ACCEPTED
+            body['attendees'] = remote_event['attendees']
+
+    def _send_each(self):
+        for event_id, body in self.confirms:
+            try:
+                remote_event = self.google_client.get_event(self.remote_calendar_id, event_id, self.google_token)
+                self._accept_attendees(body, remote_event)
+                self.google_client.patch_event(self.remote_calendar_id, event_id, body, self.google_token)
+            except Exception:
+                log.warning('[tasks.google] Failed to confirm event in Google')
+
+        for event_id, send_updates in self.deletes:
+            try:
+                self.google_client.delete_event(
+                    self.remote_calendar_id, event_id, self.google_token, send_updates=send_updates,
+                )
+            except Exception:
+                log.warning('[tasks.google] Failed to delete declined event from Google')
+
+    def _send_batched(self):
+        remote_events = {}
+        if self.confirms:
+            try:
+                remote_events = self.google_client.get_events(
+                    self.remote_calendar_id, [event_id for event_id, _ in self.confirms], self.google_token,
+                )
+            except Exception:
+                log.warning('[tasks.google] Failed to retrieve events to confirm from Google')
+
+        patches = []
+        for event_id, body in self.confirms:
+            self._accept_attendees(body, remote_events.get(event_id))
+            patches.append((event_id, body, SendUpdates.ALL))
+
+        try:
+            errors = self.google_client.update_events(
+                self.remote_calendar_id, patches, self.deletes, self.google_token,
+            )
+        except Exception:
+            log.warning('[tasks.google] Failed to send event updates to Google')
+            return
+
+        failed_confirms = sum(1 for error in errors[: len(patches)] if error)
+        failed_deletes = sum(1 for error in errors[len(patches) :] if error)
+        if failed_confirms:
+            log.warning(f'[tasks.google] Failed to confirm {failed_confirms} event(s) in Google')
+        if failed_deletes:
+            log.warning(f'[tasks.google] Failed to delete {failed_deletes} declined event(s) from Google')
+
+    def send(self):
+        """Send the collected requests. Failures are logged, the changes on our side are already committed."""
+        if len(self.confirms) + len(self.deletes) > 1:
+            self._send_batched()
+        else:
+            self._send_each()
+
+        self.confirms = []
+        self.deletes = []
+
+
 def _process_changed_events(
     db, calendar_id: int, changed_events: list[dict],
     google_client: GoogleClient, google_token, remote_calendar_id: str,
 ):
-    """Walk through changed events and dispatch to the appropriate RSVP / cancellation handler."""
-    for event in changed_events:
-        google_event_id = event.get('id')
-        if not google_event_id:
-            continue
-
-        appointment = repo.appointment.get_by_calendar_and_external_id(db, calendar_id, google_event_id)
-        if not appointment:
-            continue
-
-        slot = appointment.slots[0] if appointment.slots else None
-        if not slot or not slot.attendee:
-            continue
-
-        if event.get('status') == EventStatus.CANCELLED:
-            _handle_event_cancelled(db, appointment, slot)
-            continue
-
-        attendees = event.get('attendees', [])
-        if not attendees:
-            continue
-
-        self_attendee = next((a for a in attendees if a.get('self')), None)
-        if self_attendee:
-            _handle_subscriber_rsvp(
-                db, appointment, slot, self_attendee.get('responseStatus'),
-                google_client, google_token, remote_calendar_id,
+    """Walk through changed events and dispatch to the appropriate RSVP / cancellation handler.
+    The resulting state changes are committed together, and any Google Calendar follow-ups sent afterwards."""
+    google_event_ids = [event.get('id') for event in changed_events if event.get('id')]
+    appointments = repo.appointment.get_by_calendar_and_external_ids(db, calendar_id, google_event_ids)
+    if not appointments:
+        return
+
+    follow_ups = EventFollowUps(google_client, google_token, remote_calendar_id)
+
+    try:
+        for event in changed_events:
+            appointment = appointments.get(event.get('id'))
+            if not appointment:
+                continue
+
+            slot = appointment.slots[0] if appointment.slots else None
+            if not slot or not slot.attendee:
+                continue
+
+            if event.get('status') == EventStatus.CANCELLED:
+                _handle_event_cancelled(db, appointment, slot, follow_ups=follow_ups)
+                continue
+
+            attendees = event.get('attendees', [])
+            if not attendees:
+                continue
+
+            self_attendee = next((a for a in attendees if a.get('self')), None)
+            if self_attendee:
+                _handle_subscriber_rsvp(
+                    db, appointment, slot, self_attendee.get('responseStatus'),
+                    google_client, google_token, remote_calendar_id, follow_ups=follow_ups,
+                )
+
+            attendee_email = slot.attendee.email.lower()
+            google_attendee = next(
+                (a for a in attendees if a.get('email', '').lower() == attendee_email),
+                None,
             )
+            if not google_attendee:
+                continue
 
-        attendee_email = slot.attendee.email.lower()
-        google_attendee = next(
-            (a for a in attendees if a.get('email', '').lower() == attendee_email),
-            None,
-        )
-        if not google_attendee:
-            continue
+            response_status = google_attendee.get('responseStatus')
+            _handle_bookee_rsvp(
+                db, appointment, slot, response_status, google_client, google_token, remote_calendar_id,
+                follow_ups=follow_ups,
+            )
 
-        response_status = google_attendee.get('responseStatus')
-        _handle_bookee_rsvp(
-            db, appointment, slot, response_status, google_client, google_token, remote_calendar_id
-        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    follow_ups.send()
 
 
+def _finish_standalone(db: Session, follow_ups: EventFollowUps | None):
+    """A handler called on its own (and not from _process_changed_events) commits and follows up right away"""
+    db.commit()
+    if follow_ups:
+        follow_ups.send()
+
 
 def _handle_event_cancelled(
     db: Session,
     appointment: models.Appointment,
     slot: models.Slot,
+    follow_ups: EventFollowUps | None = None,
 ):
     """Handle a Google Calendar event that was deleted/cancelled by the subscriber."""
     if slot.booking_status not in (models.BookingStatus.requested, models.BookingStatus.booked):
         return
 
-    slot_update = schemas.SlotUpdate(booking_status=models.BookingStatus.cancelled)
-    repo.slot.update(db, slot.id, slot_update)
+    slot.booking_status = models.BookingStatus.cancelled
+
+    if follow_ups is None:
+        _finish_standalone(db, None)
 
     log.info(
         f'[tasks.google] Event cancelled for appointment {appointment.id}, '
@@ -186,8 +326,13 @@ def _handle_subscriber_rsvp(
     google_client: GoogleClient,
     google_token,
     remote_calendar_id: str,
+    follow_ups: EventFollowUps | None = None,
 ):
     """React to the subscriber (calendar owner) accepting/declining via Google Calendar."""
+    standalone = follow_ups is None
+    if standalone:
+        follow_ups = EventFollowUps(google_client, google_token, remote_calendar_id)
+
     if response_status == ResponseStatus.ACCEPTED:
         if (
             appointment.status != models.AppointmentStatus.opened
@@ -195,19 +340,20 @@ def _handle_subscriber_rsvp(
         ):
             return
 
-        repo.appointment.update_status(db, appointment.id, models.AppointmentStatus.closed)
-        repo.slot.book(db, slot.id)
+        appointment.status = models.AppointmentStatus.closed
+        slot.booking_status = models.BookingStatus.booked
 
         if appointment.external_id:
             from appointment.controller.calendar import Tools
 
             subscriber = appointment.calendar.owner
             title = Tools.default_event_title(slot, subscriber)
-            repo.appointment.update_title(db, appointment.id, title)
+            appointment.title = title
 
             location_url = appointment.location_url
             if appointment.meeting_link_provider == MeetingLinkProviderType.zoom:
-                location_url = zoom.create_meeting_link(db, slot, subscriber, title) or location_url
+                # Committed along with the rest of the event's changes
+                location_url = zoom.create_meeting_link(db, slot, subscriber, title, commit=False) or location_url
 
             owner_lang = subscriber.language if subscriber.language else FALLBACK_LOCALE
             body = {'status': EventStatus.CONFIRMED, 'summary': title}
@@ -221,19 +367,10 @@ def _handle_subscriber_rsvp(
 
             body['description'] = '\n'.join(description)
 
-            try:
-                remote_event = google_client.get_event(remote_calendar_id, appointment.external_id, google_token)
-                if remote_event and remote_event.get('attendees'):
-                    for att in remote_event.get('attendees', []):
-                        if att.get('self'):
-                            att['responseStatus'] = ResponseStatus.ACCEPTED
-                    body['attendees'] = remote_event['attendees']
-
-                google_client.patch_event(
-                    remote_calendar_id, appointment.external_id, body, google_token,
-                )
-            except Exception:
-                log.warning('[tasks.google] Failed to confirm event in Google')
+            follow_ups.confirm(appointment.external_id, body)
+
+        if standalone:
+            _finish_standalone(db, follow_ups)
 
         log.info(
             f'[tasks.google] Subscriber confirmed appointment {appointment.id} '
@@ -242,17 +379,13 @@ def _handle_subscriber_rsvp(
 
     elif response_status == ResponseStatus.DECLINED:
         if slot.booking_status in (models.BookingStatus.requested, models.BookingStatus.booked):
-            slot_update = schemas.SlotUpdate(booking_status=models.BookingStatus.declined)
-            repo.slot.update(db, slot.id, slot_update)
+            slot.booking_status = models.BookingStatus.declined
 
             if appointment.external_id:
-                try:
-                    google_client.delete_event(
-                        remote_calendar_id, appointment.external_id, google_token,
-                        send_updates=SendUpdates.ALL,
-                    )
-                except Exception:
-                    log.warning('[tasks.google] Failed to delete declined event from Google')
+                follow_ups.delete(appointment.external_id, send_updates=SendUpdates.ALL)
+
+            if standalone:
+                _finish_standalone(db, follow_ups)
 
             log.info(
                 f'[tasks.google] Subscriber declined appointment {appointment.id} '
@@ -268,18 +401,22 @@ def _handle_bookee_rsvp(
     google_client: GoogleClient,
     google_token,
     remote_calendar_id: str,
+    follow_ups: EventFollowUps | None = None,
 ):
     """React to the bookee's RSVP status change from Google Calendar."""
     if response_status == ResponseStatus.DECLINED:
         if slot.booking_status in (models.BookingStatus.requested, models.BookingStatus.booked):
-            slot_update = schemas.SlotUpdate(booking_status=models.BookingStatus.declined)
-            repo.slot.update(db, slot.id, slot_update)
+            standalone = follow_ups is None
+            if standalone:
+                follow_ups = EventFollowUps(google_client, google_token, remote_calendar_id)
+
+            slot.booking_status = models.BookingStatus.declined
 
             if appointment.external_id:
-                try:
-                    google_client.delete_event(remote_calendar_id, appointment.external_id, google_token)
-                except Exception:
-                    log.warning('[tasks.google] Failed to delete declined event from Google')
+                follow_ups.delete(appointment.external_id)
+
+            if standalone:
+                _finish_standalone(db, follow_ups)
 
             log.info(
                 f'[tasks.google] Bookee declined appointment {appointment.id}, '
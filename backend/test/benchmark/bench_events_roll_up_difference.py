@@ -0,0 +1,111 @@
+"""Benchmark for Tools.events_roll_up_difference
+
+Compares the previous pairwise implementation with the current busy index implementation,
+and checks that both produce the same output. This isn't collected by pytest, run it from the backend folder with:
+
+    python test/benchmark/bench_events_roll_up_difference.py --slots 10000 --events 5000
+
+Note: The legacy implementation is quadratic, at the default size it takes a few minutes to finish.
+"""
+
+import argparse
+import random
+import time
+import zoneinfo
+from datetime import datetime, timedelta
+
+from appointment.controller.calendar import Tools
+from appointment.database import schemas
+from appointment.database.models import BookingStatus
+
+
+def legacy_events_roll_up_difference(
+    a_list: list[schemas.SlotBase], b_list: list[schemas.Event]
+) -> list[schemas.SlotBase]:
+    """The pre-busy index implementation, kept here for comparison."""
+
+    def is_blocker(a_start: datetime, a_end: datetime, b_start: datetime, b_end: datetime):
+        return a_start.timestamp() < b_end.timestamp() and a_end.timestamp() > b_start.timestamp()
+
+    available_slots = []
+    collisions = []
+
+    for slot in a_list:
+        slot_start = slot.start
+        slot_end = slot.start + timedelta(minutes=slot.duration)
+
+        if any([is_blocker(slot_start, slot_end, event.start, event.end) for event in b_list]):
+            previous_collision_end = (
+                collisions[-1].start + timedelta(minutes=collisions[-1].duration) if len(collisions) else None
+            )
+
+            if previous_collision_end and previous_collision_end.timestamp() == slot_start.timestamp():
+                collisions[-1].duration += slot.duration
+            else:
+                collisions.append(
+                    schemas.SlotBase(start=slot_start, duration=slot.duration, booking_status=BookingStatus.booked)
+                )
+        else:
+            available_slots.append(slot)
+
+    available_slots = available_slots + collisions
+    return sorted(available_slots, key=lambda slot: slot.start.timestamp())
+
+
+def make_data(slot_count: int, event_count: int, slot_duration=15, seed=42):
+    """Back to back slots (like a long schedule with short slots) and randomly placed busy events over the same range"""
+    rng = random.Random(seed)
+    tz = zoneinfo.ZoneInfo('America/Vancouver')
+    start = datetime(2026, 1, 5, 9, tzinfo=tz)
+
+    slots = [
+        schemas.SlotBase(start=start + timedelta(minutes=slot_duration * i), duration=slot_duration)
+        for i in range(slot_count)
+    ]
+
+    range_minutes = slot_count * slot_duration
+    events = []
+    for _ in range(event_count):
+        event_start = start + timedelta(minutes=rng.randrange(0, range_minutes))
+        events.append(
+            schemas.Event(
+                title='Busy', start=event_start, end=event_start + timedelta(minutes=rng.choice([15, 30, 45, 60, 120]))
+            )
+        )
+
+    return slots, events
+
+
+def timed(fn, slots, events):
+    # Collisions mutate the returned slots, so hand out fresh copies each run
+    slots = [slot.model_copy() for slot in slots]
+    timer = time.perf_counter()
+    result = fn(slots, events)
+    return result, time.perf_counter() - timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--slots', type=int, default=10000)
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--skip-legacy', action='store_true', help='Only time the current implementation')
+    args = parser.parse_args()
+
+    slots, events = make_data(args.slots, args.events)
+    print(f'{args.slots} slots x {args.events} events')
+
+    current, current_time = timed(Tools.events_roll_up_difference, slots, events)
+    print(f'busy index: {current_time:.3f}s')
+
+    if args.skip_legacy:
+        return
+
+    legacy, legacy_time = timed(legacy_events_roll_up_difference, slots, events)
+    print(f'pairwise:   {legacy_time:.3f}s ({legacy_time / current_time:.0f}x slower)')
+
+    assert [slot.model_dump() for slot in current] == [slot.model_dump() for slot in legacy], 'Outputs differ!'
+    print('Outputs are identical')
+
+
+if __name__ == '__main__':
+    main()
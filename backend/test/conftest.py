@@ -1,3 +1,4 @@
+import fnmatch
 import os
 
 from dotenv import load_dotenv, find_dotenv
@@ -97,6 +98,56 @@ def _patch_mailer(monkeypatch):
     monkeypatch.setattr(Mailer, 'send', MockMailer.send)
 
 
+class FakeRedis:
+    """An in-memory stand-in for a redis client (with decode_responses), for the few commands we use"""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return None
+        # Like redis, values are read back as strings
+        self.store[key] = str(value)
+        return True
+
+    def incr(self, key):
+        self.store[key] = str(int(self.store.get(key, 0)) + 1)
+        return int(self.store[key])
+
+    def delete(self, *keys):
+        return sum(1 for key in keys if self.store.pop(key, None) is not None)
+
+    def unlink(self, *keys):
+        return self.delete(*keys)
+
+    def scan_iter(self, match=None, count=None):
+        return iter([key for key in list(self.store) if match is None or fnmatch.fnmatchcase(key, match)])
+
+    def lock(self, name, timeout=None, blocking=True):
+        return FakeLock(self, name)
+
+
+class FakeLock:
+    def __init__(self, redis, name):
+        self.redis = redis
+        self.name = name
+
+    def acquire(self):
+        return bool(self.redis.set(self.name, 1, nx=True))
+
+    def release(self):
+        self.redis.delete(self.name)
+
+
+@pytest.fixture()
+def fake_redis():
+    return FakeRedis()
+
+
 @pytest.fixture()
 def with_db():
     database_url = database.get_database_url()
@@ -106,6 +157,9 @@ def with_db():
     models.Base.metadata.drop_all(bind=engine)
     models.Base.metadata.create_all(bind=engine)
 
+    # Tokens cached by a previous test would resolve to that test's subscribers
+    auth.introspection_cache.clear()
+
     # Ensure we have a default subscriber
     with testing_local_session() as db:
         subscriber = models.Subscriber(
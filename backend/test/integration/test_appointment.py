@@ -3,6 +3,7 @@ import pytest
 import dateutil.parser
 from unittest.mock import patch, MagicMock
 from datetime import datetime, timedelta
+from sqlalchemy import inspect
 
 from defines import DAY1, DAY3, auth_headers, TEST_USER_ID
 from appointment.database.repo import appointment as appointment_repo
@@ -226,6 +227,20 @@ class TestAppointment:
             assert db_slot.start == new_start
             assert db_slot.booking_status == models.BookingStatus.modified
 
+    def test_delete_my_appointment(self, with_client, make_appointment, with_db):
+        appointment = make_appointment()
+
+        with patch('appointment.routes.api.availability.invalidate_snapshots_for_subscriber') as mock_invalidate:
+            response = with_client.delete(f'/apmt/{appointment.id}', headers=auth_headers)
+            assert response.status_code == 200, response.text
+
+            # Its slots no longer count as taken
+            mock_invalidate.assert_called_once()
+            assert mock_invalidate.call_args.args[2] == TEST_USER_ID
+
+        with with_db() as db:
+            assert appointment_repo.get(db, appointment.id) is None
+
 
 class TestMyAppointments:
     def test_appointments_default_pagination(self, with_client, make_appointment, make_google_calendar):
@@ -248,6 +263,23 @@ class TestMyAppointments:
         assert data['page_meta']['page'] == 1
         assert data['page_meta']['per_page'] == 50
 
+    def test_appointments_come_with_their_calendar(self, with_client, with_db, make_appointment, make_google_calendar):
+        """Appointments are listed with their calendar's title and colour, but not e.g. its credentials"""
+        calendar = make_google_calendar(subscriber_id=TEST_USER_ID)
+        make_appointment(calendar_id=calendar.id)
+
+        response = with_client.get('/me/appointments', headers=auth_headers)
+
+        assert response.status_code == 200, response.text
+        item = response.json()['items'][0]
+        assert item['calendar_title'] == calendar.title
+        assert item['calendar_color'] == calendar.color
+
+        with with_db() as db:
+            appointment = appointment_repo.get_by_subscriber(db, TEST_USER_ID)[0]
+            assert 'password' in inspect(appointment.calendar).unloaded
+            assert 'external_connection' in inspect(appointment.calendar).unloaded
+
     def test_dont_show_other_subscribers_appointments(
         self, with_client, make_basic_subscriber, make_appointment, make_google_calendar
     ):
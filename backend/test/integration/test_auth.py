@@ -205,9 +205,11 @@ class TestCalDAV:
         ec = make_external_connections(TEST_USER_ID, type=models.ExternalConnectionType.caldav, type_id=type_id)
         calendar = make_caldav_calendar(subscriber_id=TEST_USER_ID, user=username)
 
-        response = with_client.post('/caldav/disconnect', json={'type_id': ec.type_id}, headers=auth_headers)
+        with patch('appointment.routes.caldav.availability.invalidate_snapshots_for_subscriber') as mock_invalidate:
+            response = with_client.post('/caldav/disconnect', json={'type_id': ec.type_id}, headers=auth_headers)
 
         assert response.status_code == 200, response.content
+        mock_invalidate.assert_called_once()
 
         with with_db() as db:
             ecs = repo.external_connection.get_by_type(
@@ -299,9 +301,11 @@ class TestGoogle:
         ec = make_external_connections(TEST_USER_ID, type=models.ExternalConnectionType.google, type_id=type_id)
         calendar = make_google_calendar(subscriber_id=TEST_USER_ID, external_connection_id=ec.id)
 
-        response = with_client.post('/google/disconnect', json={'type_id': ec.type_id}, headers=auth_headers)
+        with patch('appointment.routes.google.availability.invalidate_snapshots_for_subscriber') as mock_invalidate:
+            response = with_client.post('/google/disconnect', json={'type_id': ec.type_id}, headers=auth_headers)
 
         assert response.status_code == 200, response.content
+        mock_invalidate.assert_called_once()
 
         with with_db() as db:
             ecs = repo.external_connection.get_by_type(
@@ -1,6 +1,6 @@
 import os
 from datetime import date, datetime, timedelta
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from zoneinfo import ZoneInfo
 
 import caldav.lib.error
@@ -264,6 +264,21 @@ class TestCalendar:
         data = response.json()
         assert len(data) == 0
 
+    def test_calendar_changes_invalidate_availability(self, with_client, make_caldav_calendar):
+        """Connecting, disconnecting or removing a calendar changes the availability of all our schedules"""
+        generated_calendar = make_caldav_calendar()
+
+        for method, path in (
+            ('post', f'/cal/{generated_calendar.id}/connect'),
+            ('post', f'/cal/{generated_calendar.id}/disconnect'),
+            ('delete', f'/cal/{generated_calendar.id}'),
+        ):
+            with patch('appointment.routes.api.availability.invalidate_snapshots_for_subscriber') as mock_invalidate:
+                response = getattr(with_client, method)(path, headers=auth_headers)
+                assert response.status_code == 200, response.text
+                mock_invalidate.assert_called_once()
+                assert mock_invalidate.call_args.args[2] == TEST_USER_ID
+
     @pytest.mark.parametrize('provider,factory_name', get_calendar_factory())
     def test_delete_missing_calendar(self, with_client, provider, factory_name, request):
         generated_calendar = request.getfixturevalue(factory_name)()
@@ -318,6 +333,26 @@ class TestCalendar:
         )
         assert response.status_code == 400, response.text
 
+    def test_create_calendar_invalidates_availability(self, with_client, monkeypatch):
+        monkeypatch.setattr(CalDavConnector, 'test_connection', lambda self: True)
+
+        with patch('appointment.routes.caldav.availability.invalidate_snapshots_for_subscriber') as mock_invalidate:
+            response = with_client.post(
+                '/caldav',
+                json={
+                    'title': 'A caldav calendar',
+                    'color': '#123456',
+                    'provider': CalendarProvider.caldav.value,
+                    'url': 'https://caldav.example.com',
+                    'user': 'user',
+                    'password': 'password',
+                },
+                headers=auth_headers,
+            )
+            assert response.status_code == 200, response.text
+            mock_invalidate.assert_called_once()
+            assert mock_invalidate.call_args.args[2] == TEST_USER_ID
+
     @pytest.mark.parametrize('provider,factory_name', get_calendar_factory())
     def test_disconnect_calendar(self, with_client, provider, factory_name, request):
         new_calendar = request.getfixturevalue(factory_name)(connected=True)
@@ -140,7 +140,7 @@ class TestGoogleCalendarWebhook:
         with with_db() as db:
             assert repo.google_calendar_channel.get_by_channel_id(db, 'disconnected-cal-channel') is None
 
-    @patch('appointment.routes.webhooks.sync_google_calendar_changes')
+    @patch('appointment.controller.google_watch.sync_google_calendar_changes')
     def test_valid_notification_returns_200(
         self,
         mock_sync_task,
@@ -1,5 +1,7 @@
 import os
-from defines import auth_headers
+from unittest.mock import patch
+
+from defines import auth_headers, TEST_USER_ID
 from appointment.database import repo
 
 
@@ -33,6 +35,19 @@ class TestProfile:
             assert subscriber.secondary_email == 'useme@example.org'
             assert subscriber.preferred_email == 'useme@example.org'
 
+    def test_update_me_invalidates_availability(self, with_client):
+        """Available slots depend on our timezone, so a profile update invalidates our availability snapshots"""
+        with patch('appointment.routes.api.availability.invalidate_snapshots_for_subscriber') as mock_invalidate:
+            response = with_client.put(
+                '/me',
+                json={'username': 'test', 'name': 'Test Account', 'timezone': 'America/Vancouver'},
+                headers=auth_headers,
+            )
+            assert response.status_code == 200, response.text
+
+        mock_invalidate.assert_called_once()
+        assert mock_invalidate.call_args.args[2] == TEST_USER_ID
+
     def test_signed_short_link(self, with_client):
         """Retrieves our unique short link, and ensures it exists"""
         response = with_client.get('/me/signature', headers=auth_headers)
@@ -9,7 +9,7 @@ from freezegun import freeze_time
 from appointment import defines
 from appointment.tasks import emails as email_tasks
 from appointment.controller.auth import signed_url_by_subscriber
-from appointment.controller.calendar import CalDavConnector
+from appointment.controller.calendar import BusyTime, CalDavConnector, Tools
 from appointment.database import schemas, models, repo
 from appointment.exceptions import validation
 from appointment.dependencies import auth
@@ -1365,6 +1365,35 @@ class TestRequestScheduleAvailability:
             # Ensure we haven't sent out any emails
             assert mock.call_count == 0
 
+    def test_fail_when_remote_calendar_is_degraded(self, monkeypatch, with_client, mock_connector, setup_schedule):
+        """Ensure we don't book a slot if a remote calendar didn't answer in time, as it might not be free"""
+        booking_time = datetime.combine(self.start_date, self.start_time, tzinfo=timezone.utc)
+
+        slot_availability = schemas.AvailabilitySlotAttendee(
+            slot=schemas.SlotBase(start=booking_time, duration=30),
+            attendee=schemas.AttendeeBase(email='hello@example.org', name='Greg', timezone='Europe/Berlin'),
+        ).model_dump(mode='json')
+
+        monkeypatch.setattr(Tools, 'existing_events_for_schedule', lambda *args, **kwargs: BusyTime([], degraded=True))
+
+        with patch('fastapi.BackgroundTasks.add_task') as mock:
+            response = with_client.put(
+                '/schedule/public/availability/request',
+                json={
+                    's_a': slot_availability,
+                    'url': self.signed_url,
+                },
+                headers=auth_headers,
+            )
+            assert response.status_code == 400, response.text
+
+            data = response.json()
+
+            assert data.get('detail', {}).get('id') == 'REMOTE_CALENDAR_CONNECTION_ERROR'
+
+            # Ensure we haven't sent out any emails
+            assert mock.call_count == 0
+
     def test_fail_slot_duration_mismatch(self, with_client, mock_connector, setup_schedule):
         """Ensure we fail validation because we submitted a 60 min when the schedule only supports 30 minute slots"""
         booking_time = datetime.combine(self.start_date, self.start_time, tzinfo=timezone.utc)
@@ -1,3 +1,4 @@
+import json
 import os
 
 import pytest
@@ -23,7 +24,11 @@ class TestZoomWebhooks:
 
         zoom_signature = 'v0=cc6857f5b05fea4fb0f2057912c14a68996cfcf36a4267c65f15a3e9f1602477'
         zoom_timestamp = '2019-06-17T13:52:28.632Z'
-        request_headers = {'x-zm-signature': zoom_signature, 'x-zm-request-timestamp': zoom_timestamp}
+        request_headers = {
+            'x-zm-signature': zoom_signature,
+            'x-zm-request-timestamp': zoom_timestamp,
+            'content-type': 'application/json',
+        }
 
         fake_secret = 'cake'
         os.environ['ZOOM_API_SECRET'] = fake_secret
@@ -33,7 +38,8 @@ class TestZoomWebhooks:
             subscriber_id=subscriber.id, type=models.ExternalConnectionType.zoom.value, type_id=zoom_user_id
         )
 
-        return request_body, request_headers, subscriber, external_connection
+        # The signature is over the raw body, so send exactly what was signed
+        return json.dumps(request_body), request_headers, subscriber, external_connection
 
     def test_deauthorization(self, with_client, with_db, setup_deauthorization):
         """Test a successful deauthorization (i.e. deleting the zoom connection)"""
@@ -47,7 +53,7 @@ class TestZoomWebhooks:
 
             zoom_user_id = external_connection.type_id
 
-            response = with_client.post('/webhooks/zoom-deauthorization', json=request_body, headers=request_headers)
+            response = with_client.post('/webhooks/zoom-deauthorization', content=request_body, headers=request_headers)
             assert response.status_code == 200, response.text
 
             db.refresh(subscriber)
@@ -73,7 +79,7 @@ class TestZoomWebhooks:
             db.delete(external_connection)
             db.commit()
 
-            response = with_client.post('/webhooks/zoom-deauthorization', json=request_body, headers=request_headers)
+            response = with_client.post('/webhooks/zoom-deauthorization', content=request_body, headers=request_headers)
             assert response.status_code == 200, response.text
 
     def test_deauthorization_silent_fail_due_to_no_user(self, with_client, with_db, setup_deauthorization):
@@ -92,7 +98,7 @@ class TestZoomWebhooks:
             db.delete(subscriber)
             db.commit()
 
-            response = with_client.post('/webhooks/zoom-deauthorization', json=request_body, headers=request_headers)
+            response = with_client.post('/webhooks/zoom-deauthorization', content=request_body, headers=request_headers)
             assert response.status_code == 200, response.text
 
     def test_deauthorization_with_invalid_webhook(self, with_client, with_db):
@@ -116,7 +122,7 @@ class TestZoomWebhooks:
 
             response = with_client.post(
                 '/webhooks/zoom-deauthorization',
-                json=request_body,
+                content=request_body,
                 headers={'x-zm-signature': 'bad-signature', 'x-zm-signature-timestamp': 'bad-timestamp'},
             )
             assert response.status_code == 200, response.text
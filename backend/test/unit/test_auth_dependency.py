@@ -18,6 +18,7 @@ from appointment.dependencies.auth import (
     get_admin_subscriber,
     get_subscriber_from_schedule_or_signed_url,
     get_user_from_oidc_token_introspection,
+    introspection_cache,
 )
 from appointment.exceptions.validation import (
     InvalidTokenException,
@@ -87,6 +88,9 @@ class TestAuthDependency:
 
             monkeypatch.setattr(redis_mock, 'set', redis_mock_set_new)
 
+            # Forget the token in this process, so it's introspected again
+            introspection_cache.clear()
+
             # Test a successful return
             with with_db() as db:
                 token_subscriber = get_user_from_oidc_token_introspection(db, access_token, redis_mock)
@@ -94,6 +98,51 @@ class TestAuthDependency:
                 assert token_subscriber is not None
                 assert subscriber.id == token_subscriber.id
 
+    def test_oidc_token_introspection_is_cached_in_process(
+        self, with_db, make_pro_subscriber, make_external_connections
+    ):
+        oidc_id = uuid.uuid4().hex
+        access_token = uuid.uuid4().hex
+        subscriber = make_pro_subscriber()
+        make_external_connections(subscriber_id=subscriber.id, type_id=oidc_id, type=ExternalConnectionType.oidc)
+
+        redis_mock = mock.MagicMock()
+        redis_mock.get.return_value = None
+
+        with patch('appointment.controller.apis.oidc_client.OIDCClient.introspect_token') as introspect_token_mock:
+            introspect_token_mock.return_value = {
+                'sub': oidc_id,
+                'exp': (datetime.datetime.now(datetime.UTC) + datetime.timedelta(hours=1)).timestamp(),
+            }
+
+            with with_db() as db:
+                for _ in range(3):
+                    token_subscriber = get_user_from_oidc_token_introspection(db, access_token, redis_mock)
+                    assert token_subscriber.id == subscriber.id
+
+            # Only the first call had to introspect the token, and look at redis
+            introspect_token_mock.assert_called_once_with(access_token)
+            redis_mock.get.assert_called_once()
+            redis_mock.set.assert_called_once()
+
+            # Tokens are only kept by their hash
+            assert access_token not in str(introspection_cache.entries)
+
+            # Expired tokens aren't cached at all
+            other_token = uuid.uuid4().hex
+            introspect_token_mock.return_value = {
+                'sub': oidc_id,
+                'exp': (datetime.datetime.now(datetime.UTC) - datetime.timedelta(hours=1)).timestamp(),
+            }
+            with with_db() as db:
+                get_user_from_oidc_token_introspection(db, other_token, None)
+            assert introspection_cache.get(other_token) is None
+
+    def test_oidc_session_is_reused(self):
+        from appointment.controller.apis.oidc_client import OIDCClient
+
+        assert OIDCClient().client is OIDCClient().client
+
     def test_get_user_from_token(self, with_db, with_l10n, make_pro_subscriber):
         subscriber = make_pro_subscriber()
         access_token_expires = datetime.timedelta(minutes=float(os.getenv('JWT_EXPIRE_IN_MINS')))
@@ -0,0 +1,100 @@
+import json
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import pytest
+
+from appointment.controller import availability
+from appointment.controller.calendar import BusyTime, Tools
+from appointment.database import schemas
+from appointment.database.models import BookingStatus
+
+
+class TestAvailabilitySnapshot:
+    @pytest.fixture
+    def schedule(self):
+        schedule = Mock()
+        schedule.id = 42
+        schedule.slot_duration = 30
+        return schedule
+
+    @pytest.fixture
+    def slot_starts(self):
+        now = int(datetime.now().timestamp())
+        return [now + 3600 + i * 1800 for i in range(4)]
+
+    @pytest.fixture
+    def calculations(self, monkeypatch, slot_starts):
+        """Patches out the actual slot calculation, and counts how often remote calendars were asked"""
+        calls = []
+
+        def existing_events(*args, **kwargs):
+            calls.append(args)
+            busy_start = datetime.fromtimestamp(slot_starts[1])
+            return BusyTime([schemas.Event(title='Busy', start=busy_start, end=busy_start + timedelta(minutes=30))])
+
+        monkeypatch.setattr(Tools, 'available_slot_starts_from_schedule', lambda *args, **kwargs: slot_starts)
+        monkeypatch.setattr(Tools, 'existing_events_for_schedule', existing_events)
+        return calls
+
+    def test_snapshot_is_reused(self, schedule, slot_starts, calculations, fake_redis):
+        slots = availability.get_available_slots(schedule, [], Mock(), None, None, fake_redis)
+        assert len(calculations) == 1
+        assert slots[1] == (slot_starts[1], 30, BookingStatus.booked)
+
+        cached_slots = availability.get_available_slots(schedule, [], Mock(), None, None, fake_redis)
+        assert len(calculations) == 1
+        assert cached_slots == slots
+
+    def test_degraded_calculation_is_not_stored(self, monkeypatch, schedule, slot_starts, calculations, fake_redis):
+        monkeypatch.setattr(Tools, 'existing_events_for_schedule', lambda *args, **kwargs: BusyTime([], degraded=True))
+
+        slots = availability.get_available_slots(schedule, [], Mock(), None, None, fake_redis)
+        assert [slot[0] for slot in slots] == slot_starts
+        assert availability.get_snapshot(fake_redis, schedule.id) is None
+
+    def test_without_redis(self, schedule, calculations):
+        availability.get_available_slots(schedule, [], Mock(), None, None, None)
+        availability.get_available_slots(schedule, [], Mock(), None, None, None)
+        assert len(calculations) == 2
+
+    def test_invalidate_snapshot(self, schedule, calculations, fake_redis):
+        availability.get_available_slots(schedule, [], Mock(), None, None, fake_redis)
+        assert availability.invalidate_snapshot(fake_redis, schedule.id)
+
+        availability.get_available_slots(schedule, [], Mock(), None, None, fake_redis)
+        assert len(calculations) == 2
+
+    def test_outdated_snapshot_contents(self, schedule, slot_starts, fake_redis):
+        slots = [(start, 30, BookingStatus.none) for start in slot_starts]
+        availability.put_snapshot(fake_redis, schedule.id, 0, slots)
+
+        # Slots that have started since the snapshot was taken are dropped
+        past_start = int(datetime.now().timestamp()) - 60
+        snapshot_key = f'{availability.REDIS_AVAILABILITY_SNAPSHOT_KEY}:{schedule.id}:0'
+        snapshot = json.loads(fake_redis.store[snapshot_key])
+        snapshot['slots'].insert(0, (past_start, 30, BookingStatus.none.value))
+        fake_redis.store[snapshot_key] = json.dumps(snapshot)
+
+        slots, _ = availability.get_snapshot(fake_redis, schedule.id)
+        assert [slot[0] for slot in slots] == slot_starts
+
+        # Snapshots from another day are ignored entirely
+        snapshot['day'] -= 1
+        fake_redis.store[snapshot_key] = json.dumps(snapshot)
+        assert availability.get_snapshot(fake_redis, schedule.id) is None
+
+    def test_aging_snapshot_is_refreshed_in_background(self, monkeypatch, schedule, calculations, fake_redis):
+        from appointment.tasks.availability import refresh_availability_snapshot
+
+        delay = Mock()
+        monkeypatch.setattr(refresh_availability_snapshot, 'delay', delay)
+        monkeypatch.setenv('AVAILABILITY_SNAPSHOT_REFRESH_SECONDS', '0')
+
+        availability.get_available_slots(schedule, [], Mock(), None, None, fake_redis)
+        availability.get_available_slots(schedule, [], Mock(), None, None, fake_redis)
+        availability.get_available_slots(schedule, [], Mock(), None, None, fake_redis)
+
+        # Served from the snapshot, with only a single refresh queued
+        assert len(calculations) == 1
+        delay.assert_called_once_with(schedule.id)
@@ -1,29 +1,43 @@
 import datetime
+import json
+import uuid
 
-from appointment.database.schemas import Event
+from appointment.database.models import LocationType
+from appointment.database.schemas import Event, EventLocation
+from appointment.defines import REDIS_REMOTE_EVENTS_FORMAT
+from appointment.utils import setup_encryption_engine
 
 
 class TestEncrypt:
-    def test_cached_events(self):
-        """Test our model_(dump/load)_redis functions to ensure they don't leak data and work correctly."""
-        now = datetime.datetime.now()
-        title = 'Private event!'
-        description = 'This is a super secret event!'
-
-        cached_event = Event(title=title, start=now, end=now + datetime.timedelta(hours=2), description=description)
-
-        # Ensure individual accessors are not encrypted
-        assert cached_event.title == title
-        assert cached_event.description == description
-
-        encrypted_blob = cached_event.model_dump_redis()
-
-        # Ensure model_dump_redis values are encrypted
-        assert title not in encrypted_blob
-        assert description not in encrypted_blob
-
-        new_event_cached = Event.model_load_redis(encrypted_blob)
-
-        # Ensure individual accessors are not encrypted
-        assert new_event_cached.title == title
-        assert new_event_cached.description == description
+    def test_cached_event_list(self):
+        """Test our model_(dump/load)_redis_list functions round trip every field, compressed or not."""
+        start = datetime.datetime(2026, 1, 1, 9, tzinfo=datetime.timezone.utc)
+        events = [
+            Event(
+                title='Private event!',
+                start=start,
+                end=start + datetime.timedelta(hours=1),
+                description='This is a super secret event!',
+                calendar_title='Work',
+                location=EventLocation(type=LocationType.online, url='https://example.org'),
+                uuid=uuid.uuid4(),
+                external_id='external',
+            ),
+            Event(title='Naive', start=start.replace(tzinfo=None), end=start.replace(tzinfo=None), all_day=True),
+        ]
+
+        for amount in (1, 100):
+            encrypted_blob = Event.model_dump_redis_list(events * amount)
+            assert encrypted_blob.startswith(f'{REDIS_REMOTE_EVENTS_FORMAT}:')
+            assert 'Private event!' not in encrypted_blob
+
+            loaded_events = Event.model_load_redis_list(encrypted_blob)
+            assert loaded_events == events * amount
+            assert loaded_events[0].location.type == LocationType.online
+            assert loaded_events[1].start.tzinfo is None
+
+    def test_cached_event_list_in_old_format(self):
+        """Lists cached before we packed them are treated as a cache miss"""
+        event = Event(title='Old', start=datetime.datetime.now(), end=datetime.datetime.now())
+        legacy_blob = json.dumps([setup_encryption_engine().encrypt(event.model_dump_json())])
+        assert Event.model_load_redis_list(legacy_blob) is None
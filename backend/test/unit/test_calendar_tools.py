@@ -1,4 +1,11 @@
-from appointment.controller.calendar import Tools, GoogleConnector, CalDavConnector
+from appointment.controller.calendar import (
+    Tools,
+    BaseConnector,
+    GoogleConnector,
+    CalDavConnector,
+    SessionPool,
+    caldav_session_key,
+)
 from appointment.database import schemas, models
 from appointment.exceptions.calendar import RemoteCalendarAuthenticationError
 from datetime import datetime, timedelta, time, date, timezone
@@ -65,6 +72,81 @@ class TestTools:
         assert rolled_up_slots[1].booking_status == models.BookingStatus.requested
         assert rolled_up_slots[2].booking_status == models.BookingStatus.booked
 
+    def test_events_roll_up_difference_matches_pairwise_check(self):
+        """Compare against a straightforward pairwise collision check with overlapping, nested and unsorted events"""
+        start = datetime(2026, 3, 2, 9, tzinfo=zoneinfo.ZoneInfo('Europe/Berlin'))
+        duration = 15
+
+        slots = [schemas.SlotBase(start=start + timedelta(minutes=duration * i), duration=duration) for i in range(20)]
+        events = [
+            # A long event that nests a shorter one
+            schemas.Event(title='Long', start=start + timedelta(minutes=60), end=start + timedelta(minutes=150)),
+            schemas.Event(title='Nested', start=start + timedelta(minutes=70), end=start + timedelta(minutes=80)),
+            # Ends exactly when a slot starts, so only blocks the first slot
+            schemas.Event(title='Edge', start=start - timedelta(minutes=5), end=start + timedelta(minutes=15)),
+            # A naive utc event in the middle of a slot
+            schemas.Event(
+                title='Naive',
+                start=(start + timedelta(minutes=250)).astimezone(timezone.utc).replace(tzinfo=None),
+                end=(start + timedelta(minutes=255)).astimezone(timezone.utc).replace(tzinfo=None),
+            ),
+        ]
+
+        def collides(slot):
+            slot_end = slot.start + timedelta(minutes=slot.duration)
+            return any(
+                slot.start.timestamp() < event.end.timestamp() and slot_end.timestamp() > event.start.timestamp()
+                for event in events
+            )
+
+        expected_busy = [slot.start for slot in slots if collides(slot)]
+
+        rolled_up_slots = Tools.events_roll_up_difference(list(reversed(slots)), events)
+        booked = [slot for slot in rolled_up_slots if slot.booking_status == models.BookingStatus.booked]
+        available = [slot for slot in rolled_up_slots if slot.booking_status != models.BookingStatus.booked]
+
+        # Results are sorted, and nothing went missing
+        assert [slot.start for slot in rolled_up_slots] == sorted(slot.start for slot in rolled_up_slots)
+        assert sum(slot.duration for slot in rolled_up_slots) == duration * len(slots)
+        assert not any(slot.start in expected_busy for slot in available)
+        assert len(booked) > 0
+
+        # Adjacent collisions are rolled up into single booked entries when given in order
+        rolled_up_slots = Tools.events_roll_up_difference(slots, events)
+        booked = [
+            (slot.start, slot.duration)
+            for slot in rolled_up_slots
+            if slot.booking_status == models.BookingStatus.booked
+        ]
+        assert booked == [
+            (start, 15),
+            (start + timedelta(minutes=60), 90),
+            (start + timedelta(minutes=240), 15),
+        ]
+
+    def test_slot_starts_roll_up_difference(self):
+        """The epoch based roll up should give the same results as the model based one"""
+        start = datetime(2026, 3, 2, 9, tzinfo=timezone.utc)
+        duration = 30
+
+        slots = [schemas.SlotBase(start=start + timedelta(minutes=duration * i), duration=duration) for i in range(8)]
+        events = [
+            schemas.Event(title='Busy', start=start, end=start + timedelta(minutes=45)),
+            schemas.Event(title='Busy', start=start + timedelta(minutes=60), end=start + timedelta(minutes=90)),
+            schemas.Event(title='Busy', start=start + timedelta(minutes=200), end=start + timedelta(minutes=210)),
+        ]
+
+        expected = [
+            (int(slot.start.timestamp()), slot.duration, slot.booking_status)
+            for slot in Tools.events_roll_up_difference(slots, events)
+        ]
+        rolled_up_slots = Tools.slot_starts_roll_up_difference(
+            [int(slot.start.timestamp()) for slot in slots], duration, events
+        )
+
+        assert rolled_up_slots == expected
+        assert rolled_up_slots[0] == (int(start.timestamp()), 90, models.BookingStatus.booked)
+
     def test_existing_events_for_schedule_multiple_google_calendars(
         self, monkeypatch, with_db, make_pro_subscriber, make_google_calendar, make_external_connections, make_schedule
     ):
@@ -94,7 +176,7 @@ class TestTools:
                 GoogleConnector, 'get_busy_time', lambda self, *a, **kw: mock_connector_instance.get_busy_time(*a, **kw)
             )
 
-            events = Tools.existing_events_for_schedule(
+            events, _ = Tools.existing_events_for_schedule(
                 schedule=schedule,
                 calendars=[calendar1, calendar2],
                 subscriber=subscriber,
@@ -115,8 +197,9 @@ class TestTools:
         subscriber = make_pro_subscriber()
         ec = make_external_connections(subscriber.id, type=models.ExternalConnectionType.google)
         calendar = make_google_calendar(subscriber_id=subscriber.id, connected=True, external_connection_id=ec.id)
-        schedule = make_schedule(calendar_id=calendar.id)
         now = datetime.now()
+        # Slots are only considered within the schedule's booking window
+        schedule = make_schedule(calendar_id=calendar.id, start_date=now.date() - timedelta(days=1), end_date=None)
 
         with with_db() as db:
             # Create slots with different booking statuses
@@ -163,7 +246,7 @@ class TestTools:
                 GoogleConnector, 'get_busy_time', lambda self, *a, **kw: mock_connector_instance.get_busy_time(*a, **kw)
             )
 
-            events = Tools.existing_events_for_schedule(
+            events, _ = Tools.existing_events_for_schedule(
                 schedule=schedule,
                 calendars=[calendar],
                 subscriber=subscriber,
@@ -182,6 +265,45 @@ class TestTools:
             now + timedelta(minutes=90),  # booked slot
         ]
 
+    def test_existing_events_for_schedule_ignores_slots_outside_booking_window(
+        self, monkeypatch, with_db, make_pro_subscriber, make_google_calendar, make_external_connections, make_schedule
+    ):
+        subscriber = make_pro_subscriber()
+        ec = make_external_connections(subscriber.id, type=models.ExternalConnectionType.google)
+        calendar = make_google_calendar(subscriber_id=subscriber.id, connected=True, external_connection_id=ec.id)
+        now = datetime.now()
+        schedule = make_schedule(
+            calendar_id=calendar.id,
+            start_date=now.date() - timedelta(days=1),
+            end_date=None,
+            farthest_booking=60 * 24 * 7,
+        )
+
+        with with_db() as db:
+            for start in (now - timedelta(days=365), now + timedelta(hours=2), now + timedelta(days=60)):
+                db.add(
+                    models.Slot(
+                        schedule_id=schedule.id, start=start, duration=30, booking_status=models.BookingStatus.booked
+                    )
+                )
+            db.commit()
+
+            from appointment.controller.calendar import GoogleConnector
+
+            monkeypatch.setattr(GoogleConnector, '__init__', lambda self, *a, **kw: None)
+            monkeypatch.setattr(GoogleConnector, 'get_busy_time', lambda self, *a, **kw: [])
+
+            events, _ = Tools.existing_events_for_schedule(
+                schedule=schedule,
+                calendars=[calendar],
+                subscriber=subscriber,
+                google_client=Mock(),
+                db=db,
+                redis=None,
+            )
+
+        assert [event.start for event in events] == [now + timedelta(hours=2)]
+
     def test_existing_events_for_schedule_skips_caldav_calendar_on_auth_failure(
         self, monkeypatch, with_db, make_pro_subscriber, make_caldav_calendar, make_schedule
     ):
@@ -207,7 +329,7 @@ class TestTools:
 
             monkeypatch.setattr(CalDavConnector, 'get_busy_time', mock_get_busy_time)
 
-            events = Tools.existing_events_for_schedule(
+            events, _ = Tools.existing_events_for_schedule(
                 schedule=schedule,
                 calendars=[bad_calendar, good_calendar],
                 subscriber=subscriber,
@@ -219,6 +341,51 @@ class TestTools:
         # Only the healthy calendar's busy time should come through
         assert len(events) == 1
 
+    def test_existing_events_for_schedule_queries_calendars_concurrently(
+        self, monkeypatch, with_db, make_pro_subscriber, make_caldav_calendar, make_schedule
+    ):
+        """Remote calendars are queried at the same time, and a calendar that takes too long is skipped."""
+        import time as pytime
+
+        monkeypatch.setenv('REMOTE_CALENDAR_SOURCE_TIMEOUT_SECONDS', '1')
+
+        subscriber = make_pro_subscriber()
+        calendars = [
+            make_caldav_calendar(subscriber_id=subscriber.id, connected=True, url=f'https://{i}.example.com/caldav')
+            for i in range(3)
+        ]
+        slow_calendar = make_caldav_calendar(
+            subscriber_id=subscriber.id, connected=True, url='https://slow.example.com/caldav'
+        )
+        schedule = make_schedule(calendar_id=calendars[0].id)
+
+        with with_db() as db:
+            db.add(schedule)
+            db.refresh(schedule)
+
+            def mock_get_busy_time(self, calendar_ids, start, end):
+                pytime.sleep(3 if self.url == slow_calendar.url else 0.3)
+                return [{'start': datetime.now(), 'end': datetime.now() + timedelta(hours=1)}]
+
+            monkeypatch.setattr(CalDavConnector, 'get_busy_time', mock_get_busy_time)
+
+            perf_start = pytime.monotonic()
+            events, degraded = Tools.existing_events_for_schedule(
+                schedule=schedule,
+                calendars=[*calendars, slow_calendar],
+                subscriber=subscriber,
+                google_client=Mock(),
+                db=db,
+                redis=None,
+            )
+            elapsed = pytime.monotonic() - perf_start
+
+        # Only the calendars that answered in time come through, and we didn't wait on them one by one
+        assert len(events) == 3
+        assert elapsed < 2
+        # ...but the result is flagged, as the slow calendar may well be busy
+        assert degraded
+
 
 class TestVCreate:
     def test_meeting_url_in_location(
@@ -482,6 +649,276 @@ class TestAvailableSlotsFromSchedule:
         slots_tuesday = Tools.available_slots_from_schedule(schedule, day=tuesday)
         assert len(slots_tuesday) == 0
 
+    def test_slot_starts_match_slots(self):
+        """Slot start times are plain epoch timestamps of the generated slots"""
+        schedule = self._create_mock_schedule(
+            start_time_local=time(9, 0),
+            end_time_local=time(17, 0),
+            slot_duration=45,
+            weekdays=[1, 2, 3, 4, 5],
+            timezone_str='Europe/Berlin',
+        )
+
+        slot_starts = Tools.available_slot_starts_from_schedule(schedule)
+        slots = Tools.available_slots_from_schedule(schedule)
+
+        assert len(slot_starts) > 0
+        assert slot_starts == sorted(slot_starts)
+        assert slot_starts == [int(slot.start.timestamp()) for slot in slots]
+        assert all(slot.start.tzinfo == zoneinfo.ZoneInfo('Europe/Berlin') for slot in slots)
+
+    def test_slot_starts_across_daylight_saving_change(self):
+        """A window spanning the DST change keeps stepping through the subscriber's wall clock"""
+        schedule = self._create_mock_schedule(
+            start_time_local=time(0, 0),
+            end_time_local=time(4, 0),
+            slot_duration=60,
+            weekdays=[7],
+            timezone_str='Europe/Berlin',
+        )
+
+        # Clocks go from 03:00 back to 02:00 on this Sunday
+        test_day = datetime(2026, 10, 25)
+        slot_starts = Tools.available_slot_starts_from_schedule(schedule, day=test_day)
+
+        tz = zoneinfo.ZoneInfo('Europe/Berlin')
+        assert slot_starts == [
+            int((datetime(2026, 10, 25, tzinfo=tz) + timedelta(hours=hour)).timestamp()) for hour in range(4)
+        ]
+
+
+class TestCachedEvents:
+    def _make_connector(self, redis, calendar_id=1):
+        connector = CalDavConnector.__new__(CalDavConnector)
+        BaseConnector.__init__(connector, subscriber_id=1, calendar_id=calendar_id, redis_instance=redis)
+        return connector
+
+    def _make_events(self):
+        start = datetime(2026, 1, 1, 9, tzinfo=timezone.utc)
+        return [schemas.Event(title='Busy', start=start, end=start + timedelta(hours=1))]
+
+    def test_bust_cached_events(self, fake_redis):
+        events = self._make_events()
+
+        self._make_connector(fake_redis).put_cached_events('scope', events)
+        self._make_connector(fake_redis, calendar_id=2).put_cached_events('scope', events)
+        assert self._make_connector(fake_redis).get_cached_events('scope') == events
+
+        # Busting one calendar leaves the others alone
+        assert self._make_connector(fake_redis).bust_cached_events()
+        assert self._make_connector(fake_redis).get_cached_events('scope') is None
+        assert self._make_connector(fake_redis, calendar_id=2).get_cached_events('scope') == events
+
+        # Busting all calendars affects every calendar of the subscriber
+        assert self._make_connector(fake_redis).bust_cached_events(all_calendars=True)
+        assert self._make_connector(fake_redis, calendar_id=2).get_cached_events('scope') is None
+
+    def test_purge_cached_events(self, fake_redis):
+        events = self._make_events()
+
+        for scope in range(3):
+            self._make_connector(fake_redis).put_cached_events(f'scope_{scope}', events)
+        self._make_connector(fake_redis, calendar_id=2).put_cached_events('scope', events)
+        self._make_connector(fake_redis, calendar_id=2).put_cached_busy_time(['a'], '2026-01-01', '2026-01-02', [])
+
+        assert self._make_connector(fake_redis).purge_cached_events()
+        assert self._make_connector(fake_redis).get_cached_events('scope_0') is None
+        # Busy times are shared by all of the subscriber's calendars
+        assert self._make_connector(fake_redis).get_cached_busy_time(['a'], '2026-01-01', '2026-01-02') is None
+        assert self._make_connector(fake_redis, calendar_id=2).get_cached_events('scope') == events
+
+        assert self._make_connector(fake_redis).purge_cached_events(all_calendars=True)
+        assert fake_redis.store == {}
+
+    def test_bust_falls_back_to_purge(self, monkeypatch, fake_redis):
+        from redis import RedisError
+
+        self._make_connector(fake_redis).put_cached_events('scope', self._make_events())
+
+        def broken_set(*args, **kwargs):
+            raise RedisError('read only replica')
+
+        monkeypatch.setattr(fake_redis, 'set', broken_set)
+
+        assert self._make_connector(fake_redis).bust_cached_events()
+        assert fake_redis.store == {}
+
+
+class TestCalDavSessions:
+    def _make_connector(self, url, user='user', password='password'):
+        return CalDavConnector(
+            db=None, subscriber_id=1, calendar_id=1, redis_instance=None, url=url, user=user, password=password
+        )
+
+    def test_connectors_share_sessions_per_server(self):
+        connector = self._make_connector('https://caldav.example.org/calendars/user/one/')
+        same_server = self._make_connector('https://caldav.example.org/calendars/user/two/')
+        other_user = self._make_connector('https://caldav.example.org/calendars/user/one/', user='other')
+        other_password = self._make_connector('https://caldav.example.org/calendars/user/one/', password='other')
+        other_server = self._make_connector('https://caldav.example.com/calendars/user/one/')
+
+        assert connector.client.session is same_server.client.session
+        assert connector.client.session is not other_user.client.session
+        assert connector.client.session is not other_password.client.session
+        assert connector.client.session is not other_server.client.session
+
+    def test_session_key_does_not_hold_the_password(self):
+        assert 'password' not in caldav_session_key('https://caldav.example.org/', 'user', 'password')
+
+    def _track_close(self, monkeypatch, session, closed):
+        monkeypatch.setattr(session, 'close', lambda: closed.append(session))
+
+    def test_pool_is_bounded(self, monkeypatch):
+        pool = SessionPool(max_size=2, max_idle=60)
+        closed = []
+        first = pool.get('first')
+        second = pool.get('second')
+        self._track_close(monkeypatch, second, closed)
+
+        # Using the first session again makes the second one the least recently used
+        pool.release('first', first)
+        assert pool.get('first') is first
+        pool.get('third')
+        assert list(pool.sessions) == ['first', 'third']
+
+        # The second session was still in use, it's only closed once it's released
+        assert closed == []
+        pool.release('second', second)
+        assert closed == [second]
+
+    def test_idle_sessions_are_evicted(self, monkeypatch):
+        pool = SessionPool(max_size=2, max_idle=60)
+        now = 1000.0
+        monkeypatch.setattr('appointment.controller.calendar.time.monotonic', lambda: now)
+        closed = []
+
+        first = pool.get('first')
+        self._track_close(monkeypatch, first, closed)
+
+        # A session in use is never idle
+        now += 61
+        pool.get('second')
+        assert list(pool.sessions) == ['first', 'second']
+
+        pool.release('first', first)
+        now += 61
+        pool.get('third')
+
+        assert 'first' not in pool.sessions
+        assert closed == [first]
+        assert pool.get('first') is not first
+
+    def test_connectors_release_their_session(self, monkeypatch):
+        pool = SessionPool(max_size=2, max_idle=60)
+        monkeypatch.setattr('appointment.controller.calendar.get_caldav_sessions', lambda: pool)
+
+        connector = self._make_connector('https://caldav.example.org/calendars/user/one/')
+        key = caldav_session_key('https://caldav.example.org/', 'user', 'password')
+        assert pool.sessions[key].users == 1
+
+        del connector
+        assert pool.sessions[key].users == 0
+
+
+class TestGoogleConnectorBusyTime:
+    def _make_connector(self, google_client, subscriber_id=1, calendar_id=1):
+        return GoogleConnector(
+            subscriber_id=subscriber_id,
+            calendar_id=calendar_id,
+            redis_instance=None,
+            db=None,
+            remote_calendar_id='primary',
+            google_client=google_client,
+        )
+
+    def test_calendars_are_queried_in_batches(self, monkeypatch):
+        monkeypatch.setenv('GOOGLE_FREEBUSY_BATCH_SIZE', '2')
+        google_client = Mock()
+        google_client.get_free_busy.side_effect = lambda calendar_ids, *a: [{'calendars': calendar_ids}]
+
+        calendar_ids = [f'calendar-{i}@example.org' for i in range(5)]
+        results = self._make_connector(google_client).get_busy_time(calendar_ids, '2026-01-01', '2026-01-02')
+
+        assert google_client.get_free_busy.call_count == 3
+        assert [item['calendars'] for item in results] == [calendar_ids[0:2], calendar_ids[2:4], calendar_ids[4:]]
+
+    def test_concurrent_lookups_share_one_call(self):
+        """Identical lookups that arrive while one is in flight wait for it instead of querying Google again"""
+        import threading
+        import time as pytime
+        from concurrent.futures import ThreadPoolExecutor
+
+        google_client = Mock()
+        started = threading.Event()
+
+        def slow_free_busy(*args):
+            started.set()
+            pytime.sleep(0.3)
+            return [{'start': datetime(2026, 1, 1, 9), 'end': datetime(2026, 1, 1, 10)}]
+
+        google_client.get_free_busy.side_effect = slow_free_busy
+
+        def lookup(subscriber_id):
+            connector = self._make_connector(google_client, subscriber_id=subscriber_id)
+            return connector.get_busy_time(['a@example.org', 'b@example.org'], '2026-01-01', '2026-01-02')
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            leader = executor.submit(lookup, 1)
+            started.wait()
+            followers = [executor.submit(lookup, 1) for _ in range(2)]
+            # A different subscriber never shares a call
+            other = executor.submit(lookup, 2)
+
+            results = [future.result() for future in [leader, *followers, other]]
+
+        assert google_client.get_free_busy.call_count == 2
+        assert all(result == results[0] for result in results)
+
+    def test_busy_time_is_cached(self, fake_redis):
+        """Busy times are cached per window, and a cached window also answers narrower requests"""
+        google_client = Mock()
+        google_client.get_free_busy.return_value = [
+            {'start': datetime(2026, 1, 1, 9), 'end': datetime(2026, 1, 1, 10)},
+            {'start': datetime(2026, 1, 5, 9), 'end': datetime(2026, 1, 5, 10)},
+        ]
+
+        connector = self._make_connector(google_client)
+        connector.redis_instance = fake_redis
+
+        busy_time = connector.get_busy_time(['a@example.org'], '2026-01-01', '2026-01-10')
+        assert connector.get_busy_time(['a@example.org'], '2026-01-01', '2026-01-10') == busy_time
+        assert google_client.get_free_busy.call_count == 1
+
+        # Answered from the cached window, without the busy time outside of our requested one
+        assert connector.get_busy_time(['a@example.org'], '2026-01-03', '2026-01-08') == [busy_time[1]]
+        assert google_client.get_free_busy.call_count == 1
+
+        # Other calendars, or windows that aren't covered, still go out to Google
+        connector.get_busy_time(['b@example.org'], '2026-01-01', '2026-01-10')
+        connector.get_busy_time(['a@example.org'], '2026-01-03', '2026-01-12')
+        assert google_client.get_free_busy.call_count == 3
+
+    def test_busy_time_cache_is_busted_by_other_calendars(self, fake_redis):
+        """A connection's busy times are looked up through its first calendar,
+        but a write to any of its calendars has to bust them"""
+        google_client = Mock()
+        google_client.get_free_busy.return_value = [{'start': datetime(2026, 1, 1, 9), 'end': datetime(2026, 1, 1, 10)}]
+        calendar_ids = ['a@example.org', 'b@example.org']
+
+        connector = self._make_connector(google_client)
+        connector.redis_instance = fake_redis
+        connector.get_busy_time(calendar_ids, '2026-01-01', '2026-01-10')
+
+        # Delete an event from the connection's second calendar
+        second_connector = self._make_connector(google_client, calendar_id=2)
+        second_connector.redis_instance = fake_redis
+        second_connector.delete_event('event-uid')
+
+        connector = self._make_connector(google_client)
+        connector.redis_instance = fake_redis
+        assert connector.get_cached_busy_time(calendar_ids, '2026-01-01', '2026-01-10') is None
+        assert connector.get_cached_busy_time(calendar_ids, '2026-01-02', '2026-01-05') is None
+
 
 class TestGoogleConnectorSaveEvent:
     """Tests for GoogleConnector.save_event with import_() and insert() paths."""
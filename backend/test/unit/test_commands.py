@@ -51,6 +51,138 @@ class TestBackfillGoogleChannels:
     """Tests that the backfill command only creates watch channels
     for connected Google calendars that are the default in a schedule."""
 
+    MODULE = 'appointment.commands.backfill_google_channels'
+
+    @pytest.fixture(autouse=True)
+    def checkpoint_file(self, tmp_path):
+        checkpoint_file = str(tmp_path / 'backfill.checkpoint')
+        with patch(f'{self.MODULE}.CHECKPOINT_FILE', checkpoint_file):
+            yield checkpoint_file
+
+    def _run_backfill(self, with_db, mock_google_client, **kwargs):
+        with patch(f'{self.MODULE}._common_setup'):
+            with patch(f'{self.MODULE}.get_google_client', return_value=mock_google_client):
+                with patch(f'{self.MODULE}.get_webhook_url', return_value='https://example.com/webhook'):
+                    with patch(f'{self.MODULE}.get_engine_and_session', return_value=(None, with_db)):
+                        from appointment.commands.backfill_google_channels import run
+
+                        run(**kwargs)
+
+    def _make_schedule_calendars(self, make_google_calendar, make_schedule, make_external_connections, count):
+        ext = make_external_connections(
+            subscriber_id=1,
+            type=models.ExternalConnectionType.google,
+            token=_make_google_token(),
+        )
+        calendars = [make_google_calendar(connected=True, external_connection_id=ext.id) for _ in range(count)]
+        for cal in calendars:
+            make_schedule(calendar_id=cal.id, active=True)
+        return calendars
+
+    def _make_google_client(self):
+        mock_google_client = Mock()
+        mock_google_client.SCOPES = ['https://www.googleapis.com/auth/calendar']
+        mock_google_client.watch_events.side_effect = lambda calendar_user, *args, **kwargs: {
+            'id': f'channel-{calendar_user}',
+            'resourceId': 'resource-456',
+            'expiration': str(int(datetime(2030, 1, 1, tzinfo=timezone.utc).timestamp() * 1000)),
+        }
+        mock_google_client.get_initial_sync_token.return_value = 'sync-token-abc'
+        return mock_google_client
+
+    def test_creates_channels_in_batches(
+        self, with_db, make_google_calendar, make_schedule, make_external_connections, checkpoint_file
+    ):
+        calendars = self._make_schedule_calendars(
+            make_google_calendar, make_schedule, make_external_connections, count=5
+        )
+        mock_google_client = self._make_google_client()
+
+        with patch(f'{self.MODULE}.BACKFILL_BATCH_SIZE', 2):
+            self._run_backfill(with_db, mock_google_client)
+
+        assert mock_google_client.watch_events.call_count == 5
+
+        with with_db() as db:
+            for cal in calendars:
+                channel = repo.google_calendar_channel.get_by_calendar_id(db, cal.id)
+                assert channel.channel_id == f'channel-{cal.user}'
+                assert channel.sync_token == 'sync-token-abc'
+
+        # A completed backfill leaves no checkpoint behind
+        assert not os.path.isfile(checkpoint_file)
+
+    def test_resumes_from_checkpoint(
+        self, with_db, make_google_calendar, make_schedule, make_external_connections, checkpoint_file
+    ):
+        calendars = self._make_schedule_calendars(
+            make_google_calendar, make_schedule, make_external_connections, count=3
+        )
+        mock_google_client = self._make_google_client()
+
+        # A previous run got through the first calendar
+        with open(checkpoint_file, 'w') as fh:
+            fh.write(str(calendars[0].id))
+
+        self._run_backfill(with_db, mock_google_client)
+
+        assert mock_google_client.watch_events.call_count == 2
+        with with_db() as db:
+            assert repo.google_calendar_channel.get_by_calendar_id(db, calendars[0].id) is None
+            assert repo.google_calendar_channel.get_by_calendar_id(db, calendars[2].id) is not None
+
+        # Unless we start over
+        with open(checkpoint_file, 'w') as fh:
+            fh.write(str(calendars[-1].id))
+
+        self._run_backfill(with_db, mock_google_client, restart=True)
+
+        assert mock_google_client.watch_events.call_count == 3
+        with with_db() as db:
+            assert repo.google_calendar_channel.get_by_calendar_id(db, calendars[0].id) is not None
+
+    def test_stops_channels_that_could_not_be_saved(
+        self, with_db, make_google_calendar, make_schedule, make_external_connections
+    ):
+        """A calendar that got a channel elsewhere in the meantime keeps it, and the one we created is stopped"""
+        from appointment.commands.backfill_google_channels import _save_channels
+
+        calendars = self._make_schedule_calendars(
+            make_google_calendar, make_schedule, make_external_connections, count=2
+        )
+        expiration = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        with with_db() as db:
+            repo.google_calendar_channel.create(
+                db,
+                calendar_id=calendars[0].id,
+                channel_id='existing-channel',
+                resource_id='existing-resource',
+                expiration=expiration,
+                state='existing-state',
+            )
+
+        channels = [
+            {
+                'calendar_id': cal.id,
+                'channel_id': f'channel-{cal.id}',
+                'resource_id': 'resource-456',
+                'expiration': expiration,
+                'state': 'state',
+                'sync_token': 'sync-token-abc',
+            }
+            for cal in calendars
+        ]
+        tokens = {cal.id: _make_google_token() for cal in calendars}
+
+        with patch('appointment.tasks.google.stop_google_channel.delay') as mock_stop:
+            with with_db() as db:
+                assert _save_channels(db, channels, tokens) == 1
+
+        mock_stop.assert_called_once_with(f'channel-{calendars[0].id}', 'resource-456', tokens[calendars[0].id])
+        with with_db() as db:
+            assert repo.google_calendar_channel.get_by_calendar_id(db, calendars[0].id).channel_id == 'existing-channel'
+            assert repo.google_calendar_channel.get_by_calendar_id(db, calendars[1].id) is not None
+
     def test_skips_google_calendar_without_schedule(self, with_db, make_google_calendar, make_external_connections):
         """A connected Google calendar not used by any schedule should be skipped."""
         ext = make_external_connections(
@@ -389,3 +521,36 @@ class TestRenewGoogleChannels:
             assert updated.channel_id == 'new-channel-id'
             assert updated.state is not None
             assert updated.state != 'old-state'
+
+    def test_renews_channels_in_batches(self, with_db, make_google_calendar, make_external_connections):
+        """Many expiring channels are renewed from the pool, and written back batch by batch."""
+        ext = make_external_connections(
+            subscriber_id=1,
+            type=models.ExternalConnectionType.google,
+            token=_make_google_token(),
+        )
+        calendars = [make_google_calendar(connected=True, external_connection_id=ext.id) for _ in range(5)]
+        for cal in calendars:
+            self._create_expiring_channel(with_db, cal.id)
+
+        new_expiration_ms = int(datetime(2030, 6, 1, tzinfo=timezone.utc).timestamp() * 1000)
+        mock_google_client = Mock()
+        mock_google_client.SCOPES = ['https://www.googleapis.com/auth/calendar']
+        mock_google_client.watch_events.side_effect = lambda calendar_user, *args, **kwargs: {
+            'id': f'new-channel-{calendar_user}',
+            'resourceId': 'new-resource-id',
+            'expiration': str(new_expiration_ms),
+        }
+
+        mock_stop_task = Mock()
+        with patch(f'{self.MODULE}.RENEWAL_BATCH_SIZE', 2):
+            self._run_renew(with_db, mock_google_client, mock_stop_task)
+
+        assert mock_stop_task.delay.call_count == 5
+        assert mock_google_client.watch_events.call_count == 5
+
+        with with_db() as db:
+            for cal in calendars:
+                updated = repo.google_calendar_channel.get_by_calendar_id(db, cal.id)
+                assert updated.channel_id == f'new-channel-{cal.user}'
+                assert updated.state != 'old-state'
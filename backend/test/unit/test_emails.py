@@ -0,0 +1,60 @@
+import datetime
+import smtplib
+import zoneinfo
+from unittest.mock import patch
+
+import pytest
+from celery.exceptions import Retry
+from kombu.utils import json
+
+from appointment.controller.mailer import Attachment, InvitationMail
+from appointment.tasks import emails
+
+
+class TestEmailTasks:
+    def test_emails_are_enqueued(self):
+        date = datetime.datetime(2026, 6, 1, 9, tzinfo=zoneinfo.ZoneInfo('Europe/Berlin'))
+        attachment = Attachment(mime=('text', 'calendar'), filename='invite.ics', data=b'BEGIN:VCALENDAR')
+
+        with (
+            patch.object(emails.deliver_email, 'apply_async') as apply_async,
+            patch.object(InvitationMail, 'send') as send,
+        ):
+            emails.send_invite_email('Owner', 'owner@example.org', date, 30, 'to@example.org', attachment, None)
+
+            # Nothing is sent by the web tier itself
+            send.assert_not_called()
+            apply_async.assert_called_once()
+            assert apply_async.call_args.kwargs['queue'] == 'mail'
+
+        # The arguments have to survive our json task serializer on the way to the worker
+        kind, payload = json.loads(json.dumps(apply_async.call_args.kwargs['args']))
+        assert kind == 'invite'
+
+        kwargs = emails._load_kwargs(payload)
+        assert kwargs['date'] == date
+        assert kwargs['date'].tzinfo == zoneinfo.ZoneInfo('Europe/Berlin')
+        assert kwargs['attachment'].filename == 'invite.ics'
+        assert kwargs['attachment'].data == b'BEGIN:VCALENDAR'
+        # Without a request there's no other language to fall back to
+        assert kwargs['lang'] == 'en'
+
+    def test_transient_errors_are_retried(self, with_l10n):
+        payload = emails._dump_kwargs({'to': 'to@example.org', 'appointment_title': 'Meeting', 'lang': 'en'})
+
+        with patch('appointment.controller.mailer.Mailer.send', side_effect=smtplib.SMTPServerDisconnected()):
+            with patch.object(emails.deliver_email, 'retry', side_effect=Retry()) as retry:
+                with pytest.raises(Retry):
+                    emails.deliver_email('zoom_meeting_failed', payload)
+
+                assert retry.call_args.kwargs['countdown'] == 30
+
+    def test_permanent_errors_are_not_retried(self, with_l10n):
+        payload = emails._dump_kwargs({'to': 'to@example.org', 'appointment_title': 'Meeting', 'lang': 'en'})
+        refused = smtplib.SMTPRecipientsRefused({'to@example.org': (550, b'No such user')})
+
+        with patch('appointment.controller.mailer.Mailer.send', side_effect=refused):
+            with patch.object(emails.deliver_email, 'retry') as retry:
+                emails.deliver_email('zoom_meeting_failed', payload)
+
+                retry.assert_not_called()
@@ -1,6 +1,15 @@
 from unittest.mock import patch, MagicMock
 
-from appointment.controller.apis.google_client import GoogleClient
+from googleapiclient.discovery_cache import get_static_doc
+
+from appointment.controller.apis.google_client import (
+    GoogleClient,
+    SendUpdates,
+    get_calendar_discovery_document,
+    get_credentials_key,
+    service_cache,
+)
+from appointment.exceptions.calendar import EventNotDeletedException
 
 
 class TestGoogleClient:
@@ -96,3 +105,118 @@ class TestGoogleClient:
         with patch.object(client, '_create_flow', return_value=mock_flow_b):
             client.get_credentials('code_b', code_verifier=verifier_user_b)
             assert mock_flow_b.code_verifier == verifier_user_b
+
+
+class TestServiceCache:
+    """Tests for re-using Calendar API services between calls"""
+
+    def _make_credentials(self, refresh_token):
+        from google.oauth2.credentials import Credentials
+
+        return Credentials(token='access', refresh_token=refresh_token, client_id='client_id')
+
+    def test_service_is_reused_for_same_credentials(self):
+        """Credential objects created from the same stored token should share a service"""
+        service_cache.clear()
+
+        with GoogleClient.calendar_service(self._make_credentials('abc')) as service:
+            pass
+        with GoogleClient.calendar_service(self._make_credentials('abc')) as same_service:
+            pass
+        with GoogleClient.calendar_service(self._make_credentials('def')) as other_service:
+            pass
+
+        assert service is same_service
+        assert service is not other_service
+
+        service_cache.clear()
+
+    def test_service_cache_is_bounded(self, monkeypatch):
+        monkeypatch.setenv('GOOGLE_SERVICE_CACHE_SIZE', '2')
+        service_cache.clear()
+
+        for refresh_token in ('a', 'b', 'c'):
+            service_cache.get(self._make_credentials(refresh_token))
+
+        assert len(service_cache.services) == 2
+        assert get_credentials_key(self._make_credentials('a')) not in service_cache.services
+
+        service_cache.clear()
+
+    def test_service_requests_time_out(self, monkeypatch):
+        from googleapiclient.http import DEFAULT_HTTP_TIMEOUT_SEC
+
+        monkeypatch.delenv('GOOGLE_API_TIMEOUT_SECONDS', raising=False)
+        service_cache.clear()
+        assert service_cache.get(self._make_credentials('a'))._http.http.timeout == DEFAULT_HTTP_TIMEOUT_SEC
+
+        monkeypatch.setenv('GOOGLE_API_TIMEOUT_SECONDS', '5')
+        service_cache.clear()
+        assert service_cache.get(self._make_credentials('a'))._http.http.timeout == 5
+
+        service_cache.clear()
+
+    def test_discovery_document_is_loaded_once(self):
+        with patch('appointment.controller.apis.google_client.get_static_doc', wraps=get_static_doc) as spy:
+            get_calendar_discovery_document.cache_clear()
+            get_calendar_discovery_document()
+            get_calendar_discovery_document()
+
+            assert spy.call_count == 1
+
+
+class TestEventBatches:
+    """Tests for sending several event requests as batch requests"""
+
+    class FakeBatch:
+        def __init__(self, callback, batches, failing):
+            self.callback = callback
+            self.requests = []
+            self.failing = failing
+            batches.append(self)
+
+        def add(self, request, request_id):
+            self.requests.append((request_id, request))
+
+        def execute(self):
+            for request_id, request in self.requests:
+                if request.uri.split('?')[0].endswith(self.failing):
+                    self.callback(request_id, None, Exception('Not Found'))
+                else:
+                    self.callback(request_id, {'uri': request.uri, 'method': request.method}, None)
+
+    def test_update_events_is_batched(self, monkeypatch):
+        from google.oauth2.credentials import Credentials
+
+        monkeypatch.setenv('GOOGLE_EVENTS_BATCH_SIZE', '2')
+        service_cache.clear()
+
+        token = Credentials(token='access', refresh_token='batch', client_id='client_id')
+        service = service_cache.get(token)
+        batches = []
+        monkeypatch.setattr(
+            service,
+            'new_batch_http_request',
+            lambda callback: self.FakeBatch(callback, batches, failing='event-2'),
+            raising=False,
+        )
+
+        client = GoogleClient('client_id', 'secret', 'project', 'callback')
+        errors = client.update_events(
+            'calendar',
+            [('event-1', {'status': 'confirmed'}, SendUpdates.ALL)],
+            [('event-2', SendUpdates.NONE), ('event-3', SendUpdates.NONE)],
+            token,
+        )
+
+        assert [len(batch.requests) for batch in batches] == [2, 1]
+        assert [request.method for batch in batches for _, request in batch.requests] == ['PATCH', 'DELETE', 'DELETE']
+        assert errors[0] is None
+        assert isinstance(errors[1], EventNotDeletedException)
+        assert errors[2] is None
+
+        events = client.get_events('calendar', ['event-1', 'event-2'], token)
+        assert events['event-1']['method'] == 'GET'
+        assert events['event-2'] is None
+
+        service_cache.clear()
@@ -5,11 +5,22 @@ import os
 from datetime import datetime, timedelta, timezone
 from unittest.mock import Mock, patch
 
-from appointment.controller.google_watch import setup_watch_channel, teardown_watch_channel
+import pytest
+
+from appointment.controller.google_watch import (
+    RateLimiter,
+    calendar_sync_lock,
+    queue_calendar_sync,
+    setup_watch_channel,
+    teardown_watch_channel,
+)
 from appointment.database import models, repo
 from appointment.tasks.google import (
     _handle_bookee_rsvp,
     _handle_subscriber_rsvp,
+    _process_changed_events,
+    _sync_channel_changes,
+    sync_google_calendar_changes,
 )
 
 
@@ -50,6 +61,87 @@ class TestFindAppointmentByExternalId:
             assert repo.appointment.get_by_calendar_and_external_id(db, cal1.id, 'event-on-cal1') is not None
             assert repo.appointment.get_by_calendar_and_external_id(db, cal2.id, 'event-on-cal1') is None
 
+    def test_finds_matching_appointments_in_bulk(self, with_db, make_google_calendar, make_appointment):
+        calendar = make_google_calendar(connected=True)
+        other_calendar = make_google_calendar(connected=True)
+        appointments = [make_appointment(calendar_id=calendar.id, slots=None) for _ in range(2)]
+        other_appointment = make_appointment(calendar_id=other_calendar.id, slots=None)
+
+        with with_db() as db:
+            for i, appointment in enumerate([*appointments, other_appointment]):
+                repo.appointment.update_external_id_by_id(db, appointment.id, f'event-{i}')
+
+            result = repo.appointment.get_by_calendar_and_external_ids(
+                db, calendar.id, ['event-0', 'event-1', 'event-2', 'nonexistent-event']
+            )
+            assert {key: value.id for key, value in result.items()} == {
+                'event-0': appointments[0].id,
+                'event-1': appointments[1].id,
+            }
+
+
+class TestProcessChangedEvents:
+    def test_changes_are_applied_together_and_followed_up_in_batch(
+        self, with_db, make_google_calendar, make_appointment, make_attendee, make_appointment_slot
+    ):
+        """Changed events are looked up at once, and their Google follow-ups sent as batch requests."""
+        calendar = make_google_calendar(connected=True)
+        attendee = make_attendee(email='bookee@example.com', name='Bookee')
+
+        appointment_ids = []
+        for event_id in ('event-accepted', 'event-declined', 'event-cancelled'):
+            appointment = make_appointment(
+                calendar_id=calendar.id, status=models.AppointmentStatus.opened, slots=None
+            )
+            make_appointment_slot(
+                appointment_id=appointment.id,
+                booking_status=models.BookingStatus.requested,
+                attendee_id=attendee.id,
+            )
+            with with_db() as db:
+                repo.appointment.update_external_id_by_id(db, appointment.id, event_id)
+            appointment_ids.append(appointment.id)
+
+        changed_events = [
+            {
+                'id': 'event-accepted',
+                'attendees': [{'email': 'owner@example.com', 'self': True, 'responseStatus': 'accepted'}],
+            },
+            {'id': 'event-declined', 'attendees': [{'email': 'Bookee@example.com', 'responseStatus': 'declined'}]},
+            {'id': 'event-cancelled', 'status': 'cancelled'},
+            {'id': 'event-unknown', 'status': 'cancelled'},
+        ]
+
+        mock_client = Mock()
+        mock_client.get_events.return_value = {
+            'event-accepted': {
+                'attendees': [{'email': 'owner@example.com', 'self': True, 'responseStatus': 'needsAction'}],
+            },
+        }
+        mock_client.update_events.return_value = [None, None]
+        mock_token = Mock()
+
+        with with_db() as db, patch.object(db, 'commit', wraps=db.commit) as mock_commit:
+            _process_changed_events(db, calendar.id, changed_events, mock_client, mock_token, calendar.user)
+            assert mock_commit.call_count == 1
+
+        with with_db() as db:
+            accepted, declined, cancelled = [repo.appointment.get(db, id) for id in appointment_ids]
+            assert accepted.status == models.AppointmentStatus.closed
+            assert accepted.slots[0].booking_status == models.BookingStatus.booked
+            assert declined.slots[0].booking_status == models.BookingStatus.declined
+            assert cancelled.slots[0].booking_status == models.BookingStatus.cancelled
+
+        mock_client.get_event.assert_not_called()
+        mock_client.patch_event.assert_not_called()
+        mock_client.delete_event.assert_not_called()
+        mock_client.get_events.assert_called_once_with(calendar.user, ['event-accepted'], mock_token)
+
+        _, patches, deletes, _ = mock_client.update_events.call_args.args
+        assert [(event_id, body['status']) for event_id, body, _ in patches] == [('event-accepted', 'confirmed')]
+        assert patches[0][1]['attendees'][0]['responseStatus'] == 'accepted'
+        assert deletes == [('event-declined', 'none')]
+
 
 class TestHandleBookeeRsvp:
     def _make_test_objects(self, with_db, make_google_calendar, make_appointment, make_attendee, make_appointment_slot):
@@ -271,6 +363,8 @@ class TestHandleSubscriberRsvp:
             )
 
         mock_create_zoom.assert_called_once()
+        # The link is committed along with the rest of the event's changes
+        assert mock_create_zoom.call_args.kwargs['commit'] is False
         patch_body = mock_client.patch_event.call_args.args[2]
         assert patch_body.get('location') == 'https://zoom.us/j/123456'
 
@@ -624,3 +718,111 @@ class TestTeardownWatchChannel:
             assert result is True
             assert repo.google_calendar_channel.get_by_calendar_id(db, calendar.id) is None
             mock_stop_task.delay.assert_not_called()
+
+
+class TestCalendarSync:
+    @patch('appointment.controller.google_watch.sync_google_calendar_changes')
+    def test_notification_burst_is_coalesced(self, mock_sync_task, fake_redis):
+        assert queue_calendar_sync(fake_redis, 'channel-1')
+        assert not queue_calendar_sync(fake_redis, 'channel-1')
+        assert not queue_calendar_sync(fake_redis, 'channel-1')
+        assert queue_calendar_sync(fake_redis, 'channel-2')
+
+        assert mock_sync_task.apply_async.call_count == 2
+        assert mock_sync_task.apply_async.call_args_list[0].args == (('channel-1',),)
+        assert mock_sync_task.apply_async.call_args_list[0].kwargs['countdown'] > 0
+
+        # Once the sync starts, the next notification queues another sync
+        with calendar_sync_lock(fake_redis, 'channel-1') as locked:
+            assert locked
+            assert queue_calendar_sync(fake_redis, 'channel-1')
+
+        assert mock_sync_task.apply_async.call_count == 3
+
+    @patch('appointment.controller.google_watch.sync_google_calendar_changes')
+    def test_notification_without_redis_syncs_right_away(self, mock_sync_task):
+        assert queue_calendar_sync(None, 'channel-1')
+        mock_sync_task.delay.assert_called_once_with('channel-1')
+
+    def test_only_one_sync_per_channel(self, fake_redis):
+        with (
+            patch('appointment.tasks.google.get_redis', return_value=fake_redis),
+            patch('appointment.tasks.google._sync_channel_changes') as mock_sync,
+            patch('appointment.controller.google_watch.sync_google_calendar_changes') as mock_sync_task,
+        ):
+            with calendar_sync_lock(fake_redis, 'channel-1') as locked:
+                assert locked
+                # A sync starting while another one is running leaves the changes to a follow-up sync
+                sync_google_calendar_changes('channel-1')
+                mock_sync.assert_not_called()
+                mock_sync_task.apply_async.assert_called_once()
+
+            sync_google_calendar_changes('channel-1')
+            mock_sync.assert_called_once_with('channel-1', fake_redis)
+
+
+class TestRateLimiter:
+    def test_calls_are_spaced_out(self):
+        rate_limiter = RateLimiter(100)
+
+        with patch('appointment.controller.google_watch.time.sleep') as mock_sleep:
+            for _ in range(3):
+                rate_limiter.wait()
+
+        # The first call goes through right away, the others wait for their turn
+        assert mock_sleep.call_count == 2
+        assert all(0 < call.args[0] <= 0.02 for call in mock_sleep.call_args_list)
+
+    def test_disabled(self):
+        rate_limiter = RateLimiter(0)
+
+        with patch('appointment.controller.google_watch.time.sleep') as mock_sleep:
+            rate_limiter.wait()
+            rate_limiter.wait()
+
+        mock_sleep.assert_not_called()
+
+    def test_sync_token_only_moves_on_once_changes_are_committed(
+        self, with_db, make_google_calendar, make_external_connections, make_pro_subscriber
+    ):
+        subscriber = make_pro_subscriber()
+        google_creds = json.dumps(
+            {'token': 'fake-token', 'refresh_token': 'fake-refresh', 'client_id': 'id', 'client_secret': 'secret'}
+        )
+        ext_conn = make_external_connections(
+            subscriber.id, type=models.ExternalConnectionType.google, token=google_creds
+        )
+        calendar = make_google_calendar(subscriber_id=subscriber.id, connected=True, external_connection_id=ext_conn.id)
+        with with_db() as db:
+            repo.google_calendar_channel.create(
+                db,
+                calendar_id=calendar.id,
+                channel_id='channel-1',
+                resource_id='resource-1',
+                expiration=datetime.now(tz=timezone.utc) + timedelta(days=7),
+                state='state',
+                sync_token='old-token',
+            )
+
+        mock_client = Mock()
+        mock_client.SCOPES = ['https://www.googleapis.com/auth/calendar.events']
+        mock_client.list_events_sync.return_value = ([{'id': 'event-1'}], 'new-token')
+
+        with (
+            patch('appointment.tasks.google.get_google_client', return_value=mock_client),
+            patch('appointment.tasks.google.get_engine_and_session', return_value=(None, with_db)),
+        ):
+            # A failed sync is retried from the same token, so its changes aren't lost
+            with patch('appointment.tasks.google._process_changed_events', side_effect=RuntimeError()):
+                with pytest.raises(RuntimeError):
+                    _sync_channel_changes('channel-1', None)
+
+            with with_db() as db:
+                assert repo.google_calendar_channel.get_by_channel_id(db, 'channel-1').sync_token == 'old-token'
+
+            with patch('appointment.tasks.google._process_changed_events') as mock_process:
+                _sync_channel_changes('channel-1', None)
+                mock_process.assert_called_once()
+
+            with with_db() as db:
+                assert repo.google_calendar_channel.get_by_channel_id(db, 'channel-1').sync_token == 'new-token'
@@ -0,0 +1,29 @@
+from unittest.mock import patch
+
+from appointment.middleware.l10n import get_fluent, get_localization, normalize_locales
+
+
+class TestGetFluent:
+    def test_normalize_locales(self):
+        assert normalize_locales(['de']) == ('de', 'en')
+        assert normalize_locales(['en', 'de', 'en']) == ('en', 'de')
+
+    def test_bundles_are_parsed_once(self):
+        """The ftl files should only be read once per locale list"""
+        get_localization.cache_clear()
+
+        with patch('appointment.middleware.l10n.FluentResourceLoader.resources', autospec=True) as resources:
+            resources.side_effect = lambda *args: iter([])
+
+            get_fluent(['de'])('locale')
+            get_fluent(['de', 'en'])('locale')
+            get_fluent(['de'])('locale')
+
+            # One per locale of ('de', 'en')
+            assert resources.call_count == 2
+
+        get_localization.cache_clear()
+
+    def test_translations(self):
+        assert get_fluent(['de'])('locale') == 'de'
+        assert get_fluent(['en'])('locale') == 'en'
@@ -1,6 +1,9 @@
 import datetime
+import smtplib
 from unittest.mock import MagicMock
 
+import pytest
+
 from starlette_context import request_cycle_context
 
 from appointment.controller.mailer import (
@@ -12,6 +15,11 @@ from appointment.controller.mailer import (
     NewBookingMail,
     PendingRequestMail,
     Attachment,
+    Mailer,
+    get_asset,
+    get_jinja,
+    get_template,
+    smtp_pool,
 )
 from appointment.database import schemas
 from appointment.middleware.l10n import L10n
@@ -237,3 +245,107 @@ class TestMailer:
             text = new_booking_mail.text()
             assert 'has just booked' in text
             assert 'hat soeben' not in text
+
+
+class TestRendering:
+    def test_templates_are_compiled_once(self):
+        get_jinja.cache_clear()
+
+        assert get_jinja() is get_jinja()
+        assert get_template('invite.jinja2') is get_template('invite.jinja2')
+
+        get_jinja.cache_clear()
+
+    def test_assets_are_read_once(self, with_l10n, monkeypatch):
+        get_asset.cache_clear()
+        reads = []
+
+        original_open = open
+
+        def tracked_open(path, *args, **kwargs):
+            reads.append(path)
+            return original_open(path, *args, **kwargs)
+
+        monkeypatch.setattr('builtins.open', tracked_open)
+
+        for _ in range(2):
+            InvitationMail(
+                to='to@example.org',
+                name='fake',
+                email='fake@example.org',
+                date=datetime.datetime.now(),
+                duration=30,
+                attachments=[Attachment(mime=('text', 'calendar'), filename='test.ics', data=b'')],
+            ).build()
+
+        assert len([path for path in reads if str(path).endswith('.png')]) == 3
+
+
+class TestSMTPPool:
+    @pytest.fixture
+    def smtp_connections(self, monkeypatch):
+        """Patches out smtplib.SMTP, and returns the list of connections that were opened"""
+        connections = []
+
+        def make_smtp(*args, **kwargs):
+            server = MagicMock()
+            server.noop.return_value = (250, b'OK')
+            connections.append(server)
+            return server
+
+        monkeypatch.setenv('SMTP_SECURITY', 'NONE')
+        monkeypatch.setenv('SMTP_URL', 'localhost')
+        monkeypatch.setenv('SMTP_PORT', '25')
+        monkeypatch.setattr('smtplib.SMTP', make_smtp)
+
+        smtp_pool.close_all()
+        yield connections
+        smtp_pool.close_all()
+
+    def _make_mail(self, to='to@example.org'):
+        return Mailer(to=to, subject='Hello', plain='Hello!')
+
+    def test_connection_is_reused(self, smtp_connections):
+        self._make_mail().send()
+        self._make_mail().send()
+
+        assert len(smtp_connections) == 1
+        assert smtp_connections[0].send_message.call_count == 2
+        smtp_connections[0].noop.assert_called_once()
+
+    def test_dead_connection_is_replaced(self, smtp_connections):
+        self._make_mail().send()
+        smtp_connections[0].noop.side_effect = smtplib.SMTPServerDisconnected()
+
+        self._make_mail().send()
+
+        assert len(smtp_connections) == 2
+        assert smtp_connections[1].send_message.call_count == 1
+
+    def test_reconnects_when_server_hung_up(self, smtp_connections):
+        """A connection that passed its health check can still be gone by the time we send"""
+        self._make_mail().send()
+        smtp_connections[0].send_message.side_effect = smtplib.SMTPServerDisconnected()
+
+        self._make_mail().send()
+
+        assert len(smtp_connections) == 2
+        assert smtp_connections[1].send_message.call_count == 1
+
+    def test_send_batch(self, smtp_connections):
+        mails = [self._make_mail(f'to{i}@example.org') for i in range(3)]
+
+        def send_message(message, to_addrs):
+            if to_addrs == 'to1@example.org':
+                raise smtplib.SMTPRecipientsRefused({to_addrs: (550, b'No such user')})
+
+        failed = Mailer.send_batch(mails)
+        assert failed == []
+
+        smtp_connections[0].send_message.side_effect = send_message
+        failed = Mailer.send_batch(mails)
+
+        # The refused mail doesn't stop the others, and everything went over a single connection
+        assert failed == [mails[1]]
+        assert len(smtp_connections) == 1
+        assert smtp_connections[0].send_message.call_count == 6
@@ -26,6 +26,13 @@ class TestMisc:
         for i, clear_str in enumerate(clear_strs):
             assert len(encrypt(clear_str)) == calculate_encrypted_length(len(clear_str))
 
+    def test_blind_index(self):
+        assert models.blind_index(None) is None
+        assert len(models.blind_index('value')) == 64
+        assert models.blind_index('value') == models.blind_index('value')
+        assert models.blind_index('Value') != models.blind_index('value')
+        assert models.blind_index('Value', casefold=True) == models.blind_index('value', casefold=True)
+
 
 class TestAppointment:
     def test_appointment_uuids_are_unique(self, with_db, make_caldav_calendar):
@@ -55,6 +62,20 @@ class TestAppointment:
 
 
 class TestSubscriber:
+    def test_blind_indexes_follow_their_columns(self, with_db, make_basic_subscriber):
+        subscriber = make_basic_subscriber(email='someone@example.org')
+
+        with with_db() as db:
+            subscriber = db.merge(subscriber)
+            assert subscriber.email_index == models.blind_index('someone@example.org')
+            assert subscriber.username_index == models.blind_index(subscriber.username)
+
+            subscriber.username = 'someone-else'
+            db.commit()
+
+            assert repo.subscriber.get_by_username(db, 'someone-else').id == subscriber.id
+            assert repo.subscriber.get_by_email(db, 'SomeOne@example.org').id == subscriber.id
+
     def test_get_external_connection_by_type_only(self, with_db, make_basic_subscriber, make_external_connections):
         """Test that get_external_connection returns the first connection of
         the specified type when no type_id is provided"""
@@ -0,0 +1,75 @@
+from unittest.mock import patch
+
+from sqlalchemy import inspect
+
+from appointment.controller import public_link
+from appointment.controller.auth import signed_url_by_subscriber
+
+
+class TestPublicLink:
+    def test_resolved_link_is_cached(
+        self, with_db, make_pro_subscriber, make_caldav_calendar, make_schedule, fake_redis
+    ):
+        subscriber = make_pro_subscriber()
+        calendar = make_caldav_calendar(subscriber_id=subscriber.id)
+        schedule = make_schedule(calendar_id=calendar.id)
+        url = signed_url_by_subscriber(subscriber)
+
+        with with_db() as db:
+            link = public_link.resolve(db, fake_redis, url)
+            assert link.subscriber.id == subscriber.id
+            assert link.schedule.id == schedule.id
+
+        with with_db() as db, patch('appointment.database.repo.subscriber.verify_link') as mock_verify_link:
+            link = public_link.resolve(db, fake_redis, url)
+
+            mock_verify_link.assert_not_called()
+            assert link.subscriber.id == subscriber.id
+            assert link.schedule.id == schedule.id
+
+            # Nobody's credentials are decrypted to serve the link
+            assert 'password' in inspect(link.schedule.calendar).unloaded
+            assert 'password' in inspect(link.subscriber).unloaded
+
+    def test_invalidate(self, with_db, make_pro_subscriber, make_caldav_calendar, make_schedule, fake_redis):
+        subscriber = make_pro_subscriber()
+        calendar = make_caldav_calendar(subscriber_id=subscriber.id)
+        make_schedule(calendar_id=calendar.id)
+        url = signed_url_by_subscriber(subscriber)
+
+        with with_db() as db:
+            assert public_link.resolve(db, fake_redis, url)
+
+            # Refresh the subscriber's short link, the cached link still resolves until it's invalidated
+            db.merge(subscriber).short_link_hash = 'refreshed'
+            db.commit()
+            assert public_link.resolve(db, fake_redis, url)
+
+            assert public_link.invalidate(fake_redis, subscriber.id)
+            assert public_link.resolve(db, fake_redis, url) is None
+
+    def test_removed_schedule(self, with_db, make_pro_subscriber, make_caldav_calendar, make_schedule, fake_redis):
+        subscriber = make_pro_subscriber()
+        calendar = make_caldav_calendar(subscriber_id=subscriber.id)
+        schedule = make_schedule(calendar_id=calendar.id)
+        url = signed_url_by_subscriber(subscriber)
+
+        with with_db() as db:
+            assert public_link.resolve(db, fake_redis, url).schedule.id == schedule.id
+
+            db.delete(db.merge(schedule))
+            db.commit()
+
+            link = public_link.resolve(db, fake_redis, url)
+            assert link.subscriber.id == subscriber.id
+            assert link.schedule is None
+
+    def test_without_redis(self, with_db, make_pro_subscriber):
+        subscriber = make_pro_subscriber()
+
+        with with_db() as db:
+            link = public_link.resolve(db, None, signed_url_by_subscriber(subscriber))
+            assert link.subscriber.id == subscriber.id
+            assert link.schedule is None
+
+            assert public_link.resolve(db, None, f'{signed_url_by_subscriber(subscriber)}x') is None
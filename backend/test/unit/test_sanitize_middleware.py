@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+import nh3
+
+from appointment.middleware.SanitizeMiddleware import SanitizeMiddleware
+
+
+class TestSanitizeMiddleware:
+    def _call(self, messages: list[dict], headers=None) -> list[dict]:
+        """Send the request messages through the middleware, and return what the app received"""
+        received = []
+
+        async def app(scope, receive, send):
+            while True:
+                message = await receive()
+                received.append(message)
+                if message['type'] != 'http.request' or not message.get('more_body', False):
+                    break
+
+        async def receive():
+            return messages.pop(0)
+
+        scope = {'type': 'http', 'method': 'POST', 'headers': headers or []}
+        asyncio.run(SanitizeMiddleware(app)(scope, receive, None))
+        return received
+
+    def test_nested_values_are_sanitized(self):
+        body = {
+            'name': '<b>Name</b>',
+            'slot': {'start': '2026-01-01', 'details': {'notes': ['<script>x</script>ok', 1, None]}},
+            'emails': [{'to': '<i>a@example.org</i>'}],
+        }
+
+        sanitized = json.loads(SanitizeMiddleware.sanitize_body(json.dumps(body).encode()))
+
+        assert sanitized == {
+            'name': 'Name',
+            'slot': {'start': '2026-01-01', 'details': {'notes': ['ok', 1, None]}},
+            'emails': [{'to': 'a@example.org'}],
+        }
+
+    def test_clean_body_is_passed_through(self):
+        body = b'{"name": "Name", "duration": 30, "ok": true}'
+        assert SanitizeMiddleware.sanitize_body(body) is body
+
+        not_json = b'name=<b>Name</b>'
+        assert SanitizeMiddleware.sanitize_body(not_json) is not_json
+
+    def test_lenient_json_is_sanitized(self):
+        """Bodies our request parsing accepts (but a strict parser doesn't) are still sanitized"""
+        body = b'{"name": "<b>Name</b>", "value": NaN, "big": 123456789012345678901234567890}'
+        sanitized = json.loads(SanitizeMiddleware.sanitize_body(body))
+
+        assert sanitized['name'] == 'Name'
+        assert sanitized['big'] == 123456789012345678901234567890
+
+    def test_only_unsafe_strings_are_cleaned(self):
+        """Skipping strings without unsafe characters must give the same result as cleaning them"""
+        for value in ('plain text', 'a "quoted" \'value\'', 'ünï €\t', 'a & b', 'a > b', 'a\r\nb', 'a\x00b', 'a\xa0b'):
+            assert SanitizeMiddleware.sanitize_str(value) == nh3.clean(value, tags={''})
+
+    def test_chunked_body_is_sanitized(self):
+        received = self._call(
+            [
+                {'type': 'http.request', 'body': b'{"name": "<b>Na', 'more_body': True},
+                {'type': 'http.request', 'body': b'me</b>"}', 'more_body': False},
+                {'type': 'http.disconnect'},
+            ]
+        )
+
+        assert received == [{'type': 'http.request', 'body': b'{"name":"Name"}', 'more_body': False}]
+
+    def test_uploads_are_passed_through(self):
+        messages = [
+            {'type': 'http.request', 'body': b'--boundary <b>', 'more_body': True},
+            {'type': 'http.request', 'body': b'</b>--boundary--', 'more_body': False},
+        ]
+        received = self._call(list(messages), headers=[(b'content-type', b'multipart/form-data; boundary=boundary')])
+
+        assert received == messages